@@ -0,0 +1,175 @@
+import json
+import random
+
+"""
+	Synthetic, deterministic fixtures for the parser benchmarks: XTools
+	articleinfo and topedits pages, MediaWiki API responses and 2x2 tables
+	(for the Fisher exact tests) in several sizes. No recorded pages are
+	used; the pages are generated to match what the legacy parser expects of
+	the real ones: the text of the pages (BeautifulSoup's get_text) has the
+	lines at the offsets that the legacy parser skips to, so the legacy and
+	the new parsers can be run on the same pages. The values (e.g., dates
+	such as '2015-07-28, 19:42') are in the format of the output of the
+	original scraper in data/designer_drugs_user_community.csv.
+"""
+
+SEED = 20160718 # the fixtures only depend on the seed
+
+# number of rows per size
+SIZES = (('small', 100), ('medium', 10000), ('large', 100000))
+
+# number of categories per page in the API responses (50 pages per response)
+API_SIZES = (('small', 5), ('medium', 100), ('large', 1000))
+
+WORDS = ('acid', 'amine', 'benzyl', 'chloro', 'drug', 'ethyl', 'fluoro', 'methyl', 'morpho', 'phenyl',
+			'piperazine', 'propyl', 'research', 'synthesis', 'tryptamine', 'user', 'wiki', 'Ω', 'é')
+
+PAGE_START = """<!DOCTYPE html>
+<html>
+<head>
+<title>%s</title>
+</head>
+<body>
+<div class="container">
+<h2>%s</h2>
+"""
+
+PAGE_END = """</div>
+</body>
+</html>
+"""
+
+def get_name(rng, n_words=2):
+	return ' '.join(rng.choice(WORDS).capitalize() for _ in range(n_words))
+
+def get_username(rng, index):
+	kind = rng.random()
+	if kind < 0.05: # unregistered user
+		return '%d.%d.%d.%d'%tuple(rng.randint(1, 254) for _ in range(4))
+	if kind < 0.08:
+		return '%sBot'%get_name(rng, 1)
+	return '%s%d'%(get_name(rng, 2).replace(' ', '_'), index)
+
+def get_date(rng):
+	return '%04d-%02d-%02d, %02d:%02d'%(rng.randint(2002, 2016), rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59))
+
+def get_article_editors_page(n_rows, seed=SEED):
+	"""
+	Returns an articleinfo page (str) with a table of n_rows top editors.
+
+	Every row takes 14 lines of text, starting with the username, which is 3 lines
+	after the header of the table (the line with 'Added (Bytes)'):
+
+		username, 4 lines, edits, minor edits, 1 line, first edit, last edit,
+		1 line, added bytes, 2 lines (next username)
+	"""
+	rng   = random.Random('%s-articleinfo-%d'%(seed, n_rows))
+	title = get_name(rng, 2)
+	lines = [PAGE_START%(title, title), '<h3>Top editors</h3>\n']
+	lines.append('<table class="table table-bordered"><thead><tr><th>#</th><th>Username</th><th>%</th><th>Edits</th>'
+					'<th>Minor edits</th><th>Minor %</th><th>First edit</th><th>Latest edit</th><th>atbe</th><th>Added (Bytes)</th></tr>\n')
+	lines.append('</thead><tbody>\n')
+	for index in range(n_rows):
+		username = get_username(rng, index)
+		n_edits  = rng.randint(1, 5000)
+		n_minor  = rng.randint(0, n_edits)
+		lines.append('<tr><td>%d</td>\n'%(index + 1))
+		lines.append('<td><a href="https://en.wikipedia.org/wiki/User:%s">%s</a>\n'%(username.replace(' ', '_'), username))
+		lines.append('<br/><small><a href="https://en.wikipedia.org/wiki/Special:Contributions/%s">contribs</a>\n'%username)
+		lines.append('<a href="https://en.wikipedia.org/wiki/Special:Log/%s">log</a>\n'%username)
+		lines.append('<a href="https://tools.wmflabs.org/xtools/pages/?user=%s">pages</a></small></td>\n'%username)
+		lines.append('<td>%.1f%%</td>\n'%(rng.random() * 10))
+		lines.append('<td>{:,}</td>\n'.format(n_edits))
+		lines.append('<td>{:,}</td>\n'.format(n_minor))
+		lines.append('<td>%.1f%%</td>\n'%(100. * n_minor / n_edits))
+		lines.append('<td>%s</td>\n'%get_date(rng))
+		lines.append('<td>%s</td>\n'%get_date(rng))
+		lines.append('<td>%.1f</td>\n'%(rng.random() * 100))
+		lines.append('<td>{:,}</td>\n'.format(rng.randint(0, 2000000)))
+		lines.append('</tr>\n')
+	lines.append('</tbody>\n')
+	lines.append('</table>\n')
+	lines.append(PAGE_END)
+	return ''.join(lines)
+
+def get_user_top_edits_page(n_rows, seed=SEED):
+	"""
+	Returns a topedits page (str) with a table of n_rows top edits.
+
+	The number of edits of the first row is 5 lines after the heading 'TOP edits
+	per namespace [hide]'; every row takes 6 lines of text:
+
+		edits, title, 4 lines (edits of the next row)
+	"""
+	rng      = random.Random('%s-topedits-%d'%(seed, n_rows))
+	username = get_username(rng, 0)
+	lines    = [PAGE_START%(username, username)]
+	lines.append('<h3>Namespace Totals</h3>\n')
+	lines.append('<table><tr><th>Namespace</th><th>Edits</th></tr><tr><td>Main</td><td>%d</td></tr></table>\n'%n_rows)
+	lines.append('<h3>TOP edits per namespace <a href="#">[hide]</a></h3>\n')
+	lines.append('<table class="table">\n')
+	lines.append('<thead><tr><th>Edits</th><th>Page title</th><th>Links</th><th>Assessment</th></tr></thead>\n')
+	lines.append('<tbody>\n')
+	for index in range(n_rows):
+		title = '%s %d'%(get_name(rng, rng.randint(1, 3)), index)
+		lines.append('<tr>\n')
+		lines.append('<td>{:,}</td>\n'.format(rng.randint(1, 5000)))
+		lines.append('<td><a href="https://en.wikipedia.org/wiki/%s">%s</a></td>\n'%(title.replace(' ', '_'), title))
+		lines.append('<td><a href="https://en.wikipedia.org/w/index.php?title=%s&amp;action=history">history</a>\n'%title.replace(' ', '_'))
+		lines.append('<a href="https://tools.wmflabs.org/xtools-articleinfo/?article=%s">articleinfo</a></td>\n'%title.replace(' ', '_'))
+		lines.append('<td>%s</td>\n'%rng.choice(('Stub', 'Start', 'C', 'B', 'GA', '???')))
+		lines.append('</tr>\n')
+	lines.append('</tbody>\n')
+	lines.append('</table>\n')
+	lines.append(PAGE_END)
+	return ''.join(lines)
+
+def get_api_response(n_categories, n_pages=50, seed=SEED):
+	"""
+	Returns a MediaWiki API response (bytes) of a categories query for n_pages
+	pages with n_categories categories each.
+	"""
+	rng   = random.Random('%s-api-%d-%d'%(seed, n_pages, n_categories))
+	pages = {}
+	for index in range(n_pages):
+		page_id = str(rng.randint(1, 50000000))
+		title   = '%s %d'%(get_name(rng, 2), index)
+		pages[page_id] = {'pageid': int(page_id), 'ns': 0, 'title': title,
+							'categories': [{'ns': 14, 'title': 'Category:%s %d'%(get_name(rng, 3), category)} for category in range(n_categories)]}
+	return json.dumps({'batchcomplete': '', 'query': {'pages': pages}}).encode('utf-8')
+
+N_REGISTERED_USERS = 30000000 # total of the 2x2 tables (see get_number_registered_users)
+COMMUNITY_SIZE     = 2000     # size of the community of interest
+
+def get_tables(n_tables, seed=SEED):
+	"""
+	Returns a list of n_tables 2x2 tables (a, b, c, d) as obtain_2x2_contigency_table
+	returns them for a community of COMMUNITY_SIZE users: for every article up to
+	10000 contributors, of which some (mostly few) belong to the community.
+	"""
+	rng    = random.Random('%s-tables-%d'%(seed, n_tables))
+	tables = []
+	for _ in range(n_tables):
+		n_contributed = rng.randint(1, 10000)
+		a = min(n_contributed, int(rng.expovariate(1. / rng.choice((1, 5, 50)))))
+		b = COMMUNITY_SIZE - a
+		c = n_contributed - a
+		tables.append((a, b, c, N_REGISTERED_USERS - a - b - c))
+	return tables
+
+def get_fixtures(sizes=None):
+	"""
+	Returns a dictionary (kind, size) -> fixture with all the fixtures of the
+	given sizes (Default: all sizes). The pages are str, the API responses bytes
+	and the tables lists of tuples.
+	"""
+	fixtures = {}
+	for size, n_rows in SIZES:
+		if sizes is None or size in sizes:
+			fixtures['articleinfo', size] = get_article_editors_page(n_rows)
+			fixtures['topedits', size]    = get_user_top_edits_page(n_rows)
+			fixtures['fisher', size]      = get_tables(n_rows)
+	for size, n_categories in API_SIZES:
+		if sizes is None or size in sizes:
+			fixtures['api', size] = get_api_response(n_categories)
+	return fixtures
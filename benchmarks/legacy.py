@@ -0,0 +1,83 @@
+import json
+from bs4 import BeautifulSoup
+
+from wikiscraper.scrape import skip
+
+"""
+	The original parsers and writer of wikiscraper (before the streaming table
+	parser), kept as the baseline for the benchmarks. The pages are flattened
+	with BeautifulSoup's get_text() and walked line by line with skip().
+"""
+
+def get_lines(html):
+	return BeautifulSoup(html, 'html.parser').get_text().splitlines()
+
+def parse_article_editors(html):
+	"""
+	Returns the rows (username, n_edits, n_minor_edits, first_edit, last_edit,
+	added_bytes) of an articleinfo page.
+	"""
+	raw_data = get_lines(html)
+
+	# go to the relevant table (just after the line with 'Added (Bytes)')
+	i, line = 0, raw_data[0]
+	while not 'Added (Bytes)' in line:
+		i, line = skip(raw_data, i, 1)
+
+	i, line = skip(raw_data, i, 3) # get to the starting point of the list
+
+	rows = []
+	while len(line) != 0: # not the end of the table
+		username = line.strip()
+		i, line = skip(raw_data, i, 5)
+		n_edits = line.strip()
+		i, line = skip(raw_data, i, 1)
+		n_minor_edits = line.strip()
+		i, line = skip(raw_data, i, 2)
+		first_edit = line.strip()
+		i, line = skip(raw_data, i, 1)
+		last_edit = line.strip()
+		i, line = skip(raw_data, i, 2)
+		added_bytes = line.strip().replace(',', '')
+		rows.append((username, n_edits, n_minor_edits, first_edit, last_edit, added_bytes))
+		i, line = skip(raw_data, i, 3)
+	return rows
+
+def parse_user_top_edits(html):
+	"""
+	Returns the rows (n_edits, title) of a topedits page.
+	"""
+	raw_data = get_lines(html)
+
+	# go to the relevant table (just after the line with 'TOP edits per namespace [hide]')
+	i, line = 0, raw_data[0]
+	while not 'TOP edits per namespace [hide]' in line:
+		i, line = skip(raw_data, i, 1)
+
+	i, line = skip(raw_data, i, 5) # get to the starting point of the list
+
+	rows = []
+	while len(line) != 0: # not the end of the table
+		n_edits = line.strip()
+		i, line = skip(raw_data, i, 1)
+		rows.append((n_edits, line.strip()))
+		i, line = skip(raw_data, i, 6)
+	return rows
+
+def parse_api_response(data):
+	"""
+	Decodes a MediaWiki API response the way read_in_data_from_url(json=True) did.
+	"""
+	return json.loads(BeautifulSoup(data, 'html.parser').get_text())
+
+def write_article_editors(article_title, rows, file):
+	"""
+	Writes the rows with one print per field, as scrape_article_for_users did.
+	"""
+	for username, n_edits, n_minor_edits, first_edit, last_edit, added_bytes in rows:
+		print("%s\t%s"%(article_title, username), end='\t', file=file) # article title and username
+		print(n_edits, end='\t', file=file) # number of edits
+		print(n_minor_edits, end='\t', file=file) # number of minor edits
+		print(first_edit, end='\t', file=file) # first edit
+		print(last_edit, end='\t', file=file) # last edit
+		print(added_bytes, file=file) # added_bytes
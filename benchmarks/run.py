@@ -0,0 +1,224 @@
+"""
+Runs the parser and writer benchmarks on the synthetic fixtures (fully offline). 
+Run from the root of the repository with python -m benchmarks.run
+
+Usage:
+    benchmarks.run [-s sizes] [-r repeat] [-o output] [-c baseline] [-h]
+
+Options:
+    -s, --sizes sizes           Comma-separated sizes of the fixtures: small, medium, large (Default: small,medium,large)
+    -r, --repeat repeat         Number of times every benchmark is run; the fastest run counts (Default: 3)
+    -o, --output output         The results are written to the given file (JSON)
+    -c, --compare baseline      The results are compared with the results in the given file (JSON), e.g., of another commit
+    -h, --help                  This help text
+"""
+
+from __future__ import print_function
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+import docopt
+import numpy as np
+from scipy import stats
+
+from wikiscraper import xtools
+from wikiscraper.helper import loads_json, orjson
+from wikiscraper.records import ArticleEditor, parse_count
+from wikiscraper.stats import fisher_exact
+from wikiscraper.writer import TSVWriter
+
+from . import legacy
+from .fixtures import get_fixtures
+
+"""
+	Every benchmark is a function that gets the fixture (prepared by its
+	prepare function, outside of the measurement) and returns the number of
+	rows it produced. For every benchmark the time of the fastest run and the
+	peak memory (tracemalloc, in a separate run) are reported.
+"""
+
+CHUNK_SIZE = 65536 # bytes per chunk for the streaming parser (as HTTPClient.stream)
+
+def get_chunks(html):
+	data = html.encode('utf-8')
+	return [data[start:start + CHUNK_SIZE] for start in range(0, len(data), CHUNK_SIZE)]
+
+def stream_article_editors(chunks):
+	return sum(1 for row in xtools.stream_article_editors(chunks))
+
+def stream_user_top_edits(chunks):
+	return sum(1 for row in xtools.stream_user_top_edits(chunks))
+
+def get_editors(html):
+	return [ArticleEditor('Title', username, parse_count(n_edits), parse_count(n_minor_edits), first_edit, last_edit, parse_count(added_bytes))
+				for username, n_edits, n_minor_edits, first_edit, last_edit, added_bytes in xtools.parse_article_editors(html)]
+
+def write_legacy(editors):
+	with open(os.devnull, 'w') as file:
+		legacy.write_article_editors('Title', [editor[1:] for editor in editors], file)
+	return len(editors)
+
+def write_batch(editors):
+	with open(os.devnull, 'w') as file:
+		with TSVWriter(file) as writer:
+			for editor in editors:
+				writer.write_row(editor)
+			writer.commit()
+	return len(editors)
+
+def count_categories(raw_data):
+	return sum(len(page['categories']) for page in raw_data['query']['pages'].values())
+
+def fisher_exact_legacy(tables):
+	# one scipy.stats.fisher_exact per table, as wikiscrape did
+	return [stats.fisher_exact([[a, c], [b, d]], alternative='greater') for a, b, c, d in tables]
+
+def get_columns(tables):
+	return [np.array(column) for column in zip(*tables)]
+
+def fisher_exact_batch(columns):
+	odds_ratios, p_values = fisher_exact(*columns)
+	return len(p_values)
+
+def identity(fixture):
+	return fixture
+
+# kind of fixture -> list of (name, prepare, run)
+BENCHMARKS = {
+	'articleinfo': [
+		('legacy',        identity,   lambda html: len(legacy.parse_article_editors(html))),
+		('xtools',        identity,   lambda html: len(xtools.parse_article_editors(html))),
+		('xtools-stream', get_chunks, stream_article_editors),
+	],
+	'topedits': [
+		('legacy',        identity,   lambda html: len(legacy.parse_user_top_edits(html))),
+		('xtools',        identity,   lambda html: len(xtools.parse_user_top_edits(html))),
+		('xtools-stream', get_chunks, stream_user_top_edits),
+	],
+	'api': [
+		('legacy',        identity,   lambda data: count_categories(legacy.parse_api_response(data))),
+		('loads_json',    identity,   lambda data: count_categories(loads_json(data))),
+	],
+	'fisher': [
+		('legacy',        identity,    lambda tables: len(fisher_exact_legacy(tables))),
+		('batch',         get_columns, fisher_exact_batch),
+	],
+	'write': [
+		('legacy',        get_editors, write_legacy),
+		('batch',         get_editors, write_batch),
+	],
+}
+
+def check_fixtures(fixtures):
+	"""
+	Checks that the legacy and the new parsers find the same rows in the pages,
+	i.e., that the fixtures have the layout the legacy parser expects, and that the
+	batch Fisher exact test gives the same p-values as scipy.
+	"""
+	def normalize(rows):
+		return [tuple(field.replace(',', '') for field in row) for row in rows]
+
+	for (kind, size), fixture in sorted(fixtures.items()):
+		if kind == 'articleinfo':
+			same = normalize(legacy.parse_article_editors(fixture)) == normalize(xtools.parse_article_editors(fixture))
+		elif kind == 'topedits':
+			same = normalize(legacy.parse_user_top_edits(fixture)) == normalize(xtools.parse_user_top_edits(fixture))
+		elif kind == 'fisher':
+			tables = fixture[:1000] # scipy is slow
+			same   = np.allclose(fisher_exact(*get_columns(tables))[1], [p_value for _, p_value in fisher_exact_legacy(tables)], rtol=1e-6, atol=1e-300)
+		else:
+			continue
+		if not same:
+			print('The parsers do not agree on the %s fixture (%s)'%(kind, size), file=sys.stderr)
+			sys.exit(1)
+
+def measure(run, argument, repeat):
+	"""
+	Returns the number of rows, the time of the fastest run and the peak memory
+	(bytes) of the benchmark.
+	"""
+	best = float('inf')
+	for _ in range(repeat):
+		start  = time.perf_counter()
+		n_rows = run(argument)
+		best   = min(best, time.perf_counter() - start)
+
+	tracemalloc.start()
+	try:
+		run(argument)
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	return n_rows, best, peak
+
+def get_commit():
+	try:
+		return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+def run_benchmarks(sizes, repeat):
+	"""
+	Runs all benchmarks on the fixtures of the given sizes and returns the results
+	as a list of dictionaries.
+	"""
+	fixtures = get_fixtures(sizes)
+	check_fixtures(fixtures)
+
+	results = []
+	for kind in ('articleinfo', 'topedits', 'api', 'fisher', 'write'):
+		for size in sizes:
+			fixture = fixtures['articleinfo' if kind == 'write' else kind, size] # the writers write the editors
+			for name, prepare, run in BENCHMARKS[kind]:
+				n_rows, seconds, peak = measure(run, prepare(fixture), repeat)
+				results.append({'kind': kind, 'size': size, 'name': name, 'rows': n_rows, 'seconds': seconds,
+								'rows_per_second': n_rows / seconds if seconds > 0 else None, 'peak_bytes': peak})
+				print_result(results[-1])
+	return results
+
+def print_header():
+	print('%-12s %-7s %-14s %9s %10s %12s %12s %8s'%('kind', 'size', 'name', 'rows', 'time (s)', 'rows/s', 'peak (MB)', 'speedup'))
+
+def print_result(result, baseline=None):
+	speedup = '' if baseline is None else '%.2fx'%(baseline['seconds'] / result['seconds'])
+	print('%-12s %-7s %-14s %9d %10.4f %12.0f %12.2f %8s'%(result['kind'], result['size'], result['name'], result['rows'],
+			result['seconds'], result['rows_per_second'] or 0, result['peak_bytes'] / 1024.**2, speedup))
+
+def compare(results, filename):
+	"""
+	Prints the results next to the results in the given file.
+	"""
+	with open(filename) as inputfile:
+		baseline = json.load(inputfile)
+	previous = dict(((result['kind'], result['size'], result['name']), result) for result in baseline['results'])
+
+	print('\nCompared with %s (commit: %s)\n'%(filename, baseline['meta'].get('commit')))
+	print_header()
+	for result in results:
+		print_result(result, previous.get((result['kind'], result['size'], result['name'])))
+
+def main(argv=sys.argv[1:]):
+	arguments = docopt.docopt(__doc__, argv)
+
+	sizes  = ('small', 'medium', 'large') if arguments['--sizes'] is None else tuple(arguments['--sizes'].split(','))
+	repeat = 3 if arguments['--repeat'] is None else int(arguments['--repeat'])
+
+	print_header()
+	results = run_benchmarks(sizes, repeat)
+
+	if arguments['--output'] is not None:
+		meta = {'commit': get_commit(), 'python': platform.python_version(), 'machine': platform.machine(),
+				'orjson': orjson is not None, 'repeat': repeat}
+		with open(arguments['--output'], 'w') as outputfile:
+			json.dump({'meta': meta, 'results': results}, outputfile, indent=2)
+
+	if arguments['--compare'] is not None:
+		compare(results, arguments['--compare'])
+
+if __name__ == '__main__':
+	main()
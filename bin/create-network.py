@@ -8,6 +8,9 @@ import pandas as pd
 from pandas import DataFrame
 from pandas import Series
 
+from wikiscraper.compression import open_input
+from wikiscraper.network import build_network, get_graph
+
 __author__ = "Louis Dijkstra"
 
 usage = """%prog <input.tsv>
@@ -45,65 +48,29 @@ def main():
 	article_list = None
 
 	if options.article_file != None: 
-		article_df = DataFrame.from_csv(options.article_file, sep='\t', index_col=False)
+		article_df = DataFrame.from_csv(open_input(options.article_file), sep='\t', index_col=False)
 		article_list = article_df.title.unique()
 
 	# read in the input file 
-	df = DataFrame.from_csv(inputfilename, sep='\t', index_col=False)
-
-	# get the unique users in the data frame
-	unique_users = df.user.unique()
-
-	# get the unique articles for which the number of users 
-	# that contributed exceeds the given minimum (see option -u)
-	unique_articles = df.groupby('title').agg(['count'])
-	unique_articles = unique_articles[unique_articles[('user', 'count')] >= options.min_users]
+	df = DataFrame.from_csv(open_input(inputfilename), sep='\t', index_col=False)
 
+	# only the articles in the list (if any) that were contributed to
+	articles = None
 	if article_list is not None: 
-		unique_articles = unique_articles[unique_articles.index.isin(article_list)]
-		
-	# initialize the network
-	G = nx.Graph()
-
-	# add the articles as nodes to the network
-	for article in list(unique_articles.index):
-		G.add_node(article)
-
-	n_users = len(unique_users)
+		contributed = set(df.title)
+		articles    = [article for article in article_list if article in contributed]
 
-	# walk through every single user and go through his/her contributions
-	for i, username in enumerate(unique_users): 
-		if options.verbose: 
-			print('Processing user no. %d of %d\t(%.2f %%)\tname: %s'%(i+1, n_users, float(i+1)/float(n_users) * 100, username))
+	# the articles for which the number of users that contributed exceeds the given 
+	# minimum (see option -u) are the nodes; the weights of the edges are computed at 
+	# once from the sparse user x article matrix (see wikiscraper/network.py)
+	articles, weights = build_network(df.user, df.title, articles=articles, min_weight=options.min_weight, min_users=options.min_users)
 
-		df_user = df[df.user == username] 
+	if options.verbose: 
+		print('%d users contributed to %d articles'%(df.user.nunique(), len(articles)))
 
-		articles = list(df_user.title) # get the articles for this user
-
-		if article_list is not None: 
-			articles = list(set(articles).intersection(article_list))
-
-		# add the edges
-		for i in range(len(articles) - 1): 
-			article1 = articles[i]
-			if not article1 in unique_articles.index: 
-				continue 
-
-			for j in range(i+1, len(articles)): 
-				article2 = articles[j]
-				if not article2 in unique_articles.index: 
-					continue 
-				if G.has_edge(article1, article2):
-					G[article1][article2]['weight'] += 1
-				else:
-					G.add_edge(article1, article2, weight=1)
+	G = get_graph(articles, weights)
 
 	print("Total of %d nodes and %d edges were added" % (G.number_of_nodes(), G.number_of_edges()))
-	
-	# walk through the edges and see whether their weight is sufficient
-	for u,v,a in G.edges(data=True):
-		if a['weight'] < options.min_weight: 
-			G.remove_edge(u,v)
 
 	nx.write_gexf(G, outputfilename)
 	
@@ -8,6 +8,9 @@ import pandas as pd
 from pandas import DataFrame
 from pandas import Series
 
+from wikiscraper.compression import open_input
+from wikiscraper.network import build_network, get_graph
+
 __author__ = "Louis Dijkstra"
 
 usage = """%prog <users.tsv> <articles.tsv> <output.gexf>
@@ -60,8 +63,8 @@ def main():
 	outputfilename  = args[2]
 
 	# read in the data
-	user_df    = DataFrame.from_csv(userfilename, sep='\t', index_col=False) # the core users
-	article_df = DataFrame.from_csv(articlefilename, sep='\t', index_col=False) # all the pheripheral articles
+	user_df    = DataFrame.from_csv(open_input(userfilename), sep='\t', index_col=False) # the core users
+	article_df = DataFrame.from_csv(open_input(articlefilename), sep='\t', index_col=False) # all the pheripheral articles
 
 	article_df = article_df.sort_values(by=['rank_based_on_eb_estimate'])
 
@@ -81,65 +84,21 @@ def main():
 	# get all articles with the minimum number of editors from the community into account
 	article_df = article_df[article_df['s'] >= options.min_users]
 
-	# get all the unique article titles 
-	unique_articles = article_df.title.unique()
-
-	# remove all the articles from the user list that are not in the article list
-	user_df = user_df[user_df['title'].isin(list(unique_articles))]
-
-	# get all the unique users
-	unique_users = user_df.user.unique()
-	n_users = len(unique_users)
-
-	# initialize the network
-	G = nx.Graph()
-
-	# add the articles as nodes to the network
-	for article in article_df.iterrows():
-		G.add_node(article[1]['title'], 
-			eb_estimate=article[1]['eb_estimate'],
-			rate=article[1]['rate'], 
-			contributors_from_drug_community=article[1]['s'],
-			total_number_contributors=article[1]['n'], 
-			rank_based_on_n=article[1]['rank_based_on_n'],
-			rank_based_on_s=article[1]['rank_based_on_s'],
-			rank_based_on_eb_estimate=article[1]['rank_based_on_eb_estimate'],
-			credible_width=article[1]['credible_width']
-			)
-
-	# walk through every single user and go through his/her contributions
-	for i, username in enumerate(unique_users): 
-		if options.verbose: 
-			print('Processing user no. %d of %d\t(%.2f %%)\tname: %s'%(i+1, n_users, float(i+1)/float(n_users) * 100, username))
-
-		df_for_one_user = user_df[user_df.user == username] 
-
-		articles = list(df_for_one_user.title) # get the articles for this user
-
-		# only use the articles that were in the original list
-		# articles = list(set(unique_articles).intersection(articles))
-
-		# add the edges
-		for i in range(len(articles) - 1): 
-			article1 = articles[i]
-			if not article1 in unique_articles: 
-				continue 
-
-			for j in range(i+1, len(articles)): 
-				article2 = articles[j]
-				if not article2 in unique_articles: 
-					continue 
-				if G.has_edge(article1, article2):
-					G[article1][article2]['weight'] += 1
-				else:
-					G.add_edge(article1, article2, weight=1)
+	# the node attributes
+	attributes = article_df.set_index('title')[['eb_estimate', 'rate', 's', 'n', 'rank_based_on_n', 'rank_based_on_s', 'rank_based_on_eb_estimate', 'credible_width']]
+	attributes = attributes.rename(columns={'s': 'contributors_from_drug_community', 'n': 'total_number_contributors'})
+	attributes = attributes[~attributes.index.duplicated()]
+
+	# the weights of the edges are computed at once from the sparse user x article 
+	# matrix (see wikiscraper/network.py)
+	articles, weights = build_network(user_df.user, user_df.title, articles=attributes.index, min_weight=options.min_weight)
+
+	if options.verbose: 
+		print('%d users contributed to %d articles'%(user_df[user_df.title.isin(attributes.index)].user.nunique(), len(articles)))
+
+	G = get_graph(articles, weights, attributes=attributes)
 
 	print("Total of %d nodes and %d edges were added" % (G.number_of_nodes(), G.number_of_edges()))
-	
-	# walk through the edges and see whether their weight is sufficient
-	for u,v,a in G.edges(data=True):
-		if a['weight'] < options.min_weight: 
-			G.remove_edge(u,v)
 
 	nx.write_gexf(G, outputfilename)
 
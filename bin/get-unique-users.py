@@ -9,6 +9,7 @@ from IPy import IP
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))[:-3] + 'python')
 
 from WikipediaScraper import *
+from wikiscraper.compression import open_input
 
 __author__ = "Louis Dijkstra"
 
@@ -56,7 +57,7 @@ def main():
 		parser.print_help()
 		return 1
 
-	inputfile = open(args[0], 'r')
+	inputfile = open_input(args[0])
 	
 	# ignore the header
 	next(inputfile)
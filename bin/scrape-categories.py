@@ -8,6 +8,8 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))[:-3] + 'python')
 
 from WikipediaScraper import *
+from wikiscraper.ratelimit import get_throttle
+from wikiscraper.compression import open_input, open_output
 
 __author__ = "Louis Dijkstra"
 
@@ -33,8 +35,12 @@ def printHeader(file):
 def main():
 
 	parser = OptionParser(usage=usage)	
+	parser.add_option("--burst", "-b", action="store", dest="burst", default=1, type=int, 
+				  			help="Number of requests that can be made in a row before --rate applies. (Default: 1)")
+	parser.add_option("--rate", "-r", action="store", dest="rate", default=None, type=float, 
+				  			help="Maximum number of requests per second. (Default: no limit)")
 	parser.add_option("--sleep", "-s", action="store", dest="sleep", default=None, type=float, 
-				  			help="Sleep time scraping two pages. (Default: no sleep)")
+				  			help="Minimal time between scraping two pages; superseded by --rate. (Default: no sleep)")
 	parser.add_option("-v", action="store_true", dest="verbose", default=False, 
 				  			help="verbose.")
 	(options, args) = parser.parse_args()
@@ -45,7 +51,7 @@ def main():
 		return 1
 
 	try: # in case a file is passed as the first argument
-		inputfile = open(args[0], 'r')
+		inputfile = open_input(args[0])
 		titles, links = [], [] 
 		for title in inputfile: 
 			title      = title.strip() 
@@ -74,7 +80,8 @@ def main():
 	i       = 0
 	n_links = len(links)
 
-	outputfile = open(outputfilename, 'w')
+	outputfile = open_output(outputfilename)
+	throttle   = get_throttle(options.rate, options.burst, options.sleep)
 
 	printHeader(outputfile)
 
@@ -86,6 +93,9 @@ def main():
 			print('%d of %d links processed... (%.2f %%)'%(i, n_links, float(i) / float(n_links) * 100))
 			print("Continuing with scraping %s (link: %s)"%(title, link))
 
+		# wait until the next request may be made
+		throttle.acquire()
+
 		# get the raw data
 		try: 
 			data = json.loads(readInDataFromURL(link))
@@ -103,9 +113,6 @@ def main():
 				if options.verbose: 
 					print('Page %s does not have any categorization...'%title)		
 
-		if options.sleep != None: 
-			time.sleep(options.sleep)
-
 	if options.verbose: 
 		print(" DONE")
 	
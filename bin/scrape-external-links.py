@@ -8,6 +8,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))[:-3] + 'python')
 
 from WikipediaScraper import *
+from wikiscraper.compression import open_input, open_output
 
 __author__ = "Louis Dijkstra"
 
@@ -46,7 +47,7 @@ def main():
 		return 1
 
 	try: 
-		linkfile = open(args[0], 'r')
+		linkfile = open_input(args[0])
 		names, links = get_links(linkfile, api_command = "https://en.wikipedia.org/w/api.php?action=query&prop=extlinks&format=json&ellimit=5000&titles=")
 	except: 
 		names, links = [args[0]], ["https://en.wikipedia.org/w/api.php?action=query&prop=extlinks&format=json&ellimit=5000&titles=" + args[0]]
@@ -64,7 +65,7 @@ def main():
 	i       = 0
 	n_links = len(links)
 
-	outputfile = open(outputfilename, 'w')
+	outputfile = open_output(outputfilename)
 
 	printHeader(outputfile)
 
@@ -8,6 +8,8 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))[:-3] + 'python')
 
 from WikipediaScraper import *
+from wikiscraper.ratelimit import get_throttle
+from wikiscraper.compression import open_input, open_output
 
 __author__ = "Louis Dijkstra"
 
@@ -69,19 +71,17 @@ def get_data(raw_data, name, file = sys.stdout):
 
 	return GET_DATA_SUCCESS
 
-def sleep(options): 
-	if options.sleep != None: 
-		time.sleep(options.sleep)
-		if options.verbose: 
-			print('Sleeping for %d seconds...'%options.sleep)
-
 def main():
 
 	parser = OptionParser(usage=usage)	
 	parser.add_option("--file", "-f", action="store", dest="file", default=None, 
 				  			help="A file with pages scraped already. When given, crawled users are not crawled again (Default: None)")
+	parser.add_option("--burst", "-b", action="store", dest="burst", default=1, type=int, 
+				  			help="Number of requests that can be made in a row before --rate applies. (Default: 1)")
+	parser.add_option("--rate", "-r", action="store", dest="rate", default=None, type=float, 
+				  			help="Maximum number of requests per second. (Default: no limit)")
 	parser.add_option("--sleep", "-s", action="store", dest="sleep", default=None, type=float, 
-				  			help="Sleep time scraping two pages. (Default: no sleep)")
+				  			help="Minimal time between scraping two pages; superseded by --rate. (Default: no sleep)")
 	parser.add_option("-v", action="store_true", dest="verbose", default=False, 
 				  			help="verbose.")
 	(options, args) = parser.parse_args()
@@ -95,14 +95,14 @@ def main():
 
 	already_scraped = set()
 	if options.file != None: 
-		oldfile = open(options.file, 'r')
+		oldfile = open_input(options.file)
 		next(oldfile) # ignore header
 		for line in oldfile: 
 			line = line.split('\t')
 			already_scraped.add(line[0].strip())
 
 	try: # in case a file is passed as the first argument
-		userfile = open(args[0], 'r')
+		userfile = open_input(args[0])
 		users, links = [], [] 
 		for username in userfile: 
 			username = username.strip() 
@@ -135,7 +135,8 @@ def main():
 	i       = 0
 	n_links = len(links)
 
-	outputfile = open(outputfilename, 'w')
+	outputfile = open_output(outputfilename)
+	throttle   = get_throttle(options.rate, options.burst, options.sleep)
 	printHeader(outputfile)
 
 	list_names_failed = []
@@ -148,6 +149,9 @@ def main():
 			print('%d of %d links processed (%.2f %%)\t%d of %d links failed (%.2f %%)'%(i, n_links, float(i) / float(n_links) * 100, len(list_names_failed), i, float(len(list_names_failed)) / float(i) * 100))
 			print("Continuing with scraping %s (link: %s)"%(name, link))
 
+		# wait until the next request may be made
+		throttle.acquire()
+
 		# get the raw data
 		headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36'}
 
@@ -160,8 +164,6 @@ def main():
 		flag = get_data(data, name, file=outputfile)
 		if flag == GET_DATA_FAILURE: 
 			list_names_failed.append(name)
-
-		sleep(options)
 	
 	if options.verbose: 
 		print(" DONE")
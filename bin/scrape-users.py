@@ -8,6 +8,8 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))[:-3] + 'python')
 
 from WikipediaScraper import *
+from wikiscraper.ratelimit import get_throttle
+from wikiscraper.compression import open_input, open_output
 
 __author__ = "Louis Dijkstra"
 
@@ -89,19 +91,17 @@ def get_data(raw_data, name, file = sys.stdout):
 
 	return GET_DATA_SUCCESS
 
-def sleep(options): 
-	if options.sleep != None: 
-		time.sleep(options.sleep)
-		if options.verbose: 
-			print('Sleeping for %d seconds...'%options.sleep)
-
 def main():
 
 	parser = OptionParser(usage=usage)	
 	parser.add_option("--file", "-f", action="store", dest="file", default=None, 
 				  			help="A file with pages scraped already. When given, scrawled page are not scrawled again (Default: None)")
+	parser.add_option("--burst", "-b", action="store", dest="burst", default=1, type=int, 
+				  			help="Number of requests that can be made in a row before --rate applies. (Default: 1)")
+	parser.add_option("--rate", "-r", action="store", dest="rate", default=None, type=float, 
+				  			help="Maximum number of requests per second. (Default: no limit)")
 	parser.add_option("--sleep", "-s", action="store", dest="sleep", default=None, type=float, 
-				  			help="Sleep time scraping two pages. (Default: no sleep)")
+				  			help="Minimal time between scraping two pages; superseded by --rate. (Default: no sleep)")
 	parser.add_option("--top", "-t", action="store", dest="top", default=10000, type=int, 
 				  			help="Number of top users to be scraped. (Default: 10000)")
 	parser.add_option("-v", action="store_true", dest="verbose", default=False, 
@@ -117,14 +117,14 @@ def main():
 
 	already_scraped = set()
 	if options.file != None: 
-		oldfile = open(options.file, 'r')
+		oldfile = open_input(options.file)
 		next(oldfile) # ignore header
 		for line in oldfile: 
 			line = line.split()
 			already_scraped.add(line[0].strip())
 
 	try: # in case a file is passed as the first argument
-		linkfile = open(args[0], 'r')
+		linkfile = open_input(args[0])
 		names, links = [], [] 
 		for name in linkfile: 
 			name = name.strip() 
@@ -154,7 +154,8 @@ def main():
 	i       = 0
 	n_links = len(links)
 
-	outputfile = open(outputfilename, 'w')
+	outputfile = open_output(outputfilename)
+	throttle   = get_throttle(options.rate, options.burst, options.sleep)
 	printHeader(outputfile)
 
 	list_names_failed = []
@@ -167,6 +168,9 @@ def main():
 			print('%d of %d links processed (%.2f %%)\t%d of %d links failed (%.2f %%)'%(i, n_links, float(i) / float(n_links) * 100, len(list_names_failed), i, float(len(list_names_failed)) / float(i) * 100))
 			print("Continuing with scraping %s (link: %s)"%(name, link))
 
+		# wait until the next request may be made
+		throttle.acquire()
+
 		# get the raw data
 		headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36'}
 
@@ -175,8 +179,6 @@ def main():
 		flag = get_data(data, name, file=outputfile)
 		if flag == GET_DATA_FAILURE: 
 			list_names_failed.append(name)
-
-		sleep(options)
 	
 	if options.verbose: 
 		print(" DONE")
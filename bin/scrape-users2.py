@@ -8,6 +8,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))[:-3] + 'python')
 
 from WikipediaScraper import *
+from wikiscraper.compression import open_input, open_output
 
 __author__ = "Louis Dijkstra"
 
@@ -134,7 +135,7 @@ def main():
 	article_titles, links = [], [] # initialize
 
 	if os.path.isfile(args[0]): # in case a file is passed as first argument
-		with open(args[0], 'r') as inputfile:
+		with open_input(args[0]) as inputfile:
 			for article_title in inputfile: 
 				article_title.strip() 
 				article_title.replace(' ', '%20') # replace the spaces with %20 
@@ -146,7 +147,7 @@ def main():
 
 	# get the outputfilename 
 	outputfilename = args[1] 
-	outputfile     = open(outputfilename, 'w')
+	outputfile     = open_output(outputfilename)
 	print_header(outputfile) # print the column names to the output file
 
 	if options.verbose: # prints the list of pages to be scraped
@@ -13,6 +13,7 @@ setup(name='wikiscraper',
       author='Louis Dijkstra',
       author_email='louisdijkstra@gmail.com',
       packages=find_packages(),
+      python_requires='>=3.6',
       install_requires=[
           'numpy',
           'bs4',
@@ -20,6 +21,12 @@ setup(name='wikiscraper',
           'urllib3', 
           'docopt'
         ],
+      extras_require={
+          'json': ['orjson'], # faster decoding of the MediaWiki API responses
+          'parquet': ['pyarrow'], # --format parquet
+          'zstd': ['zstandard'], # zstd compressed output (.zst)
+          'network': ['networkx'] # export of the co-contribution networks (see network.py)
+        },
       entry_points = {
         'console_scripts': [
             'wikiscrape = wikiscraper.main:scrape',
@@ -31,8 +38,13 @@ setup(name='wikiscraper',
       classifiers=[
         'Environment :: Console',
         'License :: OSI Approved :: Apache Software License',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
       ],
       )
@@ -0,0 +1,72 @@
+import io
+import json
+from urllib.parse import urlsplit, parse_qs
+
+from wikiscraper.client import HTTPClient, FetchError, SERVER_ERROR, CLIENT_ERROR
+from wikiscraper.writer import TSVWriter
+from wikiscraper.scrape import scrape_article_for_categories, SCRAPING_SUCCESSFULL, SCRAPING_FAILED
+
+"""
+	Tests of the continued MediaWiki API queries: the rows are written per response,
+	and a failed request is retried from its continuation.
+"""
+
+CATEGORIES = [['Lysergamides', 'Designer drugs'], ['Psychedelic drugs'], ['Prodrugs']]
+
+class APIClient(HTTPClient):
+	"""
+	HTTP client that answers a categories query in continued responses (one per
+	element of CATEGORIES). The requests with the continuation parameters in
+	failures fail once (with the given reason).
+	"""
+	def __init__(self, failures=None, reason=SERVER_ERROR):
+		HTTPClient.__init__(self)
+		self.failures = dict(failures or {})
+		self.reason   = reason
+		self.requests = []
+
+	def get(self, url, headers=None):
+		cont = parse_qs(urlsplit(url).query).get('clcontinue', ['0'])[0]
+		self.requests.append(cont)
+		if self.failures.pop(cont, None) is not None:
+			raise FetchError(url, self.reason, retry_after=0)
+		index    = int(cont)
+		raw_data = {'query': {'pages': {'4242': {'title': '1P-LSD', 'categories': [{'title': 'Category:' + name} for name in CATEGORIES[index]]}}}}
+		if index + 1 < len(CATEGORIES):
+			raw_data['continue'] = {'clcontinue': str(index + 1), 'continue': '||'}
+		return json.dumps(raw_data).encode('utf-8')
+
+class BlockFile(io.StringIO):
+	"""
+	File that records what the writer handed to it, block by block.
+	"""
+	def __init__(self):
+		io.StringIO.__init__(self)
+		self.blocks = []
+
+	def write(self, text):
+		self.blocks.append(text)
+		return io.StringIO.write(self, text)
+
+def get_lines(names):
+	return ''.join(['4242\t1P-LSD\t%s\n'%name for name in names])
+
+def test_rows_are_committed_per_response():
+	output = BlockFile()
+	writer = TSVWriter(output, buffer_size=1) # every commit is written as a block
+	assert scrape_article_for_categories('1P-LSD', file=writer, client=APIClient()) == SCRAPING_SUCCESSFULL
+	assert output.blocks == [get_lines(names) for names in CATEGORIES]
+
+def test_failed_response_is_retried_from_its_continuation():
+	client = APIClient(failures={'1': True})
+	output = io.StringIO()
+	assert scrape_article_for_categories('1P-LSD', file=output, client=client) == SCRAPING_SUCCESSFULL
+	assert client.requests == ['0', '1', '1', '2'] # the first response is not requested again
+	assert output.getvalue() == ''.join([get_lines(names) for names in CATEGORIES]) # no row twice
+
+def test_permanent_failure():
+	client = APIClient(failures={'2': True}, reason=CLIENT_ERROR)
+	output = io.StringIO()
+	assert scrape_article_for_categories('1P-LSD', file=output, client=client) == SCRAPING_FAILED
+	assert client.requests == ['0', '1', '2'] # given up at once
+	assert output.getvalue() == ''.join([get_lines(names) for names in CATEGORIES[:2]]) # the title is incomplete
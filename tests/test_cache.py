@@ -0,0 +1,107 @@
+import io
+
+import pytest
+
+from wikiscraper import cache
+from wikiscraper.cache import DiskCache, CacheMiss, normalize_url, DAY
+from wikiscraper.client import HTTPClient, get_failure_reason, is_retryable, CACHE_MISS
+from wikiscraper.engine import crawl
+from wikiscraper.scrape import scrape_user_for_articles
+
+"""
+	Tests of the on-disk cache of the raw responses: the time-to-live per endpoint,
+	the eviction of the least recently used responses, and the cache-only (offline)
+	mode, in which a page that is not in the cache fails permanently.
+"""
+
+URL = 'https://tools.wmflabs.org/xtools/topedits/?user=Aethyta&project=en.wikipedia.org'
+
+class Clock:
+	"""
+	Replaces time.time in the cache module.
+	"""
+	def __init__(self, now=1e9):
+		self.now = now
+
+	def time(self):
+		return self.now
+
+class OfflineClient(HTTPClient):
+	"""
+	HTTP client that must not go online.
+	"""
+	def request(self, url, headers=None, preload_content=True):
+		raise AssertionError('requested %s'%url)
+
+@pytest.fixture
+def clock(monkeypatch):
+	clock = Clock()
+	monkeypatch.setattr(cache, 'time', clock)
+	return clock
+
+def test_round_trip(tmp_path):
+	disk_cache = DiskCache(str(tmp_path))
+	disk_cache.put(URL, b'<html>top edits</html>')
+	assert disk_cache.get(URL) == b'<html>top edits</html>'
+	assert disk_cache.get(URL.replace('user=Aethyta&project=en.wikipedia.org', 'project=en.wikipedia.org&user=Aethyta') + '#top') == b'<html>top edits</html>'
+	assert disk_cache.get(URL.replace('Aethyta', 'ChemNerd')) is None
+	disk_cache.close()
+
+	assert DiskCache(str(tmp_path)).get(URL) == b'<html>top edits</html>' # kept on disk
+
+def test_normalize_url():
+	assert normalize_url('HTTPS://En.Wikipedia.org/wiki/Special:Export/1P LSD?b=2&a=1#x') == 'https://en.wikipedia.org/wiki/Special:Export/1P%20LSD?a=1&b=2'
+
+def test_ttl(tmp_path, clock):
+	disk_cache = DiskCache(str(tmp_path))
+	api_url    = 'https://en.wikipedia.org/w/api.php?action=query&titles=1P-LSD'
+	disk_cache.put(URL, b'xtools')
+	disk_cache.put(api_url, b'api')
+	clock.now += 2 * DAY
+	assert disk_cache.get(URL) == b'xtools' # 7 days for XTools
+	assert disk_cache.get(api_url) is None  # 1 day for the API
+	assert disk_cache.total_bytes == len(b'xtools') # the expired response was removed
+	clock.now += 6 * DAY
+	assert disk_cache.get(URL) is None
+
+def test_cache_only_uses_expired_responses(tmp_path, clock):
+	DiskCache(str(tmp_path)).put(URL, b'xtools')
+	clock.now += 30 * DAY
+	assert DiskCache(str(tmp_path), cache_only=True).get(URL) == b'xtools' # offline, stale data is better than none
+	assert DiskCache(str(tmp_path)).get(URL) is None
+
+def test_lru_eviction(tmp_path, clock):
+	disk_cache = DiskCache(str(tmp_path), max_bytes=25)
+	urls       = [URL.replace('Aethyta', name) for name in ['A', 'B', 'C']]
+	for url in urls[:2]:
+		disk_cache.put(url, b'0123456789')
+		clock.now += 1
+	assert disk_cache.get(urls[0]) is not None # A is used after B
+	clock.now += 1
+	disk_cache.put(urls[2], b'0123456789')
+	assert disk_cache.get(urls[1]) is None
+	assert disk_cache.get(urls[0]) is not None and disk_cache.get(urls[2]) is not None
+	assert disk_cache.total_bytes == 20
+
+def test_cache_only_miss(tmp_path):
+	client = OfflineClient(cache=DiskCache(str(tmp_path), cache_only=True))
+	with pytest.raises(CacheMiss) as error:
+		client.get(URL)
+	assert get_failure_reason(error.value) == CACHE_MISS and not is_retryable(CACHE_MISS)
+	with pytest.raises(CacheMiss):
+		list(client.stream(URL))
+
+	client.cache.put(URL, b'0123456789')
+	assert client.get(URL) == b'0123456789'
+	assert b''.join(client.stream(URL, chunk_size=4)) == b'0123456789'
+
+def test_cache_only_miss_is_given_up_at_once(tmp_path):
+	client   = OfflineClient(cache=DiskCache(str(tmp_path), cache_only=True))
+	attempts = []
+	def scrape_item(username, file):
+		attempts.append(username)
+		return scrape_user_for_articles(username, file=file, client=client)
+	output = io.StringIO()
+	assert crawl(['Aethyta'], scrape_item, output, max_attempts=5) == ['Aethyta']
+	assert attempts == ['Aethyta'] # not retried: the page will not be in the cache the next time either
+	assert output.getvalue() == ''
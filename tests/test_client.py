@@ -0,0 +1,118 @@
+import pytest
+import urllib3
+
+from wikiscraper.client import HTTPClient, FetchError, SERVER_ERROR, TIMEOUT
+from wikiscraper.adaptive import AdaptiveConcurrency
+from wikiscraper.ratelimit import RateLimiter
+
+"""
+	Tests of the slots of the adaptive concurrency in the HTTP client: a request
+	takes its slot before its rate-limit token, and a streamed response holds its
+	slot until the body has been read.
+"""
+
+URL = 'https://tools.wmflabs.org/xtools/topedits/?user=Aethyta&project=en.wikipedia.org'
+
+class FakeResponse:
+	"""
+	urllib3 response with the given chunks as its body; a read timeout is raised
+	after fail_after chunks (if given).
+	"""
+	def __init__(self, status=200, chunks=(b'<html>', b'</html>'), fail_after=None):
+		self.status     = status
+		self.headers    = {}
+		self.chunks     = list(chunks)
+		self.fail_after = fail_after
+		self.released   = False
+		self.closed     = False
+
+	@property
+	def data(self):
+		return b''.join(self.chunks)
+
+	def stream(self, chunk_size):
+		for i, chunk in enumerate(self.chunks):
+			if i == self.fail_after:
+				raise urllib3.exceptions.ReadTimeoutError(None, URL, 'Read timed out.')
+			yield chunk
+
+	def drain_conn(self):
+		pass
+
+	def release_conn(self):
+		self.released = True
+
+	def close(self):
+		self.closed = True
+
+class FakePool:
+	def __init__(self, response):
+		self.response = response
+
+	def request(self, method, url, headers=None, preload_content=True):
+		return self.response
+
+class RecordingRateLimiter(RateLimiter):
+	"""
+	Rate limiter that records the number of requests in flight when a token is taken.
+	"""
+	def __init__(self, concurrency):
+		RateLimiter.__init__(self, default=(None, 1))
+		self.concurrency = concurrency
+		self.in_flight   = []
+
+	def acquire(self, url):
+		self.in_flight.append(self.concurrency.host(url).in_flight)
+		return RateLimiter.acquire(self, url)
+
+def get_client(response):
+	concurrency = AdaptiveConcurrency(initial=1)
+	client      = HTTPClient(concurrency=concurrency, rate_limiter=RecordingRateLimiter(concurrency))
+	client.pool = FakePool(response)
+	return client
+
+def in_flight(client):
+	return client.concurrency.host(URL).in_flight
+
+def test_slot_is_taken_before_the_token():
+	client = get_client(FakeResponse())
+	assert client.get(URL) == b'<html></html>'
+	assert client.rate_limiter.in_flight == [1] # the token is taken for a request that can be sent
+	assert in_flight(client) == 0
+
+def test_streamed_response_holds_its_slot():
+	response = FakeResponse()
+	client   = get_client(response)
+	chunks   = client.stream(URL)
+	assert next(chunks) == b'<html>'
+	assert in_flight(client) == 1 # the body is still being read
+	assert list(chunks) == [b'</html>']
+	assert in_flight(client) == 0
+	assert response.released and not response.closed
+
+def test_abandoned_stream_releases_its_slot():
+	response = FakeResponse()
+	client   = get_client(response)
+	chunks   = client.stream(URL)
+	next(chunks)
+	chunks.close()
+	assert in_flight(client) == 0
+	assert response.closed # the rest of the body was not read
+
+def test_timeout_while_streaming_is_overloaded():
+	client = get_client(FakeResponse(fail_after=1))
+	client.concurrency.host(URL).limit = 4.
+	with pytest.raises(FetchError) as error:
+		list(client.stream(URL))
+	assert error.value.reason == TIMEOUT
+	assert in_flight(client) == 0
+	assert client.concurrency.limit(URL) == 2 # halved
+
+def test_failed_stream_releases_its_slot():
+	response = FakeResponse(status=503)
+	client   = get_client(response)
+	with pytest.raises(FetchError) as error:
+		list(client.stream(URL))
+	assert error.value.reason == SERVER_ERROR
+	assert in_flight(client) == 0
+	assert response.released
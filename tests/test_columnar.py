@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from wikiscraper.columnar import ParquetRowWriter
+from wikiscraper.records import ArticleEditor, UserTopEdit, ARTICLE_EDITOR_COLUMNS, USER_TOP_EDIT_COLUMNS
+
+"""
+	Tests of the Parquet output: the schema (dictionary encoded titles and
+	usernames, int64 counts and timestamps in ms) survives the round trip, and
+	only committed rows are written.
+"""
+
+EDITORS = [ArticleEditor('1P-LSD', 'Aethyta',   26, 3, '2016-01-31, 15:52', '2017-05-02, 12:03', 4513),
+		   ArticleEditor('1P-LSD', 'ChemNerd',  14, 0, '2016-02-11, 09:12', '2016-02-12, 10:00', -120),
+		   ArticleEditor('1P-LSD', 'Smokefoot', 9,  9, '2015-12-24, 23:59', '2016-03-04, 08:17', 3000000000)]
+
+def test_schema_round_trip(tmp_path):
+	filename = str(tmp_path / 'editors.parquet')
+	with ParquetRowWriter(filename, ARTICLE_EDITOR_COLUMNS) as writer:
+		writer.write_rows(EDITORS)
+		writer.commit()
+
+	table = pq.read_table(filename)
+	assert table.schema.names == list(ARTICLE_EDITOR_COLUMNS)
+	for column in ('name', 'user'):
+		assert table.schema.field(column).type == pa.dictionary(pa.int32(), pa.string())
+	for column in ('n_edits', 'n_minor_edits', 'added_bytes'):
+		assert table.schema.field(column).type == pa.int64()
+	for column in ('first_edit', 'last_edit'):
+		assert table.schema.field(column).type == pa.timestamp('ms')
+
+	rows = table.to_pylist()
+	assert [row['user'] for row in rows] == ['Aethyta', 'ChemNerd', 'Smokefoot']
+	assert [row['added_bytes'] for row in rows] == [4513, -120, 3000000000] # does not fit in an int32
+	assert rows[0]['first_edit'] == datetime(2016, 1, 31, 15, 52)
+	assert rows[2]['last_edit'] == datetime(2016, 3, 4, 8, 17)
+
+def test_only_committed_rows_are_written(tmp_path):
+	filename = str(tmp_path / 'top_edits.parquet')
+	with ParquetRowWriter(filename, USER_TOP_EDIT_COLUMNS, row_group_size=2) as writer:
+		for row in [UserTopEdit('Aethyta', '1P-LSD', 26), UserTopEdit('Aethyta', 'AL-LAD', 7), UserTopEdit('Aethyta', 'ALD-52', 2)]:
+			writer.write_row(row)
+			writer.commit()
+		writer.write_row(UserTopEdit('ChemNerd', '1P-LSD', 14)) # the page failed halfway
+		writer.rollback()
+		assert writer.n_rows == 3
+
+	parquet_file = pq.ParquetFile(filename)
+	assert parquet_file.metadata.num_row_groups == 2
+	assert parquet_file.read().to_pydict() == {'user': ['Aethyta'] * 3, 'title': ['1P-LSD', 'AL-LAD', 'ALD-52'], 'n_edits': [26, 7, 2]}
@@ -0,0 +1,55 @@
+import numpy as np
+
+from wikiscraper.community import CommunityIndex
+
+"""
+	Tests of the index of the users of the community: counting the users of the
+	community among the contributors of one or many articles, and storing the
+	index with its IDs.
+"""
+
+COMMUNITY = ['Aethyta', 'ChemNerd', '培养皿']
+
+def get_index():
+	index = CommunityIndex(COMMUNITY)
+	index.intern(['Smokefoot', 'Bot']) # users of the crawl outside the community
+	return index
+
+def test_count():
+	index = get_index()
+	assert len(index) == 3
+	assert 'ChemNerd' in index and 'Smokefoot' not in index and 'Unknown' not in index
+	assert index.count(['Aethyta', 'Smokefoot', '培养皿', 'Aethyta', 'Unknown']) == 2 # unique users
+	assert index.count([]) == 0
+	assert list(index.is_member(['Bot', 'ChemNerd', 'Unknown'])) == [False, True, False]
+
+def test_count_is_updated_by_add():
+	index = get_index()
+	assert index.count(['Smokefoot']) == 0
+	index.add(['Smokefoot'])
+	assert index.count(['Smokefoot']) == 1 and len(index) == 4
+
+def test_count_groups():
+	index  = get_index()
+	titles = ['B', 'A', 'A', 'B', 'A', 'C', 'B']
+	users  = ['Aethyta', 'Aethyta', 'ChemNerd', 'Aethyta', 'Smokefoot', 'Unknown', '培养皿']
+	keys, counts = index.count_groups(titles, users)
+	assert list(keys) == ['A', 'B', 'C']
+	assert list(counts) == [2, 2, 0] # Aethyta counts once for B
+	assert list(counts) == [index.count([user for title, user in zip(titles, users) if title == key]) for key in keys]
+
+def test_count_groups_without_members():
+	keys, counts = get_index().count_groups(['A', 'B'], ['Smokefoot', 'Unknown'])
+	assert list(keys) == ['A', 'B'] and list(counts) == [0, 0]
+
+def test_save_load(tmp_path):
+	index    = get_index()
+	filename = str(tmp_path / 'community.npz')
+	index.save(filename)
+	loaded = CommunityIndex.load(filename)
+	assert loaded.usernames == index.usernames
+	assert loaded.ids == index.ids
+	assert np.array_equal(loaded.membership, index.membership)
+	assert len(loaded) == 3 and 'Smokefoot' not in loaded
+	assert loaded.count(COMMUNITY + ['Smokefoot']) == 3
+	assert list(loaded.count_groups(['A', 'A'], ['培养皿', 'Bot'])[1]) == [1]
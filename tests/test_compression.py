@@ -0,0 +1,127 @@
+import os
+import shutil
+
+import pytest
+
+from wikiscraper import compression
+from wikiscraper.compression import open_output, open_input, detect_compression, get_end_of_frames, FramedWriter
+
+"""
+	Tests of the compressed output: every flush ends an independent frame, an
+	incomplete last frame (a crawl that crashed while writing it) is skipped when
+	the file is read, and cut off when the file is appended to.
+"""
+
+COMPRESSIONS = ['gzip', pytest.param('zstd', marks=pytest.mark.skipif(compression.zstandard is None, reason='zstandard is not installed'))]
+
+LINES = ['1P-LSD\tAethyta\t26\n', 'ALD-52\tChemNerd\t14\n', 'AL-LAD\tSmokefoot\t9\n']
+
+def write_frames(filename, lines, mode='w'):
+	with open_output(filename, mode) as output:
+		for line in lines:
+			output.write(line)
+			output.flush() # one frame per line
+
+def read_lines(filename):
+	with open_input(filename) as inputfile:
+		return inputfile.readlines()
+
+def get_filename(tmp_path, compression_name):
+	return str(tmp_path / ('top_edits.csv' + compression.EXTENSIONS[compression_name]))
+
+@pytest.mark.parametrize('compression_name', COMPRESSIONS)
+def test_round_trip(tmp_path, compression_name):
+	filename = get_filename(tmp_path, compression_name)
+	write_frames(filename, LINES)
+	assert detect_compression(filename) == compression_name
+	assert read_lines(filename) == LINES
+
+@pytest.mark.parametrize('compression_name', COMPRESSIONS)
+def test_read_skips_truncated_frame(tmp_path, compression_name, capsys):
+	filename = get_filename(tmp_path, compression_name)
+	write_frames(filename, LINES[:2])
+	complete = os.path.getsize(filename)
+	write_frames(filename, LINES[2:], mode='a')
+	with open(filename, 'r+b') as file: # the crawl crashed while writing the last frame
+		file.truncate(os.path.getsize(filename) - 3)
+
+	assert get_end_of_frames(filename, compression_name) == complete
+	assert read_lines(filename) == LINES[:2]
+	assert 'incomplete frame' in capsys.readouterr().err
+
+@pytest.mark.parametrize('compression_name', COMPRESSIONS)
+def test_append_repairs_truncated_frame(tmp_path, compression_name, capsys):
+	filename = get_filename(tmp_path, compression_name)
+	write_frames(filename, LINES[:2])
+	complete = os.path.getsize(filename)
+	with open(filename, 'ab') as file: # half of a frame
+		file.write(compression.compress_frame(LINES[2].encode('utf-8'), compression_name, 1)[:10])
+
+	write_frames(filename, LINES[2:], mode='a') # the resumed crawl
+	assert 'Removed an incomplete frame (10 bytes)' in capsys.readouterr().err
+	assert get_end_of_frames(filename, compression_name) == os.path.getsize(filename) > complete
+	assert read_lines(filename) == LINES
+
+def test_frames_do_not_split_lines(tmp_path):
+	filename = str(tmp_path / 'top_edits.csv.gz')
+	with open(filename, 'wb') as file:
+		output = FramedWriter(file, 'gzip', frame_size=16)
+		output.write(LINES[0][:10]) # no frame yet: less than frame_size
+		assert file.tell() == 0
+		output.write(LINES[0][10:] + LINES[1][:5]) # a frame with the first line
+		assert file.tell() > 0
+		file.flush()
+		with open(filename, 'rb') as inputfile:
+			assert [frame for frame, _ in compression.iter_frames(inputfile, 'gzip')] == [LINES[0].encode('utf-8')]
+		output.write(LINES[1][5:])
+		output.close()
+	assert read_lines(filename) == LINES[:2]
+
+def test_uncompressed(tmp_path):
+	filename = str(tmp_path / 'top_edits.csv')
+	write_frames(filename, LINES)
+	assert detect_compression(filename) is None
+	assert read_lines(filename) == LINES
+
+def test_unknown_compression(tmp_path):
+	with pytest.raises(ValueError):
+		open_output(str(tmp_path / 'top_edits.csv'), compression='bzip2')
+
+def test_checkpoint_batches_frames(tmp_path):
+	filename = str(tmp_path / 'top_edits.csv.gz')
+	done     = []
+	output   = FramedWriter(open(filename, 'wb'), 'gzip', min_frame_size=2 * len(LINES[0]), max_frame_age=3600.)
+	for line in LINES:
+		output.write(line)
+		output.checkpoint(lambda line=line: done.append(line))
+	assert done == LINES[:2] # the frame is ended once it is large enough
+	output.close()
+	assert done == LINES # close ends the last frame
+	with open(filename, 'rb') as inputfile:
+		assert len(list(compression.iter_frames(inputfile, 'gzip'))) == 2
+
+def test_checkpoint_after_max_frame_age(tmp_path):
+	done   = []
+	output = FramedWriter(open(str(tmp_path / 'top_edits.csv.gz'), 'wb'), 'gzip', max_frame_age=0.)
+	output.write(LINES[0])
+	output.checkpoint(lambda: done.append(LINES[0]))
+	assert done == LINES[:1]
+	output.checkpoint(lambda: done.append('nothing pending')) # called at once, without an empty frame
+	assert done == LINES[:1] + ['nothing pending']
+	assert output.file.tell() == len(compression.compress_frame(LINES[0].encode('utf-8'), 'gzip', 6))
+	output.close()
+
+def test_crash_before_checkpoint(tmp_path):
+	filename = str(tmp_path / 'top_edits.csv.gz')
+	done     = []
+	output   = FramedWriter(open(filename, 'wb'), 'gzip', max_frame_age=3600.)
+	output.write(LINES[0])
+	output.flush()
+	output.write(LINES[1])
+	output.checkpoint(lambda: done.append(LINES[1]))
+	crashed = str(tmp_path / 'crashed.csv.gz') # the file when the crawl is killed now
+	shutil.copyfile(filename, crashed)
+	assert done == []
+	assert read_lines(crashed) == LINES[:1] # LINES[1] was not marked as done; it is scraped again on resume
+	output.close()
+	assert done == LINES[1:2]
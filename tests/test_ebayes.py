@@ -0,0 +1,60 @@
+import numpy as np
+
+import pytest
+from scipy import optimize, stats
+
+from wikiscraper import ebayes
+
+"""
+	Tests of the empirical Bayes estimates: the HPD intervals found with Newton's
+	method are checked against a brute-force search for the shortest interval.
+"""
+
+def simulate(n_articles, seed=1):
+	rng = np.random.RandomState(seed)
+	n   = rng.randint(1, 5000, n_articles)
+	s   = rng.binomial(n, rng.beta(0.6, 40, n_articles))
+	return s, n
+
+def shortest_interval(alpha, beta, level):
+	distribution = stats.beta(alpha, beta)
+	width  = lambda q: distribution.ppf(q + level) - distribution.ppf(q)
+	result = optimize.minimize_scalar(width, bounds=(0., 1. - level), method='bounded', options={'xatol': 1e-12})
+	return width(result.x)
+
+def test_hpd_interval():
+	s, n        = simulate(100)
+	alpha, beta = ebayes.posterior(s, n, *ebayes.fit_beta_prior(s, n))
+	low, high   = ebayes.hpd_interval(alpha, beta)
+	for a, b, l, h in zip(alpha, beta, low, high):
+		distribution = stats.beta(a, b)
+		assert distribution.cdf(h) - distribution.cdf(l) == pytest.approx(0.95, abs=1e-7)
+		if a > 1 and b > 1:
+			assert h - l <= shortest_interval(a, b, 0.95) * (1. + 1e-6)
+			assert distribution.pdf(l) == pytest.approx(distribution.pdf(h), rel=1e-6)
+
+def test_monotone_densities():
+	alpha, beta = np.array([0.5, 3., 1.]), np.array([3., 0.5, 1.])
+	low, high   = ebayes.hpd_interval(alpha, beta)
+	np.testing.assert_allclose(low, [0., stats.beta(3., 0.5).ppf(0.05), stats.beta(1., 1.).ppf(0.025)])
+	np.testing.assert_allclose(high, [stats.beta(0.5, 3.).ppf(0.95), 1., stats.beta(1., 1.).ppf(0.975)])
+
+@pytest.mark.parametrize('method', ebayes.METHODS)
+def test_fit_beta_prior(method):
+	rng    = np.random.RandomState(2)
+	n      = rng.randint(50, 500, 20000)
+	s      = rng.binomial(n, rng.beta(2., 30., len(n)))
+	alpha0, beta0 = ebayes.fit_beta_prior(s, n, method=method)
+	assert alpha0 / (alpha0 + beta0) == pytest.approx(2. / 32., rel=0.02)
+	assert alpha0 + beta0 == pytest.approx(32., rel=0.15)
+
+def test_estimate_articles():
+	s, n = simulate(50)
+	df   = ebayes.estimate_articles(['t%d'%i for i in range(len(n))], s, n)
+	assert list(df.columns) == list(ebayes.ARTICLE_COLUMNS)
+	assert (df.credible_low <= df.eb_estimate).all() and (df.eb_estimate <= df.credible_high).all()
+	assert df.rank_based_on_eb_estimate.min() == 1
+
+def test_fit_without_articles():
+	with pytest.raises(ValueError):
+		ebayes.fit_beta_prior([0, 0], [0, 0])
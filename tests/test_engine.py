@@ -0,0 +1,101 @@
+import io
+import os
+import time
+import random
+import asyncio
+
+from wikiscraper.client import HTTPClient, FetchError, SERVER_ERROR, CLIENT_ERROR
+from wikiscraper.engine import crawl, map_in_order
+from wikiscraper.writer import TSVWriter
+from wikiscraper.scrape import scrape_user_for_articles, SCRAPING_SUCCESSFULL
+
+"""
+	Tests of the crawl engine with a fake XTools client: the pages come in in a
+	random order, fail transiently or permanently, and the output is still in the
+	order of the input list.
+"""
+
+PAGES = os.path.join(os.path.dirname(__file__), 'pages')
+
+def read_page():
+	with io.open(os.path.join(PAGES, 'topedits.html'), encoding='utf-8') as page:
+		return page.read().encode('utf-8')
+
+class XToolsClient(HTTPClient):
+	"""
+	HTTP client that serves the same top edits page for every user, after a random
+	delay. The users in transient fail the given number of times (server error),
+	the users in permanent always fail (the page does not exist).
+	"""
+	def __init__(self, transient=None, permanent=()):
+		HTTPClient.__init__(self)
+		self.page      = read_page()
+		self.transient = dict(transient or {})
+		self.permanent = set(permanent)
+		self.requests  = []
+
+	def stream(self, url, headers=None, chunk_size=None):
+		username = url.split('user=')[1].split('&')[0]
+		self.requests.append(username)
+		time.sleep(random.random() * 0.01)
+		if username in self.permanent:
+			raise FetchError(url, CLIENT_ERROR, status=404)
+		if self.transient.get(username, 0) > 0:
+			self.transient[username] -= 1
+			raise FetchError(url, SERVER_ERROR, status=503, retry_after=0)
+		yield self.page
+
+def crawl_users(users, client, **kwargs):
+	output = io.StringIO()
+	done   = []
+	def scrape_item(username, file):
+		return scrape_user_for_articles(username, file=file, client=client)
+	failed = crawl(users, scrape_item, output, on_success=done.append, **kwargs)
+	return output.getvalue(), done, failed
+
+def test_output_in_input_order():
+	users = ['user%02d'%i for i in range(30)]
+	output, done, failed = crawl_users(users, XToolsClient(), concurrency=8)
+	assert failed == []
+	assert done == users
+	assert [line.split('\t')[0] for line in output.splitlines()] == [user for user in users for _ in range(4)]
+
+def test_transient_and_permanent_failures():
+	users  = ['user%02d'%i for i in range(10)]
+	client = XToolsClient(transient={'user03': 2, 'user07': 10}, permanent=['user05'])
+	output, done, failed = crawl_users(users, client, concurrency=4, max_attempts=3)
+	assert failed == ['user05', 'user07'] # user07 ran out of attempts, user05 was given up at once
+	assert client.requests.count('user03') == 3
+	assert client.requests.count('user05') == 1
+	assert client.requests.count('user07') == 3
+	assert done == [user for user in users if user not in failed]
+	assert 'user05' not in output and 'user07' not in output
+
+def test_writer_output():
+	users  = ['user%02d'%i for i in range(5)]
+	output = io.StringIO()
+	writer = TSVWriter(output)
+	client = XToolsClient()
+	failed = crawl(users, lambda username, file: scrape_user_for_articles(username, file=file, client=client), writer, concurrency=3)
+	writer.flush()
+	assert failed == []
+	assert [line.split('\t')[0] for line in output.getvalue().splitlines()] == [user for user in users for _ in range(4)]
+
+def test_exception_counts_as_failure():
+	def scrape_item(item, file):
+		if item == 'B':
+			raise ValueError('broken')
+		print(item, file=file)
+		return SCRAPING_SUCCESSFULL
+	output = io.StringIO()
+	assert crawl(['A', 'B', 'C'], scrape_item, output, max_attempts=1) == ['B']
+	assert output.getvalue() == 'A\nC\n'
+
+def test_map_in_order():
+	async def collect():
+		return [(item, result) async for item, result in map_in_order(range(20), lambda i: (time.sleep(random.random() * 0.005), i * i)[1], concurrency=4)]
+	loop = asyncio.new_event_loop()
+	try:
+		assert loop.run_until_complete(collect()) == [(i, i * i) for i in range(20)]
+	finally:
+		loop.close()
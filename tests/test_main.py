@@ -0,0 +1,27 @@
+import pandas as pd
+
+from wikiscraper.main import prescore_candidates, select_candidates
+from wikiscraper.community import CommunityIndex
+
+"""
+	Tests of the wikiscrape pipeline (see main.scrape).
+"""
+
+def get_candidates():
+	df = pd.DataFrame({'user':  ['u1', 'u2', 'u3', 'u1', 'u2', 'u1'],
+					   'title': ['A',  'A',  'A',  'B',  'B',  'C']})
+	return prescore_candidates(df, CommunityIndex(['u1', 'u2', 'u3']), exclude=['C'])
+
+def test_prescore_candidates():
+	candidates = get_candidates()
+	assert list(candidates.title) == ['A', 'B']
+	assert list(candidates.a_lower_bound) == [3, 2]
+	assert list(candidates['rank']) == [1, 2]
+
+def test_articles_below_the_minimum_are_deferred():
+	selected, deferred = select_candidates(get_candidates(), 3, None)
+	assert (selected, deferred) == (['A'], ['B']) # B may still have 3 users of the community
+
+def test_max_candidates():
+	assert select_candidates(get_candidates(), 3, 1) == (['A'], [])
+	assert select_candidates(get_candidates(), 1, None) == (['A', 'B'], [])
@@ -0,0 +1,55 @@
+import itertools
+import collections
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from wikiscraper.network import build_network, get_graph, get_incidence_matrix
+
+"""
+	Tests of the co-contribution networks against a brute-force count of the users
+	that every pair of articles has in common.
+"""
+
+def random_contributions(seed=0):
+	rng = np.random.RandomState(seed)
+	return pd.DataFrame({'user': rng.randint(0, 300, 3000).astype(str), 'title': rng.randint(0, 80, 3000).astype(str)})
+
+def count_pairs(df):
+	weights = collections.Counter()
+	for _, titles in df.groupby('user').title:
+		for pair in itertools.combinations(sorted(set(titles)), 2):
+			weights[pair] += 1
+	return weights
+
+def get_edges(articles, weights):
+	return {tuple(sorted((articles[i], articles[j]))): weight for i, j, weight in zip(weights.row, weights.col, weights.data)}
+
+@pytest.mark.parametrize('min_weight,min_users', [(0, 0), (3, 0), (2, 40)])
+def test_weights(min_weight, min_users):
+	df       = random_contributions()
+	n_users  = df.groupby('title').user.nunique()
+	nodes    = set(n_users.index[n_users >= min_users])
+	expected = {pair: weight for pair, weight in count_pairs(df).items()
+				if weight >= max(min_weight, 1) and pair[0] in nodes and pair[1] in nodes}
+
+	articles, weights = build_network(df.user, df.title, min_weight=min_weight, min_users=min_users)
+	assert set(articles) == nodes
+	assert get_edges(articles, weights) == expected
+
+def test_incidence_matrix():
+	matrix, articles = get_incidence_matrix(['u1', 'u1', 'u1', 'u2', None], ['A', 'A', 'B', 'B', 'A'], articles=['B', 'A', 'C'])
+	assert list(articles) == ['B', 'A', 'C']
+	assert matrix.toarray().tolist() == [[1, 1, 0], [1, 0, 0]] # the repeated and the missing contributions count once / not
+
+def test_graph():
+	pytest.importorskip('networkx')
+	df                = random_contributions()
+	articles, weights = build_network(df.user, df.title, min_weight=3)
+	attributes        = pd.DataFrame({'n_users': df.groupby('title').user.nunique()})
+	G = get_graph(articles, weights, attributes=attributes)
+	assert G.number_of_nodes() == len(articles)
+	assert {tuple(sorted((u, v))): data['weight'] for u, v, data in G.edges(data=True)} == get_edges(articles, weights)
+	assert all(isinstance(data['n_users'], int) for _, data in G.nodes(data=True))
@@ -0,0 +1,27 @@
+import pytest
+
+from wikiscraper import profiling
+from wikiscraper.profiling import Profiler
+
+"""
+	Tests of the profiler: the time and the peak memory per stage, also on Python
+	versions where the peak of tracemalloc cannot be reset.
+"""
+
+@pytest.mark.parametrize('reset_peak', [True, False])
+def test_peak_memory(monkeypatch, reset_peak):
+	if reset_peak and not profiling.RESET_PEAK:
+		pytest.skip('tracemalloc.reset_peak requires Python 3.9')
+	monkeypatch.setattr(profiling, 'RESET_PEAK', reset_peak)
+	profiler = Profiler()
+	profiler.enable(detailed=True)
+	with profiler.stage(profiling.FETCH):
+		with profiler.stage(profiling.WALK):
+			data = bytearray(1 << 20)
+	profiler.disable()
+
+	assert profiler.calls == {profiling.FETCH: 1, profiling.WALK: 1}
+	assert profiler.peak_memory[profiling.WALK] >= 1 << 20
+	assert profiler.peak_memory[profiling.FETCH] >= profiler.peak_memory[profiling.WALK]
+	assert ('Python 3.9' in profiler.report()) != reset_peak
+	del data
@@ -0,0 +1,14 @@
+from wikiscraper.ratelimit import get_throttle
+
+"""
+	Tests of the throttle of the scraper scripts in bin/ (the options --rate,
+	--burst and --sleep).
+"""
+
+def test_get_throttle():
+	throttle = get_throttle(rate=2., burst=4, sleep=10.)
+	assert (throttle.rate, throttle.burst) == (2., 4) # --rate supersedes --sleep
+	throttle = get_throttle(sleep=4.)
+	assert (throttle.rate, throttle.burst) == (0.25, 1)
+	throttle = get_throttle()
+	assert throttle.rate is None and throttle.reserve() == 0. # no limit
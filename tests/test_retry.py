@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from wikiscraper.retry import RetryScheduler, get_backoff
+
+"""
+	Tests of the retry scheduler: the items come in the order of the list, failed
+	items come back after their backoff, and items that cannot succeed are given up.
+"""
+
+def test_backoff():
+	assert [get_backoff(n, base_delay=2., max_delay=300., jitter=0.) for n in range(1, 10)] == [2., 4., 8., 16., 32., 64., 128., 256., 300.]
+	for _ in range(100):
+		assert 1. <= get_backoff(1, base_delay=2., jitter=0.5) <= 2.
+	assert get_backoff(10 ** 6, max_delay=300., jitter=0.) == 300. # no overflow
+
+def test_order_of_first_attempts():
+	scheduler = RetryScheduler(['A', 'B', 'C'])
+	assert [item for _, item in scheduler] == ['A', 'B', 'C']
+
+def test_failed_item_comes_back_after_backoff():
+	scheduler = RetryScheduler(['A', 'B', 'C'], base_delay=0.05, jitter=0.)
+	order = []
+	for index, item in scheduler:
+		order.append(item)
+		if item == 'A' and order.count('A') == 1:
+			assert scheduler.failure(index)
+		else:
+			scheduler.success(index)
+	assert order == ['A', 'B', 'C', 'A'] # the others are not held up by the backoff
+	assert scheduler.failed_items() == [] and len(scheduler) == 0
+
+def test_retries_are_ordered_by_time():
+	scheduler = RetryScheduler(['A', 'B', 'C'])
+	for index, item in [scheduler.pop() for _ in range(3)]:
+		scheduler.failure(index, delay={'A': 30., 'B': 10., 'C': 20.}[item])
+	assert scheduler.pop() is None # none is eligible yet
+	assert 9. < scheduler.wait_time() <= 10.
+	now = time.monotonic() + 60.
+	assert [scheduler.pop(now)[1] for _ in range(3)] == ['B', 'C', 'A']
+
+def test_max_attempts():
+	scheduler = RetryScheduler(['A'], max_attempts=3, base_delay=0., jitter=0.)
+	results   = [scheduler.failure(index) for index, _ in scheduler]
+	assert results == [True, True, False]
+	assert scheduler.failed_items() == ['A']
+
+@pytest.mark.parametrize('retryable,expected', [(False, ['A']), (True, [])])
+def test_permanent_failure_is_given_up_at_once(retryable, expected):
+	scheduler = RetryScheduler(['A', 'B'], base_delay=0., jitter=0.)
+	index, _  = scheduler.pop()
+	assert scheduler.failure(index, retryable=retryable) == retryable
+	assert scheduler.failed_items() == expected
+
+def test_successful_items_are_not_handed_out_again():
+	scheduler = RetryScheduler(['A', 'B'])
+	for index, _ in scheduler:
+		scheduler.success(index)
+	assert scheduler.next() is None
+	assert scheduler.succeeded == {0, 1}
@@ -0,0 +1,105 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from wikiscraper.state import CrawlState
+from wikiscraper.engine import crawl
+from wikiscraper.main import resume_stage, open_stage_output, read_stage_output, mark_done
+from wikiscraper.scrape import SCRAPING_SUCCESSFULL, SCRAPING_FAILED
+from wikiscraper.metrics import record_failure
+from wikiscraper.client import SERVER_ERROR
+
+"""
+	Tests of resuming an interrupted crawl: the crawl is killed after a checkpoint
+	(the output file and the crawl state are copied as they are on disk at that
+	moment), the copy is resumed, and every row is in the output exactly once.
+"""
+
+STAGE  = 'other_articles'
+HEADER = 'user\ttitle\tn_edits'
+USERS  = ['user%02d'%i for i in range(20)]
+
+def get_rows(username):
+	return ['%s\tArticle %d\t%d'%(username, i, i + 1) for i in range(3)]
+
+def make_scrape_item(failures):
+	failures = dict(failures)
+	def scrape_item(username, file):
+		if failures.get(username, 0) > 0:
+			failures[username] -= 1
+			record_failure(STAGE, SERVER_ERROR, retry_after=0) # retried at once
+			return SCRAPING_FAILED
+		for row in get_rows(username):
+			print(row, file=file)
+		return SCRAPING_SUCCESSFULL
+	return scrape_item
+
+def snapshot(directory, filename, state):
+	"""
+	Copies the output file and the crawl state to the directory, as they would be
+	found after the crawl was killed now.
+	"""
+	os.makedirs(directory)
+	shutil.copyfile(filename, os.path.join(directory, os.path.basename(filename)))
+	copy = sqlite3.connect(os.path.join(directory, 'state.sqlite'))
+	with state.lock:
+		state.db.backup(copy)
+	copy.close()
+
+def run_stage(directory, filename, scrape_item, kill_after=None, kill_directory=None):
+	"""
+	Runs the stage as main.scrape does. When kill_after is given, the crawl is
+	copied to kill_directory once that many users are done.
+	"""
+	state   = CrawlState(os.path.join(directory, 'state.sqlite'))
+	pending = resume_stage(state, STAGE, USERS, os.path.join(directory, filename), 'user')
+	with open_stage_output(os.path.join(directory, filename), HEADER) as output:
+		if hasattr(output, 'checkpoint'):
+			output.min_frame_size = 4 * len(get_rows(USERS[0])[0]) # a frame per couple of users
+		on_success = mark_done(state, STAGE, output)
+		n_done     = []
+		def on_success_and_kill(username):
+			on_success(username)
+			n_done.append(username)
+			if len(n_done) == kill_after:
+				snapshot(kill_directory, os.path.join(directory, filename), state)
+		failed = crawl(pending, scrape_item, output, concurrency=4, max_attempts=2, on_success=on_success_and_kill)
+	state.mark_failed(STAGE, failed)
+	state.close()
+	return pending, failed
+
+@pytest.mark.parametrize('filename', ['other_articles.csv', 'other_articles.csv.gz'])
+def test_resume_after_kill(tmp_path, filename):
+	first  = str(tmp_path / 'first')
+	killed = str(tmp_path / 'killed')
+	os.makedirs(first)
+	run_stage(first, filename, make_scrape_item({'user03': 1, 'user11': 1}), kill_after=9, kill_directory=killed)
+
+	pending, failed = run_stage(killed, filename, make_scrape_item({}))
+	assert 0 < len(pending) < len(USERS) # the users done before the kill are not scraped again
+	assert failed == []
+
+	df   = read_stage_output(os.path.join(killed, filename), dtype={'user': str})
+	rows = ['%s\t%s\t%d'%row for row in zip(df.user, df.title, df.n_edits)]
+	assert sorted(rows) == sorted([row for username in USERS for row in get_rows(username)]) # none lost, none twice
+	assert CrawlState(os.path.join(killed, 'state.sqlite')).counts(STAGE) == {'done': len(USERS)}
+
+def test_failed_users_are_retried_on_resume(tmp_path):
+	directory = str(tmp_path)
+	pending, failed = run_stage(directory, 'other_articles.csv', make_scrape_item({'user05': 2}))
+	assert (len(pending), failed) == (len(USERS), ['user05'])
+	assert run_stage(directory, 'other_articles.csv', make_scrape_item({})) == (['user05'], [])
+	df = read_stage_output(os.path.join(directory, 'other_articles.csv'), dtype={'user': str})
+	assert len(df) == 3 * len(USERS) and df.user.value_counts().max() == 3
+
+def test_output_without_crawl_state(tmp_path):
+	filename = str(tmp_path / 'other_articles.csv')
+	with open(filename, 'w') as output: # written before the crawl state was kept
+		print(HEADER, file=output)
+		for row in get_rows(USERS[0]) + get_rows(USERS[1]):
+			print(row, file=output)
+	state = CrawlState(str(tmp_path / 'state.sqlite'))
+	assert resume_stage(state, STAGE, USERS, filename, 'user') == USERS[2:]
+	state.close()
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+
+import pytest
+from scipy import stats
+
+from wikiscraper.stats import fisher_exact, log_binomial, TABLE_SIZE
+
+"""
+	Tests of the batch Fisher's exact test against scipy.stats.fisher_exact, which
+	tests one table at a time. The tables are as in the final stage: a, c are the
+	users (of the community / the rest of Wikipedia) that contributed to an
+	article, b, d the users that did not.
+"""
+
+def scipy_fisher_exact(a, b, c, d, alternative):
+	results = [stats.fisher_exact([[ai, ci], [bi, di]], alternative=alternative) for ai, bi, ci, di in zip(a, b, c, d)]
+	return np.array([odds_ratio for odds_ratio, _ in results]), np.array([p_value for _, p_value in results])
+
+def random_tables(n_tables, seed=0):
+	rng = np.random.RandomState(seed)
+	a   = rng.randint(0, 30, n_tables)
+	b   = rng.randint(0, 300, n_tables)
+	c   = rng.randint(0, 2000, n_tables)
+	d   = rng.randint(0, 100000, n_tables)
+	return a, b, c, d
+
+@pytest.mark.parametrize('alternative', ['greater', 'less'])
+def test_random_tables(alternative):
+	a, b, c, d = random_tables(500)
+	odds_ratios, p_values = fisher_exact(a, b, c, d, alternative=alternative)
+	expected_odds_ratios, expected_p_values = scipy_fisher_exact(a, b, c, d, alternative)
+	np.testing.assert_allclose(p_values, expected_p_values, rtol=1e-8, atol=1e-300)
+	np.testing.assert_allclose(odds_ratios, expected_odds_ratios, rtol=1e-12)
+
+@pytest.mark.parametrize('alternative', ['greater', 'less'])
+def test_edge_cases(alternative):
+	# empty rows/columns, zero cells, a at the ends of the support
+	a = [0, 0, 5, 0, 3, 10, 0, 7]
+	b = [0, 4, 0, 0, 0, 0,  10, 0]
+	c = [0, 0, 0, 6, 2, 0,  0, 0]
+	d = [0, 9, 3, 8, 0, 5,  0, 0]
+	odds_ratios, p_values = fisher_exact(a, b, c, d, alternative=alternative)
+	expected_odds_ratios, expected_p_values = scipy_fisher_exact(a, b, c, d, alternative)
+	np.testing.assert_allclose(p_values, expected_p_values, rtol=1e-10)
+	np.testing.assert_allclose(odds_ratios, expected_odds_ratios, rtol=1e-12) # nan and inf as scipy
+
+def test_large_tables():
+	# the users of the English Wikipedia: more than TABLE_SIZE, Stirling's formula
+	a, b = np.array([2, 40, 300]), np.array([50, 60, 700])
+	c, d = np.array([1500, 900, 20000]), np.array([40000000, 40000000, 40000000])
+	_, p_values = fisher_exact(a, b, c, d)
+	_, expected = scipy_fisher_exact(a, b, c, d, 'greater')
+	np.testing.assert_allclose(p_values, expected, rtol=1e-6)
+
+def test_log_binomial():
+	n = np.array([10, 1000, TABLE_SIZE + 5, 40000000, 40000000])
+	k = np.array([3, 500, 17, 1, 2000])
+	# the difference of the log-factorials (gammaln) cancels too many digits for large n
+	expected = [math.fsum(math.log(n_i - i) - math.log(i + 1) for i in range(k_i)) for n_i, k_i in zip(n, k)]
+	np.testing.assert_allclose(log_binomial(n, k), expected, rtol=1e-10)
+
+def test_unknown_alternative():
+	with pytest.raises(ValueError):
+		fisher_exact([1], [2], [3], [4], alternative='two-sided')
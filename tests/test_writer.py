@@ -0,0 +1,52 @@
+import io
+
+from wikiscraper.writer import TSVWriter, RowBuffer, format_row, get_writer
+
+"""
+	Tests of the buffered writer: the rows of a page reach the file only when the
+	page is committed, a page that is rolled back leaves nothing behind.
+"""
+
+def test_commit_and_rollback():
+	output = io.StringIO()
+	writer = TSVWriter(output)
+	writer.write_header(('name', 'user'))
+	writer.write_rows([('1P-LSD', 'Aethyta'), ('1P-LSD', 'ChemNerd')])
+	writer.commit()
+	writer.write_row(('ALD-52', 'Smokefoot')) # the page failed halfway
+	writer.rollback()
+	writer.write_row(('ALD-52', 'Smokefoot')) # the retry
+	writer.commit()
+	writer.flush()
+	assert output.getvalue() == 'name\tuser\n1P-LSD\tAethyta\n1P-LSD\tChemNerd\nALD-52\tSmokefoot\n'
+	assert writer.n_rows == 4
+
+def test_uncommitted_rows_are_not_flushed():
+	output = io.StringIO()
+	writer = TSVWriter(output)
+	writer.write_row(('1P-LSD', 'Aethyta'))
+	writer.flush()
+	assert output.getvalue() == ''
+
+def test_blocks():
+	output = io.StringIO()
+	writer = TSVWriter(output, buffer_size=20)
+	writer.write_row(('1P-LSD', 'Aethyta'))
+	writer.commit()
+	assert output.getvalue() == '' # less than buffer_size
+	writer.write_row(('ALD-52', 'ChemNerd'))
+	writer.commit()
+	assert output.getvalue() == '1P-LSD\tAethyta\nALD-52\tChemNerd\n'
+
+def test_escapes():
+	assert format_row(('a\tb', 'c\nd', 3)) == 'a\\tb\tc\\nd\t3\n'
+	assert format_row(('Café', 26)) == 'Café\t26\n'
+
+def test_row_buffer():
+	buffer = RowBuffer()
+	buffer.write_row(('1P-LSD', 26))
+	buffer.rollback()
+	buffer.write_rows([('ALD-52', 14), ('AL-LAD', 9)])
+	buffer.commit()
+	assert buffer.rows == [('ALD-52', 14), ('AL-LAD', 9)]
+	assert get_writer(buffer) is buffer
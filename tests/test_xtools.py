@@ -0,0 +1,156 @@
+import io
+import os
+import csv
+
+import pytest
+
+from wikiscraper import xtools
+from wikiscraper.xtools import TableNotFound, TruncatedTable
+from wikiscraper.records import parse_count, parse_timestamp
+from wikiscraper.client import HTTPClient
+from wikiscraper.cache import DiskCache
+from wikiscraper.scrape import iter_editors_of_article, get_article_editors_url, scrape_article_for_users, ScrapeError, SCRAPING_SUCCESSFULL, SCRAPING_FAILED
+
+"""
+	Tests of the parser of the XTools pages. No recorded XTools pages are
+	available (the tests run offline); the pages in tests/pages are trimmed
+	pages in the layout the original get_text() parser was written for (see
+	benchmarks/legacy.py), with the top editors of 1P-LSD as the original
+	scraper wrote them to data/designer_drugs_user_community.csv. The dates
+	of that file are the real output of XTools.
+"""
+
+PAGES = os.path.join(os.path.dirname(__file__), 'pages')
+DATA  = os.path.join(os.path.dirname(__file__), os.pardir, 'data')
+
+def read_page(name):
+	with io.open(os.path.join(PAGES, name), encoding='utf-8') as page:
+		return page.read()
+
+def read_user_community():
+	with io.open(os.path.join(DATA, 'designer_drugs_user_community.csv'), encoding='utf-8') as inputfile:
+		return list(csv.DictReader(inputfile, delimiter='\t'))
+
+def test_article_editors():
+	rows     = xtools.parse_article_editors(read_page('articleinfo.html'))
+	expected = [row for row in read_user_community() if row['name'] == '1P-LSD'][:len(rows)]
+	assert len(rows) == 5
+	for (username, n_edits, n_minor_edits, first_edit, last_edit, added_bytes), row in zip(rows, expected):
+		assert username == row['user']
+		assert (parse_count(n_edits), parse_count(n_minor_edits), parse_count(added_bytes)) == (int(row['n_edits']), int(row['n_minor_edits']), int(row['added_bytes']))
+		assert (first_edit, last_edit) == (row['first_edit'], row['last_edit'])
+
+def test_user_top_edits():
+	rows = xtools.parse_user_top_edits(read_page('topedits.html'))
+	assert rows == [('26', '1P-LSD'), ('14', 'ALD-52'), ('9', 'AL-LAD'), ('3', 'ETH-LAD')]
+
+def test_legacy_parser_agrees():
+	legacy = pytest.importorskip('benchmarks.legacy')
+	def normalize(rows):
+		return [tuple(field.replace(',', '') for field in row) for row in rows]
+	page = read_page('articleinfo.html')
+	assert normalize(legacy.parse_article_editors(page)) == normalize(xtools.parse_article_editors(page))
+	page = read_page('topedits.html')
+	assert normalize(legacy.parse_user_top_edits(page)) == normalize(xtools.parse_user_top_edits(page))
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_stream_in_chunks(chunk_size):
+	page   = read_page('articleinfo.html').encode('utf-8') # the chunks split the multi-byte characters as well
+	chunks = [page[start:start + chunk_size] for start in range(0, len(page), chunk_size)]
+	assert list(xtools.stream_article_editors(chunks)) == xtools.parse_article_editors(page.decode('utf-8'))
+
+def test_real_dates():
+	for row in read_user_community():
+		for column in ('first_edit', 'last_edit'):
+			assert parse_timestamp(row[column]) is not None
+
+def test_unknown_date_format():
+	with pytest.raises(ValueError):
+		parse_timestamp('28/07/2015 19:42')
+
+def test_truncated_page():
+	page = read_page('articleinfo.html')
+	with pytest.raises(TruncatedTable):
+		xtools.parse_article_editors(page[:page.index('ChemNerd')])
+
+def test_missing_table():
+	with pytest.raises(TableNotFound):
+		xtools.parse_article_editors('<html><body><p>Error: the article does not exist</p></body></html>')
+	with pytest.raises(TableNotFound): # the header does not have the expected columns
+		xtools.parse_article_editors(read_page('articleinfo.html').replace('First edit', 'Earliest'))
+
+class PageClient(HTTPClient):
+	"""
+	HTTP client that serves a fixed page (through the cache, as a real download would).
+	"""
+	def __init__(self, page, cache):
+		HTTPClient.__init__(self, cache=cache)
+		self.page = page
+
+	def request(self, url, headers=None, preload_content=True):
+		raise AssertionError('no requests in the tests')
+
+	def get(self, url, headers=None):
+		data = self.cache.get(url)
+		if data is None:
+			data = self.page
+			self.cache.put(url, data)
+		return data
+
+	def stream(self, url, headers=None, chunk_size=64):
+		data = self.get(url)
+		for start in range(0, len(data), chunk_size):
+			yield data[start:start + chunk_size]
+
+def test_broken_page_is_not_cached(tmp_path):
+	page   = read_page('articleinfo.html').encode('utf-8')
+	client = PageClient(page[:len(page) // 2], DiskCache(str(tmp_path)))
+	url    = get_article_editors_url('1P-LSD')
+	with pytest.raises(ScrapeError) as error:
+		list(iter_editors_of_article('1P-LSD', client=client))
+	assert error.value.reason == 'truncated_table'
+	assert client.cache.get(url) is None # the next attempt downloads the page again
+
+	client.page = page
+	assert [editor.user for editor in iter_editors_of_article('1P-LSD', client=client)][0] == 'Aethyta'
+	client.close()
+
+class StreamClient(HTTPClient):
+	"""
+	HTTP client that serves a fixed page in chunks, and records whether the page
+	was streamed or read as a whole. The download fails after fail_after chunks
+	(when given).
+	"""
+	def __init__(self, page, chunk_size=64, fail_after=None):
+		HTTPClient.__init__(self)
+		self.page, self.chunk_size, self.fail_after = page, chunk_size, fail_after
+		self.calls = []
+
+	def stream(self, url, headers=None, chunk_size=None):
+		self.calls.append('stream')
+		for n, start in enumerate(range(0, len(self.page), self.chunk_size)):
+			if n == self.fail_after:
+				raise IOError('connection reset')
+			yield self.page[start:start + self.chunk_size]
+
+	def get(self, url, headers=None):
+		self.calls.append('get')
+		return self.page
+
+def test_rows_are_streamed_and_committed_per_page():
+	client = StreamClient(read_page('articleinfo.html').encode('utf-8'))
+	output = io.StringIO()
+	assert scrape_article_for_users('1P-LSD', file=output, client=client) == SCRAPING_SUCCESSFULL
+	assert client.calls == ['stream'] # parsed while it is being downloaded
+	assert [line.split('\t')[1] for line in output.getvalue().splitlines()] == [row[0] for row in xtools.parse_article_editors(read_page('articleinfo.html'))]
+
+	client.fail_after = 20 # after part of the rows were parsed
+	output = io.StringIO()
+	assert scrape_article_for_users('1P-LSD', file=output, client=client) == SCRAPING_FAILED
+	assert output.getvalue() == '' # the rows of the page were rolled back
+
+def test_usernames_are_read_from_the_shared_page():
+	client = StreamClient(read_page('articleinfo.html').encode('utf-8'))
+	users  = scrape_article_for_users('1P-LSD', client=client, no_bots=True, no_unregistered=True, only_usernames=True)
+	assert users[0] == 'Aethyta'
+	assert client.calls == ['get']
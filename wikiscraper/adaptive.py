@@ -0,0 +1,91 @@
+import threading
+from urllib.parse import urlsplit
+
+"""
+	Adaptive concurrency per host. The number of requests that may be in
+	flight to a host is controlled AIMD-style (as in TCP congestion
+	control): it grows by one for every window of successful requests and
+	is halved whenever the host signals that it is overloaded (429, 5xx or
+	a timeout). The throughput thus converges to what the server can
+	sustain without tuning --concurrency by hand.
+"""
+
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_MIN_LIMIT     = 1
+DEFAULT_MAX_LIMIT     = 64
+
+class HostLimit:
+	"""
+	The AIMD state for a single host.
+	"""
+	def __init__(self, initial, minimum, maximum, decrease):
+		self.limit     = float(initial)
+		self.minimum   = minimum
+		self.maximum   = maximum
+		self.decrease  = decrease
+		self.in_flight = 0
+		self.condition = threading.Condition()
+
+	def acquire(self):
+		with self.condition:
+			while self.in_flight >= int(self.limit):
+				self.condition.wait()
+			self.in_flight += 1
+
+	def release(self, overloaded=False):
+		with self.condition:
+			self.in_flight -= 1
+			if overloaded: # multiplicative decrease
+				self.limit = max(self.minimum, self.limit * self.decrease)
+			else: # additive increase: +1 per window of successful requests
+				self.limit = min(self.maximum, self.limit + 1. / self.limit)
+			self.condition.notify_all()
+
+class AdaptiveConcurrency:
+	"""
+	Keeps an AIMD-controlled limit on the number of requests in flight for
+	every host. Thread-safe.
+
+	Args:
+		initial  - initial limit per host (Default: 4)
+		minimum  - the limit never drops below this (Default: 1)
+		maximum  - the limit never grows beyond this (Default: 64)
+		decrease - factor by which the limit is multiplied when the host is
+		           overloaded (Default: 0.5)
+	"""
+	def __init__(self, initial=DEFAULT_INITIAL_LIMIT, minimum=DEFAULT_MIN_LIMIT, maximum=DEFAULT_MAX_LIMIT, decrease=0.5):
+		self.initial  = initial
+		self.minimum  = minimum
+		self.maximum  = maximum
+		self.decrease = decrease
+		self.hosts    = {}
+		self.lock     = threading.Lock()
+
+	def host(self, url):
+		"""
+		Returns the state for the host of the given url.
+		"""
+		host = urlsplit(url).hostname or url
+		with self.lock:
+			if host not in self.hosts:
+				self.hosts[host] = HostLimit(self.initial, self.minimum, self.maximum, self.decrease)
+			return self.hosts[host]
+
+	def limit(self, url):
+		"""
+		Returns the current limit for the host of the given url.
+		"""
+		return int(self.host(url).limit)
+
+	def acquire(self, url):
+		"""
+		Blocks until another request to the host of the url may be made.
+		"""
+		self.host(url).acquire()
+
+	def release(self, url, overloaded=False):
+		"""
+		Reports that the request finished; overloaded is True when the host
+		signalled that it is overloaded.
+		"""
+		self.host(url).release(overloaded=overloaded)
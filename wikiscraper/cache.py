@@ -0,0 +1,197 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+"""
+	Persistent on-disk cache for the raw responses of the scraped pages.
+	Every response is stored as a separate file; an SQLite index keeps
+	track of the size, the time it was stored (for the TTL) and the time
+	it was last used (for the LRU eviction).
+"""
+
+DAY = 24 * 60 * 60 # seconds
+
+DEFAULT_MAX_BYTES = 2 * 1024**3 # 2 GB
+
+# time-to-live per endpoint (the first matching prefix of the normalized url is used)
+DEFAULT_TTLS = [
+	('https://tools.wmflabs.org/xtools-articleinfo/', 7 * DAY),
+	('https://tools.wmflabs.org/xtools/topedits/',    7 * DAY),
+	('https://en.wikipedia.org/w/api.php',            1 * DAY),
+	('https://en.wikipedia.org/wiki/Special:',        1 * DAY),
+]
+DEFAULT_TTL = 1 * DAY # for all other urls
+
+class CacheMiss(Exception):
+	"""
+	Raised in cache-only mode when a page is not in the cache.
+	"""
+	pass
+
+def normalize_url(url):
+	"""
+	Normalizes the url so that equivalent urls share the same cache entry:
+	the scheme and host are lowercased, the fragment (e.g., #topeditors) is
+	removed, the query parameters are sorted and spaces are always encoded
+	as %20.
+	"""
+	parts = urlsplit(url.strip())
+	path  = quote(unquote(parts.path), safe="/:!'()*,;=@$&+~")
+	query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)), quote_via=quote, safe="!'()*,;:@$/~|")
+	return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+class DiskCache:
+	"""
+	A size-bounded cache of raw responses in the given directory.
+
+	Args:
+		directory   - the directory where the cache is stored (created when needed)
+		max_bytes   - when the total size of the cached responses exceeds this number,
+		              the least recently used responses are removed (Default: 2 GB)
+		ttls        - list of tuples (url prefix, time-to-live in seconds); the first
+		              prefix that matches the normalized url is used (Default: DEFAULT_TTLS)
+		default_ttl - time-to-live for all other urls (Default: 1 day)
+		cache_only  - when True, nothing is downloaded; pages that are not in the cache
+		              raise a CacheMiss and expired pages are still used (Default: False)
+	"""
+	def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, ttls=None, default_ttl=DEFAULT_TTL, cache_only=False):
+		self.directory   = directory
+		self.max_bytes   = max_bytes
+		self.ttls        = list(DEFAULT_TTLS if ttls is None else ttls)
+		self.default_ttl = default_ttl
+		self.cache_only  = cache_only
+		self.lock        = threading.Lock()
+
+		os.makedirs(directory, exist_ok=True)
+
+		self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+		self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+							key      TEXT PRIMARY KEY,
+							url      TEXT,
+							size     INTEGER,
+							stored   REAL,
+							accessed REAL)""")
+		self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+		self.db.commit()
+		self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+	def ttl(self, normalized_url):
+		"""
+		Returns the time-to-live (in seconds) for the given normalized url.
+		"""
+		for prefix, ttl in self.ttls:
+			if normalized_url.startswith(prefix):
+				return ttl
+		return self.default_ttl
+
+	def path(self, key):
+		"""
+		Returns the location of the file that contains the response with the given key.
+		"""
+		return os.path.join(self.directory, key[:2], key)
+
+	def get(self, url):
+		"""
+		Returns the cached response (bytes) for the url, or None when it is
+		not in the cache or has expired.
+		"""
+		url = normalize_url(url)
+		key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+		now = time.time()
+
+		with self.lock:
+			row = self.db.execute("SELECT stored FROM entries WHERE key = ?", (key,)).fetchone()
+			if row is None:
+				return None
+			if now - row[0] > self.ttl(url): # expired
+				if not self.cache_only: # in offline mode, stale data is better than none
+					self._remove(key)
+					self.db.commit()
+					return None
+			try:
+				with open(self.path(key), 'rb') as cachefile:
+					data = cachefile.read()
+			except IOError: # file was removed behind our back
+				self._remove(key)
+				self.db.commit()
+				return None
+			self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+			self.db.commit()
+		return data
+
+	def put(self, url, data):
+		"""
+		Stores the response (bytes) for the url and evicts the least recently
+		used responses when the cache is too large.
+		"""
+		url = normalize_url(url)
+		key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+		now = time.time()
+		path = self.path(key)
+
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+
+		# write to a temporary file first, so that a crash never leaves a truncated entry
+		tmp_path = '%s.%d.tmp'%(path, threading.get_ident())
+		with open(tmp_path, 'wb') as cachefile:
+			cachefile.write(data)
+		os.replace(tmp_path, path)
+
+		with self.lock:
+			self._remove(key, remove_file=False)
+			self.db.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", (key, url, len(data), now, now))
+			self.total_bytes += len(data)
+			self._evict()
+			self.db.commit()
+
+	def delete(self, url):
+		"""
+		Removes the cached response for the url (if any), e.g., a page that
+		turned out to be broken, so that it is downloaded again.
+		"""
+		url = normalize_url(url)
+		key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+		with self.lock:
+			self._remove(key)
+			self.db.commit()
+
+	def _remove(self, key, remove_file=True):
+		row = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+		if row is None:
+			return
+		self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+		self.total_bytes -= row[0]
+		if remove_file:
+			try:
+				os.remove(self.path(key))
+			except OSError:
+				pass
+
+	def _evict(self):
+		while self.total_bytes > self.max_bytes:
+			rows = self.db.execute("SELECT key FROM entries ORDER BY accessed LIMIT 100").fetchall()
+			if not rows:
+				break
+			for (key,) in rows:
+				self._remove(key)
+				if self.total_bytes <= self.max_bytes:
+					break
+
+	def clear(self):
+		"""
+		Removes all cached responses.
+		"""
+		with self.lock:
+			for (key,) in self.db.execute("SELECT key FROM entries").fetchall():
+				self._remove(key)
+			self.db.commit()
+
+	def close(self):
+		"""
+		Closes the index.
+		"""
+		with self.lock:
+			self.db.close()
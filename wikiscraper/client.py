@@ -0,0 +1,346 @@
+import time
+import threading
+import urllib3
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+
+from .ratelimit import RateLimiter
+from .adaptive import AdaptiveConcurrency, DEFAULT_INITIAL_LIMIT
+from .cache import CacheMiss
+from .singleflight import SingleFlight
+from .metrics import REQUESTS, RESPONSE_BYTES, REQUEST_LATENCY, CACHE_HITS, PARSE_ERROR, get_status_class
+
+"""
+	Long-lived HTTP client that is shared by all the scrape functions.
+	Connections to en.wikipedia.org and tools.wmflabs.org are kept alive
+	and reused, so that not every page pays for a new TCP/TLS handshake.
+"""
+
+DEFAULT_NUM_POOLS       = 10   # number of hosts for which a connection pool is kept
+DEFAULT_MAXSIZE         = 10   # number of connections kept alive per host
+DEFAULT_CONNECT_TIMEOUT = 10.  # seconds
+DEFAULT_READ_TIMEOUT    = 120. # seconds (XTools pages can be slow)
+DEFAULT_CHUNK_SIZE      = 65536 # bytes read at a time when streaming a response
+
+# reasons why a request failed
+RATE_LIMITED = 'rate_limited' # 429 Too Many Requests
+SERVER_ERROR = 'server_error' # 5xx
+CLIENT_ERROR = 'client_error' # other 4xx (e.g., page does not exist)
+TIMEOUT      = 'timeout'
+NETWORK      = 'network'      # connection refused/reset, truncated response, ...
+CACHE_MISS   = 'cache_miss'   # cache-only mode and the page is not in the cache
+
+# reasons that indicate that the host is overloaded
+OVERLOADED = (RATE_LIMITED, SERVER_ERROR, TIMEOUT)
+
+# reasons for which another attempt gives the same result
+PERMANENT = (CLIENT_ERROR, CACHE_MISS)
+
+class FetchError(Exception):
+	"""
+	Raised when a page could not be fetched.
+
+	Attributes:
+		url         - the url of the page
+		reason      - one of RATE_LIMITED, SERVER_ERROR, CLIENT_ERROR, TIMEOUT or NETWORK
+		status      - the HTTP status code (None when there was no response)
+		retry_after - number of seconds the server asked us to wait (None when not given)
+	"""
+	def __init__(self, url, reason, status=None, retry_after=None):
+		Exception.__init__(self, '%s (status: %s) for %s'%(reason, status, url))
+		self.url         = url
+		self.reason      = reason
+		self.status      = status
+		self.retry_after = retry_after
+
+	@property
+	def overloaded(self):
+		return self.reason in OVERLOADED
+
+def get_retry_after(response):
+	"""
+	Returns the number of seconds in the Retry-After header of the response (either
+	a number of seconds or an HTTP date), or None when there is no such header.
+	"""
+	value = response.headers.get('Retry-After')
+	if value is None:
+		return None
+	try:
+		return max(0., float(value))
+	except ValueError:
+		pass
+	try:
+		return max(0., parsedate_to_datetime(value).timestamp() - time.time())
+	except (TypeError, ValueError):
+		return None
+
+def classify_exception(error):
+	"""
+	Returns the reason (TIMEOUT or NETWORK) for an exception raised by urllib3.
+	"""
+	if isinstance(error, urllib3.exceptions.MaxRetryError) and error.reason is not None:
+		error = error.reason
+	if isinstance(error, urllib3.exceptions.NewConnectionError): # subclass of ConnectTimeoutError
+		return NETWORK
+	if isinstance(error, urllib3.exceptions.TimeoutError):
+		return TIMEOUT
+	return NETWORK
+
+def get_failure_reason(error):
+	"""
+	Returns the reason (for the metrics) why an exception made scraping a page fail.
+	"""
+	if isinstance(error, FetchError):
+		return error.reason
+	if isinstance(error, CacheMiss):
+		return CACHE_MISS
+	if isinstance(error, urllib3.exceptions.HTTPError):
+		return classify_exception(error)
+	if isinstance(error, (ValueError, KeyError, TypeError)):
+		return PARSE_ERROR
+	return NETWORK
+
+def is_retryable(reason):
+	"""
+	Returns whether a page that failed for the given reason may be tried again.
+	"""
+	return reason not in PERMANENT
+
+def classify_response(url, response):
+	"""
+	Raises a FetchError when the status of the response is not 2xx/3xx.
+	"""
+	status = response.status
+	if status < 400:
+		return
+	if status == 429:
+		raise FetchError(url, RATE_LIMITED, status, get_retry_after(response))
+	if status >= 500:
+		raise FetchError(url, SERVER_ERROR, status, get_retry_after(response))
+	raise FetchError(url, CLIENT_ERROR, status)
+
+class HTTPClient:
+	"""
+	A thin wrapper around a urllib3.PoolManager. The pool manager keeps a
+	separate connection pool for every host and reuses the connections
+	(keep-alive) between requests.
+
+	Args:
+		num_pools       - number of hosts for which a connection pool is kept (Default: 10)
+		maxsize         - number of connections kept alive per host (Default: 10)
+		block           - when True, no more than maxsize connections are opened per
+		                  host at the same time (Default: False)
+		connect_timeout - timeout in seconds for setting up a connection (Default: 10)
+		read_timeout    - timeout in seconds for reading the response (Default: 120)
+		retries         - retry configuration passed on to urllib3 (Default: urllib3's default)
+		headers         - headers that are sent along with every request (Default: None)
+		rate_limiter    - the RateLimiter that throttles the requests per host
+		                  (Default: a RateLimiter with the default budgets)
+		cache           - a DiskCache for the responses (Default: None, no caching)
+		concurrency     - the AdaptiveConcurrency that limits the requests in flight per
+		                  host (Default: AIMD-controlled, starting at 4 and at most maxsize
+		                  per host)
+	"""
+	def __init__(self, num_pools=DEFAULT_NUM_POOLS, maxsize=DEFAULT_MAXSIZE, block=False,
+					connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+					retries=None, headers=None, rate_limiter=None, cache=None, concurrency=None):
+		self.num_pools    = num_pools
+		self.maxsize      = maxsize
+		self.timeout      = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+		self.rate_limiter = RateLimiter() if rate_limiter is None else rate_limiter
+		self.cache        = cache
+		self.concurrency  = AdaptiveConcurrency(initial=min(DEFAULT_INITIAL_LIMIT, maxsize), maximum=maxsize) if concurrency is None else concurrency
+		self.single_flight = SingleFlight() # shared by the read_in_*_from_url functions
+
+		pool_kw = {'maxsize': maxsize, 'block': block, 'timeout': self.timeout}
+		if retries is not None:
+			pool_kw['retries'] = retries
+
+		self.pool = urllib3.PoolManager(num_pools=num_pools, headers=headers, **pool_kw)
+
+	def request(self, url, headers=None, preload_content=True):
+		"""
+		Performs a GET request and returns the urllib3 response. Blocks first
+		until the adaptive concurrency allows another request to the host and
+		then until the rate limiter does (a token is only taken once the request
+		can be sent). Failed requests raise a FetchError; when the host is
+		overloaded the number of requests in flight is reduced, and a Retry-After
+		pauses all requests to the host.
+
+		Args:
+			url             - the url of the site
+			headers         - extra headers for this request only (Default: None)
+			preload_content - when False, the request returns as soon as the headers
+			                  are in and the body is left to be read by the caller;
+			                  the request stays in flight until the caller passes the
+			                  response to release (Default: True)
+		"""
+		host = urlsplit(url).hostname
+		self.concurrency.acquire(url)
+		overloaded = False
+		in_flight  = False # whether the slot is kept for the body (see release)
+		try:
+			self.rate_limiter.acquire(url)
+			start = time.time()
+			try:
+				response = self.pool.request('GET', url, headers=headers, preload_content=preload_content)
+			except urllib3.exceptions.HTTPError as error:
+				raise FetchError(url, classify_exception(error))
+			REQUESTS.inc(host=host, status=get_status_class(response.status))
+			if preload_content: # otherwise, the bytes are counted while streaming
+				RESPONSE_BYTES.inc(len(response.data), host=host)
+			REQUEST_LATENCY.observe(time.time() - start, host=host)
+			try:
+				classify_response(url, response)
+			except FetchError:
+				if not preload_content:
+					response.drain_conn()
+					response.release_conn()
+				raise
+			in_flight = not preload_content
+			return response
+		except FetchError as error:
+			if error.status is None: # no response at all
+				REQUESTS.inc(host=host, status=error.reason)
+			overloaded = error.overloaded
+			if error.retry_after:
+				self.rate_limiter.bucket(url).pause(error.retry_after)
+			raise
+		finally:
+			if not in_flight:
+				self.concurrency.release(url, overloaded=overloaded)
+
+	def release(self, url, response, overloaded=False):
+		"""
+		Releases a response that was requested with preload_content=False (see
+		request): the connection goes back to the pool and the request is no
+		longer in flight. overloaded is True when reading the body showed that the
+		host is overloaded (e.g., a timeout).
+		"""
+		try:
+			response.release_conn()
+		finally:
+			self.concurrency.release(url, overloaded=overloaded)
+
+	def get(self, url, headers=None):
+		"""
+		Performs a GET request and returns the raw body (bytes). When the client
+		has a cache, the page is only downloaded when it is not in the cache (and
+		in cache-only mode, a CacheMiss is raised instead).
+
+		Args:
+			url     - the url of the site
+			headers - extra headers for this request only (Default: None)
+		"""
+		if self.cache is not None:
+			data = self.cache.get(url)
+			if data is not None:
+				CACHE_HITS.inc(host=urlsplit(url).hostname)
+				return data
+			if self.cache.cache_only:
+				raise CacheMiss(url)
+
+		response = self.request(url, headers=headers)
+
+		if self.cache is not None and response.status == 200:
+			self.cache.put(url, response.data)
+		return response.data
+
+	def stream(self, url, headers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+		"""
+		Performs a GET request and yields the raw body (bytes) in chunks as it
+		comes in, so that the page can be parsed while it is being downloaded.
+		Pages in the cache are yielded from the cache; when the client has a cache,
+		the downloaded page is stored in it once it is complete. Errors while
+		reading the body raise a FetchError.
+
+		Args:
+			url        - the url of the site
+			headers    - extra headers for this request only (Default: None)
+			chunk_size - maximum number of bytes per chunk (Default: 65536)
+		"""
+		host = urlsplit(url).hostname
+
+		if self.cache is not None:
+			data = self.cache.get(url)
+			if data is not None:
+				CACHE_HITS.inc(host=host)
+				for start in range(0, len(data), chunk_size):
+					yield data[start:start + chunk_size]
+				return
+			if self.cache.cache_only:
+				raise CacheMiss(url)
+
+		response   = self.request(url, headers=headers, preload_content=False)
+		chunks     = [] if self.cache is not None and response.status == 200 else None
+		complete   = False
+		overloaded = False
+		try:
+			for chunk in response.stream(chunk_size):
+				RESPONSE_BYTES.inc(len(chunk), host=host)
+				if chunks is not None:
+					chunks.append(chunk)
+				yield chunk
+			complete = True
+		except urllib3.exceptions.HTTPError as error:
+			fetch_error = FetchError(url, classify_exception(error))
+			overloaded  = fetch_error.overloaded
+			raise fetch_error
+		finally:
+			if not complete: # the connection cannot be reused with part of the body unread
+				response.close()
+			self.release(url, response, overloaded=overloaded) # the request is in flight until the body is read
+
+		if chunks is not None:
+			self.cache.put(url, b''.join(chunks))
+
+	def discard(self, url):
+		"""
+		Removes the page from the cache (if the client has one). The responses
+		are cached before they are parsed; a page that turns out to be broken
+		(e.g., truncated) is discarded, so that a retry downloads it again.
+		"""
+		if self.cache is not None:
+			self.cache.delete(url)
+
+	def close(self):
+		"""
+		Closes all connections that are kept alive (and the cache).
+		"""
+		self.pool.clear()
+		if self.cache is not None:
+			self.cache.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+_default_client      = None
+_default_client_lock = threading.Lock()
+
+def get_default_client():
+	"""
+	Returns the HTTP client owned by the package. It is created the first time
+	it is needed.
+	"""
+	global _default_client
+	if _default_client is None:
+		with _default_client_lock:
+			if _default_client is None:
+				_default_client = HTTPClient()
+	return _default_client
+
+def set_default_client(client):
+	"""
+	Replaces the HTTP client owned by the package, e.g., to change the pool sizes
+	or timeouts for all scrape functions at once. Returns the previous client.
+
+	Args:
+		client - an HTTPClient (or None to fall back to a fresh default client)
+	"""
+	global _default_client
+	with _default_client_lock:
+		previous, _default_client = _default_client, client
+	return previous
@@ -0,0 +1,129 @@
+from .profiling import profile_stage, WRITE
+from .records import parse_timestamp
+
+try:
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+except ImportError: # the Parquet output is optional (pip install wikiscraper[parquet])
+	pa = None
+	pq = None
+
+"""
+	Parquet output of the scrape results (see the --format option of
+	wikiscrape_article and wikiscrape_user). The columns are typed: the counts
+	are integers, the first and last edit timestamps and the titles and
+	usernames are dictionary encoded. The rows are written in row groups while
+	the pages are being scraped, so a large crawl is never kept in memory.
+"""
+
+DEFAULT_ROW_GROUP_SIZE = 100000 # number of rows per row group
+
+FORMATS = ('tsv', 'parquet')
+
+# type of every column of the output (see records.py); columns that are not listed are strings
+DICTIONARY_COLUMNS = ('name', 'user', 'title')
+INTEGER_COLUMNS    = ('n_edits', 'n_minor_edits', 'added_bytes')
+TIMESTAMP_COLUMNS  = ('first_edit', 'last_edit')
+
+def check_pyarrow():
+	if pa is None:
+		raise ImportError("The Parquet output requires pyarrow (pip install pyarrow)")
+
+def get_type(column):
+	if column in DICTIONARY_COLUMNS:
+		return pa.dictionary(pa.int32(), pa.string())
+	if column in INTEGER_COLUMNS:
+		return pa.int64()
+	if column in TIMESTAMP_COLUMNS:
+		return pa.timestamp('ms') # Parquet has no timestamps in seconds
+	return pa.string()
+
+def get_schema(columns):
+	"""
+	Returns the Arrow schema of the output with the given columns (e.g.,
+	ARTICLE_EDITOR_COLUMNS).
+	"""
+	check_pyarrow()
+	return pa.schema([pa.field(column, get_type(column)) for column in columns])
+
+def get_array(values, column_type):
+	if pa.types.is_dictionary(column_type):
+		return pa.array(values, type=pa.string()).dictionary_encode()
+	if pa.types.is_timestamp(column_type):
+		return pa.array([parse_timestamp(value) for value in values], type=column_type)
+	return pa.array(values, type=column_type)
+
+class ParquetRowWriter:
+	"""
+	Writes rows to a Parquet file. Has the same methods as TSVWriter (see
+	writer.py), so it can be passed as the output of the scrape functions: the
+	rows of the current page are kept until commit() (or discarded by rollback()),
+	committed rows are written as a row group once there are row_group_size of
+	them, and by flush(). The file is only complete after close().
+
+	Example:
+
+		with ParquetRowWriter('editors.parquet', ARTICLE_EDITOR_COLUMNS) as writer:
+			scrape_list_articles_for_users(list_of_articles, output=writer)
+
+	Args:
+		filename       - the Parquet file
+		columns        - names of the columns (e.g., ARTICLE_EDITOR_COLUMNS)
+		row_group_size - number of rows per row group (Default: 100000)
+	"""
+	def __init__(self, filename, columns, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+		self.schema         = get_schema(columns)
+		self.row_group_size = row_group_size
+		self.writer         = pq.ParquetWriter(filename, self.schema)
+		self.page           = [] # rows of the current page
+		self.block          = [] # committed rows that are not written yet
+		self.n_rows         = 0  # number of rows committed
+
+	def write_header(self, columns):
+		"""
+		The names of the columns are part of the schema; nothing is written.
+		"""
+		pass
+
+	def write_row(self, row):
+		self.page.append(row)
+
+	def write_rows(self, rows):
+		self.page.extend(rows)
+
+	def commit(self):
+		page, self.page = self.page, []
+		self.block.extend(page)
+		self.n_rows += len(page)
+		if len(self.block) >= self.row_group_size:
+			self.write_block()
+
+	def rollback(self):
+		self.page = []
+
+	def write_block(self):
+		if not self.block:
+			return
+		with profile_stage(WRITE):
+			columns = zip(*self.block)
+			arrays  = [get_array(values, field.type) for values, field in zip(columns, self.schema)]
+			self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema), row_group_size=self.row_group_size)
+		self.block = []
+
+	def flush(self):
+		"""
+		Writes all committed rows as a row group; the rows of the current page (if
+		any) are not written.
+		"""
+		self.write_block()
+
+	def close(self):
+		self.flush()
+		self.writer.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+		return False
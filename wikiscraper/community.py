@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+"""
+	Index of the users of a community of interest, for counting how many of
+	the contributors of an article belong to the community (the a of the 2x2
+	contingency tables, see obtain_2x2_contigency_table). The usernames are
+	interned once to integer IDs and membership is a boolean array indexed by
+	ID. Many usernames are looked up at once in a hash table (a pandas Index),
+	so counting the community users of many articles is vectorized; the index
+	is built only once and reused for all articles.
+"""
+
+class CommunityIndex:
+	"""
+	The users of a community. Usernames that are not in the community can be
+	interned as well (see intern), e.g., to give all users of a crawl an ID.
+
+	Example:
+
+		community = CommunityIndex(list_of_original_users)
+		a = community.count(list_users_that_contributed)
+
+	Args:
+		usernames - the users of the community (Default: none)
+	"""
+	def __init__(self, usernames=()):
+		self.ids        = {} # username -> ID
+		self.usernames  = [] # ID -> username
+		self.membership = np.zeros(0, dtype=bool) # ID -> whether the user belongs to the community
+		self.index      = None # pandas Index of the usernames (position = ID) for the lookups, built when needed
+		self.members    = None # set of the usernames in the community, built when needed
+		self.add(usernames)
+
+	def intern(self, usernames):
+		"""
+		Returns the IDs (array) of the usernames; usernames without an ID get a new one.
+		"""
+		ids = np.empty(len(usernames), dtype=np.int64)
+		for i, username in enumerate(usernames):
+			user_id = self.ids.get(username)
+			if user_id is None:
+				user_id = self.ids[username] = len(self.usernames)
+				self.usernames.append(username)
+			ids[i] = user_id
+		if len(self.usernames) > len(self.membership):
+			self.membership = np.concatenate([self.membership, np.zeros(len(self.usernames) - len(self.membership), dtype=bool)])
+			self.index      = None
+		return ids
+
+	def add(self, usernames):
+		"""
+		Adds the users to the community.
+		"""
+		ids = self.intern(list(usernames))
+		self.membership[ids] = True
+		self.members = None
+
+	def get_ids(self, usernames):
+		"""
+		Returns the IDs (array) of the usernames; -1 for usernames without an ID.
+		"""
+		if self.index is None:
+			self.index = pd.Index(self.usernames, dtype=object)
+		return self.index.get_indexer(usernames).astype(np.int64)
+
+	def is_member(self, usernames):
+		"""
+		Returns a boolean array: whether every user belongs to the community.
+		"""
+		ids = self.get_ids(usernames)
+		return (ids >= 0) & self.membership[np.maximum(ids, 0)]
+
+	def count(self, usernames):
+		"""
+		Returns the number of (unique) users in the list that belong to the community.
+		For a single list of usernames (e.g., the contributors of one article), probing
+		the set of members is faster than looking up the IDs; see count_groups for many
+		lists at once.
+		"""
+		if self.members is None:
+			self.members = frozenset(np.array(self.usernames, dtype=object)[self.membership])
+		return len(self.members.intersection(usernames))
+
+	def count_groups(self, keys, usernames):
+		"""
+		Counts for every key (e.g., an article title) the number of unique users of
+		the community among its rows, e.g., for the titles and users of the top
+		edits of the users.
+
+		Args:
+			keys      - array with the key of every row
+			usernames - array with the username of every row
+
+		Returns:
+			unique_keys - the (sorted) unique keys
+			counts      - array with the number of users of the community per key
+		"""
+		unique_keys, groups = np.unique(np.asarray(keys), return_inverse=True)
+		ids    = self.get_ids(usernames)
+		member = (ids >= 0) & self.membership[np.maximum(ids, 0)]
+		pairs  = np.unique(np.stack([groups[member], ids[member]]), axis=1) # every user counts once per key
+		return unique_keys, np.bincount(pairs[0], minlength=len(unique_keys))
+
+	def __len__(self):
+		"""
+		Returns the number of users in the community.
+		"""
+		return int(np.count_nonzero(self.membership))
+
+	def __contains__(self, username):
+		user_id = self.ids.get(username)
+		return user_id is not None and bool(self.membership[user_id])
+
+	def save(self, filename):
+		"""
+		Stores the index (the usernames with their IDs and the membership) in the
+		given file (NumPy .npz).
+		"""
+		np.savez_compressed(filename, usernames=np.array(self.usernames, dtype=str), membership=self.membership)
+
+	@classmethod
+	def load(cls, filename):
+		"""
+		Returns the index stored in the given file (see save); the IDs are the same.
+		"""
+		with np.load(filename) as data:
+			index = cls()
+			index.intern(data['usernames'].tolist())
+			index.membership = data['membership'].copy()
+		return index
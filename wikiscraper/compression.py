@@ -0,0 +1,317 @@
+from __future__ import print_function
+import io
+import os
+import sys
+import time
+import zlib
+
+try: # optional, only needed for the zstd compression
+	import zstandard
+except ImportError:
+	zstandard = None
+
+"""
+	Compressed output and input of the tab-delimited files. The output is
+	compressed on the fly and written in independent frames (a gzip member
+	or a zstd frame): every flush ends a frame, so everything that was
+	flushed can be read back, even when the program crashed while writing
+	the next frame. A crawl does not flush after every article or user (small
+	frames compress badly, and every frame has a header); it asks for a
+	checkpoint instead, which ends the frame only once it is large or old
+	enough, and calls back when the data is in a complete frame, so that the
+	article or user is only then marked as done. When a file is opened for appending, an incomplete last
+	frame is cut off first, so that a resumed crawl appends to the readable
+	part. The compression of a file is detected from its first bytes when it
+	is read, and from its extension when it is written.
+"""
+
+# compression -> extension of the files
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+# compression -> first bytes of every frame
+MAGIC_NUMBERS = {'gzip': b'\x1f\x8b', 'zstd': b'\x28\xb5\x2f\xfd'}
+
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+
+FRAME_SIZE     = 1 << 22 # bytes (uncompressed) after which a frame is ended, at the end of a line, without a flush
+MIN_FRAME_SIZE = 1 << 18 # bytes (uncompressed) after which a checkpoint ends the frame
+MAX_FRAME_AGE  = 10.     # seconds after which a checkpoint ends the frame, however small
+READ_SIZE  = 1 << 16 # bytes read from the compressed file at once
+
+def check_compression(compression):
+	if compression not in EXTENSIONS:
+		raise ValueError("Unknown compression '%s' (should be one of: %s)"%(compression, ', '.join(sorted(EXTENSIONS))))
+	if compression == 'zstd' and zstandard is None:
+		raise ImportError("The zstd compression requires zstandard (pip install zstandard)")
+
+def get_compression(filename):
+	"""
+	Returns the compression ('gzip', 'zstd' or None) that belongs to the extension
+	of the file.
+	"""
+	for compression, extension in EXTENSIONS.items():
+		if filename.endswith(extension):
+			return compression
+	return None
+
+def detect_compression(filename):
+	"""
+	Returns the compression ('gzip', 'zstd' or None) of the file, based on its first
+	bytes. For a file that does not exist (or is empty), the extension decides.
+	"""
+	try:
+		with open(filename, 'rb') as inputfile:
+			start = inputfile.read(4)
+	except (IOError, OSError):
+		start = b''
+	if len(start) == 0:
+		return get_compression(filename)
+	for compression, magic_number in MAGIC_NUMBERS.items():
+		if start.startswith(magic_number):
+			return compression
+	return None
+
+def compress_frame(data, compression, level):
+	"""
+	Returns the data (bytes) compressed as a single, independent frame.
+	"""
+	if compression == 'gzip':
+		compressor = zlib.compressobj(level, zlib.DEFLATED, 31) # 31: with gzip header and trailer
+		return compressor.compress(data) + compressor.flush()
+	return zstandard.ZstdCompressor(level=level).compress(data)
+
+def get_decompressor(compression):
+	if compression == 'gzip':
+		return zlib.decompressobj(31)
+	return zstandard.ZstdDecompressor().decompressobj()
+
+def iter_frames(file, compression):
+	"""
+	Iterates over the complete frames in the (binary) file; yields the decompressed
+	data of every frame and the position in the file just after the frame. An
+	incomplete last frame is ignored.
+	"""
+	decompressor, frame, position = None, [], 0
+	while True:
+		data = file.read(READ_SIZE)
+		if len(data) == 0:
+			return
+		while len(data) > 0:
+			if decompressor is None:
+				decompressor = get_decompressor(compression)
+			frame.append(decompressor.decompress(data))
+			if not decompressor.eof:
+				position += len(data)
+				break
+			# the frame is complete; the data after it belongs to the next frame
+			unused    = decompressor.unused_data
+			position += len(data) - len(unused)
+			yield b''.join(frame), position
+			decompressor, frame, data = None, [], unused
+
+def get_end_of_frames(filename, compression):
+	"""
+	Returns the size (bytes) of the part of the file that consists of complete frames.
+	"""
+	end = 0
+	with open(filename, 'rb') as inputfile:
+		for _, end in iter_frames(inputfile, compression):
+			pass
+	return end
+
+def repair(filename, compression):
+	"""
+	Cuts off an incomplete last frame of the file (e.g., written by a crawl that
+	crashed). Returns the number of bytes that were removed.
+	"""
+	size = os.path.getsize(filename)
+	end  = get_end_of_frames(filename, compression)
+	if end < size:
+		with open(filename, 'r+b') as file:
+			file.truncate(end)
+		print('Removed an incomplete frame (%d bytes) at the end of %s'%(size - end, filename), file=sys.stderr)
+	return size - end
+
+class FramedWriter(io.TextIOBase):
+	"""
+	Text file that compresses everything written to it in independent frames. A
+	frame is ended by every flush, by a checkpoint when the frame is at least
+	min_frame_size bytes or older than max_frame_age seconds, or, when more than
+	frame_size bytes were written without either, at the end of the last line.
+
+	Example:
+
+		output = FramedWriter(open('top_edits.csv.gz', 'wb'), 'gzip')
+		for user in users:
+			output.write(scrape(user))
+			output.checkpoint(lambda user=user: state.mark_done('users', user))
+		output.close() # ends the last frame; the remaining users are marked as done
+
+	Args:
+		file           - the binary file the frames are written to
+		compression    - 'gzip' or 'zstd'
+		level          - level of compression (Default: 6 for gzip, 3 for zstd)
+		frame_size     - maximum size (bytes, uncompressed) of a frame without a flush (Default: 4 MiB)
+		min_frame_size - size (bytes, uncompressed) from which a checkpoint ends the frame (Default: 256 KiB)
+		max_frame_age  - age (seconds) from which a checkpoint ends the frame (Default: 10)
+		encoding       - the encoding of the text (Default: utf-8)
+	"""
+	def __init__(self, file, compression, level=None, frame_size=FRAME_SIZE, min_frame_size=MIN_FRAME_SIZE, max_frame_age=MAX_FRAME_AGE, encoding='utf-8'):
+		check_compression(compression)
+		self.file           = file
+		self.compression    = compression
+		self.level          = DEFAULT_LEVELS[compression] if level is None else level
+		self.frame_size     = frame_size
+		self.min_frame_size = min_frame_size
+		self.max_frame_age  = max_frame_age
+		self.text_encoding  = encoding
+		self.pending        = bytearray() # data of the current frame
+		self.frame_start    = None        # time at which the data of the current frame was first written
+		self.callbacks      = []          # called once the data written so far is in a complete frame
+
+	@property
+	def encoding(self):
+		return self.text_encoding
+
+	def writable(self):
+		return True
+
+	def write(self, text):
+		if self.closed:
+			raise ValueError('I/O operation on closed file')
+		if self.frame_start is None:
+			self.frame_start = time.time()
+		self.pending += text.encode(self.text_encoding)
+		if len(self.pending) >= self.frame_size:
+			end = self.pending.rfind(b'\n') + 1 # frames do not split lines
+			if end > 0:
+				self.write_frame(end)
+		return len(text)
+
+	def write_frame(self, end):
+		if end > 0:
+			self.file.write(compress_frame(bytes(self.pending[:end]), self.compression, self.level))
+			del self.pending[:end]
+		self.frame_start = time.time() if len(self.pending) > 0 else None
+		if self.callbacks: # the data of the callbacks ended with a line, so it is in the frame
+			self.file.flush()
+			callbacks, self.callbacks = self.callbacks, []
+			for callback in callbacks:
+				callback()
+
+	def checkpoint(self, callback=None):
+		"""
+		Calls the callback once everything written so far is in a complete frame in
+		the file: at once when the current frame is ended now (it is at least
+		min_frame_size bytes or older than max_frame_age seconds), otherwise when it
+		is ended later (by a checkpoint, a flush or close). The data written so far
+		should end with a complete line.
+		"""
+		if self.closed:
+			raise ValueError('I/O operation on closed file')
+		if callback is not None:
+			self.callbacks.append(callback)
+		if len(self.pending) == 0:
+			self.write_frame(0) # everything is in a frame already; only calls the callbacks
+		elif len(self.pending) >= self.min_frame_size or time.time() - self.frame_start >= self.max_frame_age:
+			self.write_frame(len(self.pending))
+
+	def flush(self):
+		"""
+		Ends the current frame and flushes the file.
+		"""
+		if self.closed:
+			return
+		if len(self.pending) > 0:
+			self.write_frame(len(self.pending))
+		self.file.flush()
+
+	def close(self):
+		if self.closed:
+			return
+		try:
+			super(FramedWriter, self).close() # ends the last frame (see flush)
+		finally:
+			self.file.close()
+
+class FramedReader(io.RawIOBase):
+	"""
+	Binary file with the decompressed data of the complete frames of a compressed
+	file. An incomplete last frame is left out (with a warning).
+
+	Args:
+		file        - the binary, compressed file
+		compression - 'gzip' or 'zstd'
+	"""
+	def __init__(self, file, compression):
+		check_compression(compression)
+		self.file     = file
+		self.frames   = iter_frames(file, compression)
+		self.data     = b''
+		self.offset   = 0
+		self.position = 0 # position in the file after the frames that were read
+
+	def readable(self):
+		return True
+
+	def readinto(self, buffer):
+		while self.offset == len(self.data):
+			try:
+				self.data, self.position = next(self.frames)
+				self.offset = 0
+			except StopIteration:
+				self.warn_incomplete()
+				return 0
+		n = min(len(buffer), len(self.data) - self.offset)
+		buffer[:n] = self.data[self.offset:self.offset + n]
+		self.offset += n
+		return n
+
+	def warn_incomplete(self):
+		size = os.fstat(self.file.fileno()).st_size
+		if self.position < size:
+			print('Ignored an incomplete frame (%d bytes) at the end of %s'%(size - self.position, getattr(self.file, 'name', 'the file')), file=sys.stderr)
+			self.position = size # warn only once
+
+	def close(self):
+		if self.closed:
+			return
+		try:
+			super(FramedReader, self).close()
+		finally:
+			self.file.close()
+
+def open_output(filename, mode='w', compression=None, level=None):
+	"""
+	Opens a text file for writing (mode 'w') or appending (mode 'a'). The file is
+	compressed when compression is given, or when the extension of the file is
+	.gz (gzip) or .zst (zstd). When a compressed file is appended to, an incomplete
+	last frame is removed first.
+
+	Args:
+		filename    - the location of the file
+		mode        - 'w' or 'a' (Default: 'w')
+		compression - 'gzip', 'zstd' or None (Default: based on the extension)
+		level       - the level of compression (Default: 6 for gzip, 3 for zstd)
+
+	Returns:
+		the file (text)
+	"""
+	if compression is None:
+		compression = get_compression(filename)
+	if compression is None:
+		return open(filename, mode)
+	check_compression(compression)
+	if mode == 'a' and os.path.isfile(filename):
+		repair(filename, compression)
+	return FramedWriter(open(filename, mode + 'b'), compression, level=level)
+
+def open_input(filename, encoding='utf-8'):
+	"""
+	Opens a text file for reading; gzip and zstd compressed files are detected
+	and decompressed on the fly.
+	"""
+	compression = detect_compression(filename)
+	if compression is None:
+		return open(filename, 'r')
+	return io.TextIOWrapper(io.BufferedReader(FramedReader(open(filename, 'rb'), compression)), encoding=encoding)
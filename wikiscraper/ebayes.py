@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+from scipy import optimize, special
+
+"""
+Empirical Bayes estimates of the contribution probabilities of the articles
+
+For every article, s of the n users that contributed to it belong to the community
+of interest (s = a and n = a + c of the 2x2 contingency tables, see stats.py). The
+probability p that a contributor belongs to the community is given a beta prior
+Beta(alpha0, beta0), fitted to all the articles at once (s is beta-binomial given n).
+The posterior of an article is Beta(alpha1, beta1) with alpha1 = alpha0 + s and
+beta1 = beta0 + n - s; the estimate is its mean. The 95% HPD (highest posterior
+density) credible intervals are found for all the articles at once with Newton's
+method.
+"""
+
+ARTICLE_COLUMNS = ('title', 's', 'n', 'rate', 'eb_estimate', 'alpha1', 'beta1', 'credible_low', 'credible_high', 'credible_width',
+                   'rank_based_on_eb_estimate', 'rank_based_on_n', 'rank_based_on_s')
+
+METHODS        = ('moments', 'ml')
+MAX_ITERATIONS = 50    # maximum number of Newton steps for the HPD intervals
+TOLERANCE      = 1e-10 # the HPD intervals are converged when the steps are smaller than this
+MIN_MEAN       = 1e-8  # bounds on the mean of the prior, alpha0 / (alpha0 + beta0)
+MIN_DISPERSION = 1e-8  # bounds on 1 / (alpha0 + beta0 + 1), the correlation of the contributors of an article
+MAX_DISPERSION = 1. - 1e-8
+
+def fit_beta_moments(s, n):
+	"""
+	Fits the beta prior with the method of moments: the mean and the (over)dispersion
+	of the rates s/n are matched with those of the beta-binomial distribution. The
+	articles have different n; the variance of the rate of an article is
+	mu (1 - mu) (1 + (n - 1) rho) / n, with rho = 1 / (alpha0 + beta0 + 1).
+
+	Args:
+		s - array with the number of contributors from the community per article
+		n - array with the total number of contributors per article (n > 0)
+
+	Returns:
+		alpha0, beta0
+	"""
+	s, n     = np.asarray(s, dtype=np.float64), np.asarray(n, dtype=np.float64)
+	rates    = s / n
+	mu       = np.clip(s.sum() / n.sum(), MIN_MEAN, 1. - MIN_MEAN) # all or none of the contributors from the community: (almost) degenerate prior
+	variance = np.mean((rates - mu) ** 2)
+	binomial = mu * (1. - mu)
+	rho      = (variance - binomial * np.mean(1. / n)) / (binomial * np.mean((n - 1.) / n))
+	rho      = np.clip(rho, MIN_DISPERSION, MAX_DISPERSION)
+	total    = 1. / rho - 1. # alpha0 + beta0
+	return mu * total, (1. - mu) * total
+
+def beta_binomial_log_likelihood(log_parameters, s, n):
+	"""
+	Returns minus the log-likelihood (leaving out the binomial coefficients) of the
+	beta-binomial distribution and its gradient with respect to log(alpha0), log(beta0).
+	"""
+	alpha0, beta0 = np.exp(log_parameters)
+	log_likelihood = np.sum(special.betaln(s + alpha0, n - s + beta0)) - len(s) * special.betaln(alpha0, beta0)
+	digamma_total  = special.digamma(n + alpha0 + beta0)
+	d_alpha = np.sum(special.digamma(s + alpha0) - digamma_total) - len(s) * (special.digamma(alpha0) - special.digamma(alpha0 + beta0))
+	d_beta  = np.sum(special.digamma(n - s + beta0) - digamma_total) - len(s) * (special.digamma(beta0) - special.digamma(alpha0 + beta0))
+	return -log_likelihood, -np.array([d_alpha * alpha0, d_beta * beta0])
+
+def fit_beta_ml(s, n):
+	"""
+	Fits the beta prior by maximum likelihood (s is beta-binomial given n), starting
+	from the method of moments estimate. See fit_beta_moments for the arguments.
+	"""
+	s, n   = np.asarray(s, dtype=np.float64), np.asarray(n, dtype=np.float64)
+	start  = np.log(fit_beta_moments(s, n))
+	result = optimize.minimize(beta_binomial_log_likelihood, start, args=(s, n), jac=True, method='L-BFGS-B')
+	alpha0, beta0 = np.exp(result.x)
+	return alpha0, beta0
+
+def fit_beta_prior(s, n, method='moments'):
+	"""
+	Returns alpha0, beta0 of the beta prior fitted to the articles with the given method:
+	'moments' (method of moments) or 'ml' (maximum likelihood). Articles without
+	contributors (n = 0) are left out.
+	"""
+	if method not in METHODS:
+		raise ValueError("method should be one of: %s"%', '.join(METHODS))
+	s, n = np.asarray(s), np.asarray(n)
+	s, n = s[n > 0], n[n > 0]
+	if len(n) == 0:
+		raise ValueError("The prior cannot be fitted without articles with contributors")
+	if method == 'moments':
+		return fit_beta_moments(s, n)
+	return fit_beta_ml(s, n)
+
+def posterior(s, n, alpha0, beta0):
+	"""
+	Returns the parameters of the posterior (arrays alpha1, beta1) of every article.
+	"""
+	s, n = np.asarray(s, dtype=np.float64), np.asarray(n, dtype=np.float64)
+	return alpha0 + s, beta0 + n - s
+
+def d_log_pdf(x, alpha, beta):
+	"""
+	Returns the derivative of the log density of Beta(alpha, beta) at x.
+	"""
+	return (alpha - 1.) / x - (beta - 1.) / (1. - x)
+
+def hpd_interval(alpha, beta, level=0.95):
+	"""
+	Returns the HPD credible intervals of the beta distributions: the shortest intervals
+	with the given probability. When the density is unimodal, the ends of an interval
+	(low, high) have the same density and F(high) - F(low) = level; this system is solved
+	with Newton's method for all distributions at once, starting from the equal-tailed
+	intervals. When the density is monotone (alpha <= 1 or beta <= 1), the interval
+	starts at 0 or ends at 1. For U-shaped densities (alpha < 1 and beta < 1) the HPD
+	region is not an interval; the equal-tailed interval is returned.
+
+	Args:
+		alpha, beta - arrays with the parameters of the beta distributions
+		level       - probability of the intervals (Default: 0.95)
+
+	Returns:
+		low, high - arrays with the ends of the intervals
+	"""
+	alpha, beta = [np.atleast_1d(np.asarray(array, dtype=np.float64)) for array in np.broadcast_arrays(alpha, beta)]
+
+	# equal-tailed intervals
+	low  = special.betaincinv(alpha, beta, (1. - level) / 2.)
+	high = special.betaincinv(alpha, beta, (1. + level) / 2.)
+
+	decreasing = (alpha <= 1.) & (beta > 1.)
+	increasing = (alpha > 1.) & (beta <= 1.)
+	low[decreasing],  high[decreasing] = 0., special.betaincinv(alpha[decreasing], beta[decreasing], level)
+	low[increasing],  high[increasing] = special.betaincinv(alpha[increasing], beta[increasing], 1. - level), 1.
+
+	active = np.flatnonzero((alpha > 1.) & (beta > 1.))
+	mode   = (alpha[active] - 1.) / (alpha[active] + beta[active] - 2.)
+	log_normalization = special.betaln(alpha, beta)
+	for _ in range(MAX_ITERATIONS):
+		if len(active) == 0:
+			break
+		a, b, l, h = alpha[active], beta[active], low[active], high[active]
+
+		# residuals: the probability of the interval and the difference of the log densities
+		pdf_low  = np.exp((a - 1.) * np.log(l) + (b - 1.) * np.log1p(-l) - log_normalization[active])
+		pdf_high = np.exp((a - 1.) * np.log(h) + (b - 1.) * np.log1p(-h) - log_normalization[active])
+		r1 = special.betainc(a, b, h) - special.betainc(a, b, l) - level
+		r2 = (a - 1.) * (np.log(l) - np.log(h)) + (b - 1.) * (np.log1p(-l) - np.log1p(-h))
+
+		# Jacobian [[-pdf_low, pdf_high], [g_low, -g_high]] with g the derivative of the log density
+		g_low, g_high = d_log_pdf(l, a, b), d_log_pdf(h, a, b)
+		determinant   = pdf_low * g_high - pdf_high * g_low
+		with np.errstate(divide='ignore', invalid='ignore'):
+			step_low  = (-g_high * r1 - pdf_high * r2) / determinant
+			step_high = (-g_low * r1 - pdf_low * r2) / determinant
+
+		# the ends stay on their side of the mode (and within (0, 1)); a step beyond is halved
+		new_low  = l - step_low
+		new_high = h - step_high
+		new_low  = np.where(np.isnan(new_low), l, new_low)
+		new_high = np.where(np.isnan(new_high), h, new_high)
+		new_low  = np.where(new_low <= 0., l / 2., np.where(new_low >= mode, (l + mode) / 2., new_low))
+		new_high = np.where(new_high >= 1., (h + 1.) / 2., np.where(new_high <= mode, (h + mode) / 2., new_high))
+		low[active], high[active] = new_low, new_high
+
+		done   = (np.abs(step_low) < TOLERANCE) & (np.abs(step_high) < TOLERANCE)
+		active = active[~done]
+		mode   = mode[~done]
+
+	return low, high
+
+def rank(values):
+	"""
+	Returns the ranks of the values, highest first; ties get the same (lowest) rank.
+	"""
+	return pd.Series(values).rank(ascending=False, method='min').astype(np.int64).values
+
+def estimate_articles(titles, s, n, method='moments', level=0.95):
+	"""
+	Computes the empirical Bayes estimates of all the articles at once: fits the prior,
+	computes the posteriors, the estimates and the HPD credible intervals, and ranks
+	the articles.
+
+	Args:
+		titles - the titles of the articles
+		s      - the number of contributors from the community of interest per article
+		n      - the total number of contributors per article
+		method - how the prior is fitted: 'moments' or 'ml' (Default: 'moments')
+		level  - probability of the credible intervals (Default: 0.95)
+
+	Returns:
+		data frame with the columns ARTICLE_COLUMNS (one row per article, in the given order)
+	"""
+	s, n          = np.asarray(s, dtype=np.int64), np.asarray(n, dtype=np.int64)
+	alpha0, beta0 = fit_beta_prior(s, n, method=method)
+	alpha1, beta1 = posterior(s, n, alpha0, beta0)
+	eb_estimate   = alpha1 / (alpha1 + beta1)
+	low, high     = hpd_interval(alpha1, beta1, level=level)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		rate = s / n.astype(np.float64)
+
+	df = pd.DataFrame({
+		'title':          list(titles),
+		's':              s,
+		'n':              n,
+		'rate':           rate,
+		'eb_estimate':    eb_estimate,
+		'alpha1':         alpha1,
+		'beta1':          beta1,
+		'credible_low':   low,
+		'credible_high':  high,
+		'credible_width': high - low,
+		'rank_based_on_eb_estimate': rank(eb_estimate),
+		'rank_based_on_n':           rank(n),
+		'rank_based_on_s':           rank(s)
+	})
+	return df[list(ARTICLE_COLUMNS)]
+
+def estimate_tables(df, method='moments', level=0.95):
+	"""
+	Computes the empirical Bayes estimates (see estimate_articles) for the output of
+	the final stage of wikiscrape (columns title, a, b, c and d): s = a and n = a + c.
+	"""
+	return estimate_articles(df.title, df.a, df.a + df.c, method=method, level=level)
@@ -0,0 +1,178 @@
+from __future__ import print_function
+import io
+import asyncio
+import collections
+import concurrent.futures
+
+from .retry import get_backoff
+from .writer import RowBuffer, is_writer
+from .client import is_retryable
+from .metrics import RETRIES, GIVEN_UP, last_failure
+
+"""
+	Concurrent crawl engine. The pages are fetched and parsed by the existing
+	(blocking) scrape functions on a pool of worker threads, while an asyncio
+	event loop bounds the number of requests that are in flight and writes the
+	results to the output in the same order as the input list.
+"""
+
+DEFAULT_CONCURRENCY = 8 # default number of requests in flight
+
+def crawl(items, scrape_item, output, concurrency=DEFAULT_CONCURRENCY, max_attempts=5, on_success=None, stage='crawl'):
+	"""
+	Scrapes all the items concurrently. Every item is scraped by calling
+
+		scrape_item(item, file)
+
+	where file is an in-memory buffer (a RowBuffer when output is a writer of rows,
+	otherwise a text buffer); scrape_item should return SCRAPING_SUCCESSFULL
+	or SCRAPING_FAILED (an exception counts as a failed attempt). The buffers of
+	the successfully scraped items are written to output in the order of the input
+	list, so the output is deterministic no matter in which order the pages come in.
+
+	Args:
+		items        - list of items (article titles or usernames)
+		scrape_item  - function that scrapes a single item (see above)
+		output       - either outputfile, standard out or a writer of rows (e.g., TSVWriter)
+		concurrency  - maximum number of requests in flight (Default: 8)
+		max_attempts - maximum number of attempts per item; a failed item is retried
+		               after an exponential backoff or the Retry-After of the server,
+		               an item that cannot succeed (e.g., the page does not exist) is
+		               given up at once (Default: 5)
+		on_success   - function called with the item after it has been written (Default: None)
+		stage        - label of the retry metrics (Default: 'crawl')
+
+	Returns:
+		list of items that could not be scraped
+	"""
+	loop = asyncio.new_event_loop()
+	try:
+		return loop.run_until_complete(
+			crawl_async(items, scrape_item, output, concurrency=concurrency, max_attempts=max_attempts, on_success=on_success, stage=stage))
+	finally:
+		loop.close()
+
+async def crawl_async(items, scrape_item, output, concurrency=DEFAULT_CONCURRENCY, max_attempts=5, on_success=None, stage='crawl'):
+	"""
+	Coroutine version of crawl(); can be awaited from a running event loop.
+	See crawl() for the arguments.
+	"""
+	loop      = asyncio.get_event_loop()
+	executor  = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+	in_flight = asyncio.Semaphore(concurrency)
+
+	# results that came in, but are not written yet since an earlier item is still pending.
+	# The window bounds how far ahead of the writer the crawl may run (and thus the memory).
+	window     = 4 * concurrency
+	pending    = {}
+	next_write = [0]
+	progress   = asyncio.Event()
+	failed     = []
+	new_buffer = RowBuffer if is_writer(output) else io.StringIO
+
+	def attempt(item, buffer):
+		# runs on a worker thread; the reason of a failure is only known there
+		try:
+			flag = scrape_item(item, buffer)
+		except Exception:
+			return False, ('exception', None)
+		return flag, (None if flag else last_failure())
+
+	def write_ready():
+		while next_write[0] in pending:
+			item, buffer = pending.pop(next_write[0])
+			if buffer is None:
+				failed.append(item)
+			elif isinstance(buffer, RowBuffer):
+				output.write_rows(buffer.rows)
+				output.commit()
+				if on_success is not None:
+					on_success(item)
+			else:
+				output.write(buffer.getvalue())
+				if on_success is not None:
+					on_success(item)
+			next_write[0] += 1
+
+	async def scrape_one(index, item):
+		# called with a slot of in_flight acquired; the slot is given up while
+		# waiting for a retry, so that the other items continue in the meantime
+		buffer   = None
+		has_slot = True
+		try:
+			n_attempt = 0
+			while True:
+				attempt_buffer = new_buffer()
+				flag, failure = await loop.run_in_executor(executor, attempt, item, attempt_buffer)
+				n_attempt += 1
+				if flag: # SCRAPING_SUCCESSFULL
+					buffer = attempt_buffer
+					break
+				reason, retry_after = failure
+				if n_attempt >= max_attempts or not is_retryable(reason): # e.g., the page does not exist
+					GIVEN_UP.inc(stage=stage)
+					break
+				RETRIES.inc(stage=stage, reason=reason)
+				in_flight.release()
+				has_slot = False
+				await asyncio.sleep(get_backoff(n_attempt) if retry_after is None else retry_after)
+				await in_flight.acquire()
+				has_slot = True
+		finally:
+			if has_slot:
+				in_flight.release()
+			pending[index] = (item, buffer)
+			write_ready()
+			progress.set()
+
+	tasks = []
+	try:
+		for index, item in enumerate(items):
+			# do not run too far ahead of the writer
+			while index - next_write[0] >= window:
+				progress.clear()
+				await progress.wait()
+			await in_flight.acquire()
+			tasks.append(loop.create_task(scrape_one(index, item)))
+		if tasks:
+			await asyncio.gather(*tasks)
+	finally:
+		executor.shutdown(wait=True)
+
+	return failed
+
+async def map_in_order(items, function, concurrency=DEFAULT_CONCURRENCY):
+	"""
+	Asynchronous generator that calls function(item) for every item on a pool of
+	worker threads, with at most concurrency calls at the same time, and yields
+	(item, result) in the order of the items. When the call raised an exception,
+	the exception is yielded as the result.
+
+	Args:
+		items       - iterable with the items
+		function    - blocking function that is called with a single item
+		concurrency - maximum number of calls at the same time (Default: 8)
+	"""
+	loop     = asyncio.get_event_loop()
+	executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+	pending  = collections.deque()
+
+	def call(item):
+		try:
+			return function(item)
+		except Exception as error:
+			return error
+
+	try:
+		for item in items:
+			pending.append((item, loop.run_in_executor(executor, call, item)))
+			if len(pending) >= 2 * concurrency: # keep the workers busy, but do not run too far ahead
+				item, future = pending.popleft()
+				yield item, await future
+		while pending:
+			item, future = pending.popleft()
+			yield item, await future
+	finally: # the consumer may stop early
+		for item, future in pending:
+			future.cancel()
+		executor.shutdown(wait=False)
@@ -7,6 +7,15 @@ import requests
 import shutil
 from IPy import IP
 
+try: # optional, decodes JSON considerably faster than the json module
+	import orjson
+except ImportError: 
+	orjson = None
+
+from .client import HTTPClient, get_default_client, set_default_client
+from .profiling import profile_stage, FETCH, DECODE
+from .compression import open_input
+
 urllib3.disable_warnings()
 
 # user agent for scraping the XTools pages
@@ -85,36 +94,143 @@ def read_list_from_file(filename):
 			list 
 	"""
 	l = [] 
-	with open(filename, 'r') as inputfile:
+	with open_input(filename) as inputfile: # gzip/zstd compressed files are detected
 		for username in inputfile: 
 			l.append(username.strip())
 	return l 
 
-def read_in_data_from_url(url, headers=False, json=False): 
+def read_in_data_from_url(url, headers=False, json=False, client=None): 
 	"""
-	Reads in the HTML data from a given site.
+	Reads in the HTML data from a given site. When the same page is being read 
+	by another thread at the same time, the page is not downloaded again; the 
+	result of the other thread is returned instead. 
 
 	Args:
 		url     - the url of the site
 		headers - when True, a fake agent is used
 		json    - when True, the output is returned in JSON format
+		client  - the HTTPClient used for the request (Default: the client owned by the package)
 	
 	Returns:
 		raw HTML output or JSON formated data
 	"""
-	http = urllib3.PoolManager()
+	if client is None: 
+		client = get_default_client()
+
+	def read(): 
+		with profile_stage(FETCH): 
+			if headers: # use fake agent
+				data = client.get(url, headers=USER_AGENT)
+			else: 
+				data = client.get(url)
+
+		with profile_stage(DECODE): 
+			soup = BeautifulSoup(data, 'html.parser')
+			return soup.get_text()
+
+	if json: # output in JSON format
+		return read_in_json_from_url(url, headers=headers, client=client)
+	return client.single_flight.do((url, bool(headers), False), read)
+
+def loads_json(data): 
+	"""
+	Decodes JSON from the raw bytes (or str), with orjson when it is installed. 
+	"""
+	if orjson is not None: 
+		return orjson.loads(data)
+	return json.loads(data)
+
+def read_in_json_from_url(url, headers=False, client=None): 
+	"""
+	Reads in the JSON data from a given site (e.g., the MediaWiki API). The raw 
+	bytes are decoded directly (with orjson when it is installed), without 
+	parsing them as HTML first. As for read_in_data_from_url, a page that is being 
+	read by another thread at the same time is not downloaded again. 
+
+	Args:
+		url     - the url of the site
+		headers - when True, a fake agent is used
+		client  - the HTTPClient used for the request (Default: the client owned by the package)
+	
+	Returns:
+		the decoded JSON data
+	"""
+	if client is None: 
+		client = get_default_client()
+
+	def read(): 
+		with profile_stage(FETCH): 
+			if headers: # use fake agent
+				data = client.get(url, headers=USER_AGENT)
+			else: 
+				data = client.get(url)
+
+		with profile_stage(DECODE): 
+			return loads_json(data)
+
+	return client.single_flight.do((url, bool(headers), 'json'), read)
+
+def read_in_html_from_url(url, headers=False, client=None): 
+	"""
+	Reads in the HTML of a given site as it is, i.e., without parsing it. As for 
+	read_in_data_from_url, a page that is being read by another thread at the 
+	same time is not downloaded again. 
+
+	Args:
+		url     - the url of the site
+		headers - when True, a fake agent is used
+		client  - the HTTPClient used for the request (Default: the client owned by the package)
+	
+	Returns:
+		raw HTML (str)
+	"""
+	if client is None: 
+		client = get_default_client()
+
+	def read(): 
+		with profile_stage(FETCH): 
+			if headers: # use fake agent
+				data = client.get(url, headers=USER_AGENT)
+			else: 
+				data = client.get(url)
+
+		with profile_stage(DECODE): 
+			return data.decode('utf-8', errors='replace')
+
+	return client.single_flight.do((url, bool(headers), 'html'), read)
+
+def stream_html_from_url(url, headers=False, client=None): 
+	"""
+	Reads in the HTML of a given site in chunks, as it comes in. Unlike 
+	read_in_html_from_url, the page is never shared with other threads. 
+
+	Args:
+		url     - the url of the site
+		headers - when True, a fake agent is used
+		client  - the HTTPClient used for the request (Default: the client owned by the package)
+	
+	Returns:
+		generator with the raw HTML (bytes) in chunks
+	"""
+	if client is None: 
+		client = get_default_client()
 
 	if headers: # use fake agent
-		request = http.request('GET', url, headers=USER_AGENT)
-	else: 
-		request = http.request('GET', url)
+		return client.stream(url, headers=USER_AGENT)
+	return client.stream(url)
 
-	soup = BeautifulSoup(request.data, 'html.parser')
+def discard_cached_page(url, client=None): 
+	"""
+	Removes the page from the cache of the client, e.g., when it could not be 
+	parsed, so that it is downloaded again when it is retried. 
 
-	if json: # output in JSON format or not
-		return json.loads(soup.get_text())
-	else: 
-		return soup.get_text()
+	Args:
+		url    - the url of the site
+		client - the HTTPClient (Default: the client owned by the package)
+	"""
+	if client is None: 
+		client = get_default_client()
+	client.discard(url)
 
 def get_links(list_names, link="<NAME>", space_replace='%20'): 
 	"""
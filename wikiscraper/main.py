@@ -13,10 +13,23 @@ import math
 import pandas as pd 
 from pandas import DataFrame
 from pandas import Series
-from scipy import stats
 
 from .scrape import *
 from .helper import * 
+from .client import DEFAULT_MAXSIZE
+from .adaptive import AdaptiveConcurrency
+from .ratelimit import RateLimiter, MEDIAWIKI_HOST, XTOOLS_HOST
+from .cache import DiskCache
+from .state import CrawlState
+from .engine import crawl
+from .metrics import REGISTRY, ROWS
+from .profiling import PROFILER, ProfiledFile, profile_stage, STATISTICS
+from .records import ARTICLE_EDITOR_COLUMNS, USER_TOP_EDIT_COLUMNS
+from .columnar import ParquetRowWriter, FORMATS
+from .compression import open_output, open_input, EXTENSIONS
+from .stats import fisher_exact
+from .ebayes import estimate_tables
+from .community import CommunityIndex
 
 def get_max_attempts(argument):
     """
@@ -28,49 +41,345 @@ def get_max_attempts(argument):
         return float("inf") # unlimited number of attempts
     return int(argument)
 
+def get_concurrency(argument): 
+    """
+    Gets the number of pages that are scraped at the same time from the raw argument. 
+    """
+    if argument == None: 
+        return 1 # default
+    return int(argument)
+
+def setup_client(arguments): 
+    """
+    Sets up the HTTP client that is used by all the scrape functions: the connection 
+    pools are large enough for the given concurrency, the requests per host are 
+    throttled by the given rate and the responses are cached in the cache directory. 
+    """
+    concurrency  = get_concurrency( arguments['--concurrency'] )
+    rate_limiter = RateLimiter()
+    cache        = None
+
+    if arguments['--rate'] != None: 
+        rate = float(arguments['--rate'])
+        for host in (MEDIAWIKI_HOST, XTOOLS_HOST): 
+            rate_limiter.set_budget(host, rate, burst=max(1, int(rate)))
+
+    if arguments['--cache-dir'] != None: 
+        cache = DiskCache(arguments['--cache-dir'], cache_only=arguments['--cache-only'])
+    elif arguments['--cache-only']: 
+        print('--cache-only requires --cache-dir', file=sys.stderr)
+        sys.exit(1)
+
+    # the adaptive limit on the requests in flight per host starts at the given concurrency 
+    # (rather than its default), so that it does not cap --concurrency while it grows 
+    maxsize = max(DEFAULT_MAXSIZE, concurrency)
+    set_default_client(HTTPClient(maxsize=maxsize, rate_limiter=rate_limiter, cache=cache, 
+                        concurrency=AdaptiveConcurrency(initial=min(concurrency, maxsize), maximum=maxsize)))
+    return concurrency
+
 def get_outputfile(argument): 
     """
-    Gets the outputfile from the raw argument.
+    Gets the outputfile from the raw argument. The file is compressed when its 
+    name ends with .gz (gzip) or .zst (zstd). 
     """
     if argument != None: 
-        return open(argument, 'w')
+        return open_output(argument)
     return sys.stdout
 
-def get_number_users():
+def get_output(arguments, columns): 
+    """
+    Opens the output given by the --output and --format options: either the 
+    outputfile (or standard out) for the tab-delimited output, or a writer of 
+    the Parquet file with the given columns. 
+    """
+    output_format = 'tsv' if arguments['--format'] == None else arguments['--format']
+    if output_format not in FORMATS: 
+        print('--format should be one of: %s'%', '.join(FORMATS), file=sys.stderr)
+        sys.exit(1)
+    if output_format == 'parquet': 
+        if arguments['--output'] == None: 
+            print('--format parquet requires --output', file=sys.stderr)
+            sys.exit(1)
+        return ParquetRowWriter(arguments['--output'], columns)
+    return profile_output(get_outputfile(arguments['--output']))
+
+def close_output(output): 
+    """
+    Closes the output (standard out is kept open). 
+    """
+    if output is not sys.stdout: 
+        output.close()
+
+def get_compression(argument): 
+    """
+    Gets the compression of the intermediate files from the raw argument. 
+    """
+    if argument != None and argument not in EXTENSIONS: 
+        print('--compress should be one of: %s'%', '.join(sorted(EXTENSIONS)), file=sys.stderr)
+        sys.exit(1)
+    return argument
+
+def get_stage_filename(filename, compression): 
+    """
+    Returns the name of the output file of a stage of the crawl, with the extension 
+    of the compression (if any). When the file exists already, with another or 
+    without compression, that file is used, so that an interrupted crawl continues 
+    in the same file. 
+    """
+    for extension in [''] + sorted(EXTENSIONS.values()): 
+        if os.path.isfile(filename + extension): 
+            return filename + extension
+    if compression == None: 
+        return filename
+    return filename + EXTENSIONS[compression]
+
+def read_stage_output(filename, dtype): 
+    """
+    Reads the output file of a stage of the crawl (compressed or not) into a data frame.
+    """
+    with open_input(filename) as inputfile: 
+        return pd.read_table(inputfile, sep='\t', dtype=dtype)
+
+def open_stage_output(filename, header): 
+    """
+    Opens the output file of a stage of the crawl for appending (an incomplete last 
+    frame of a compressed file is removed first). The header is only written when 
+    the file is new (or empty). 
+    """
+    output = open_output(filename, 'a')
+    if os.path.getsize(filename) == 0: 
+        print(header, file=output)
+        output.flush()
+    return output
+
+def resume_stage(state, stage, keys, filename, column): 
+    """
+    Adds the articles/users of a stage to the crawl state and returns the ones that 
+    still need to be scraped. When the output file of the stage exists, but the crawl 
+    state does not know the stage (the file was written before the crawl state was 
+    kept), the articles/users in the given column of the file are considered done. 
+    """
+    if not state.is_known(stage) and os.path.isfile(filename): 
+        df = read_stage_output(filename, dtype={column: str})
+        state.import_done(stage, df[column].unique())
+    state.add(stage, keys)
+    return state.pending(stage)
+
+def dump_metrics(arguments): 
+    """
+    Writes the request metrics to the file given by the --metrics option (if any). 
+    """
+    if arguments['--metrics'] != None: 
+        REGISTRY.dump(arguments['--metrics'])
+
+def setup_profiler(arguments): 
+    """
+    Enables the profiler when the --profile option is given; with --profile-detail, 
+    a cProfile and the peak memory are recorded per stage as well. 
+    """
+    if arguments['--profile'] != None: 
+        PROFILER.enable(detailed=arguments['--profile-detail'])
+    elif arguments['--profile-detail']: 
+        print('--profile-detail requires --profile', file=sys.stderr)
+        sys.exit(1)
+
+def profile_output(output): 
+    """
+    Returns the output file such that the time spent writing to it is recorded by 
+    the profiler (when it is enabled). Standard out is not wrapped. 
+    """
+    if PROFILER.enabled and output is not sys.stdout: 
+        return ProfiledFile(output, PROFILER)
+    return output
+
+def write_profile(arguments): 
+    """
+    Writes the profile report to the file given by the --profile option (if any). 
+    """
+    if arguments['--profile'] != None: 
+        PROFILER.disable()
+        PROFILER.write_report(arguments['--profile'])
+
+def mark_done(state, stage, output): 
+    """
+    Returns a function that marks an article/user as done in the crawl state, after 
+    its rows have been flushed to the output. A compressed output is not flushed 
+    after every article/user (that would end a frame for each of them); the 
+    article/user is marked as done once the frame with its rows has been written 
+    (see FramedWriter.checkpoint). 
+    """
+    def on_success(key): 
+        if hasattr(output, 'checkpoint'): 
+            output.checkpoint(lambda: state.mark_done(stage, key))
+        else: 
+            output.flush()
+            state.mark_done(stage, key)
+    return on_success
+
+def write_table(article_title, table, output): 
+    """
+    Writes the 2x2 table of a scraped article (see obtain_2x2_contigency_table) to 
+    the output; the tables are tested all at once when the crawl is done (see 
+    write_fisher_exact). 
+
+    Args: 
+        article_title - the title of the article
+        table         - the 2x2 table [[a, c], [b, d]]
+        output        - the file the table is written to (e.g., the buffer of the crawl engine)
+    """
+    (a, c), (b, d) = table
+    print("%s\t%d\t%d\t%d\t%d"%(article_title, a, b, c, d), file=output)
+    ROWS.inc(stage='final')
+
+def take_over_tables(tables_filename, outputfilename): 
+    """
+    Creates the file with the 2x2 tables from the final output of an earlier crawl 
+    (that tested every table as soon as it was scraped and kept no separate file with 
+    the tables), so that a resumed crawl does not lose the tables of that crawl. 
+    """
+    if os.path.isfile(tables_filename) or not os.path.isfile(outputfilename): 
+        return
+    df = read_stage_output(outputfilename, dtype={'title': str})
+    with open_output(tables_filename) as outputfile: 
+        df[['title', 'a', 'b', 'c', 'd']].to_csv(outputfile, sep='\t', index=False)
+
+def write_fisher_exact(tables_filename, outputfilename): 
+    """
+    Tests all the 2x2 tables of the crawl (see write_table) at once with Fisher's 
+    exact test (see stats.fisher_exact) and writes them with their odds ratios and 
+    p-values to the final output (and standard out). 
+
+    Returns: 
+        data frame with the columns title, a, b, c, d, odds_ratio and p_value
+    """
+    df = read_stage_output(tables_filename, dtype={'title': str})
+    with profile_stage(STATISTICS): 
+        df['odds_ratio'], df['p_value'] = fisher_exact(df.a, df.b, df.c, df.d, alternative='greater')
+    df.to_csv(sys.stdout, sep='\t', index=False, float_format='%f', na_rep='nan')
+    with open_output(outputfilename) as outputfile: 
+        df.to_csv(outputfile, sep='\t', index=False, float_format='%f', na_rep='nan')
+    return df
+
+def prescore_candidates(df, community, exclude): 
+    """
+    Pre-scores the candidate articles with the top edits of the users of the community 
+    (the output of the other_articles stage): the number of users of the community that 
+    have an article among their top edits is a lower bound on a (see 
+    obtain_2x2_contigency_table). 
+
+    Args: 
+        df        - data frame with the columns user and title (the top edits of the users)
+        community - the CommunityIndex of the users of the community
+        exclude   - articles that are no candidates (e.g., the original list of articles)
+
+    Returns: 
+        data frame with the columns title, a_lower_bound and rank, ranked by a_lower_bound 
+        (highest first) 
+    """
+    df = df.dropna(subset=['user', 'title'])
+    with profile_stage(STATISTICS): 
+        titles, counts = community.count_groups(df.title.values, df.user.values)
+    candidates = DataFrame({'title': titles, 'a_lower_bound': counts})
+    candidates = candidates[~candidates.title.isin(set(exclude))]
+    candidates = candidates.sort_values(by=['a_lower_bound', 'title'], ascending=[False, True], kind='mergesort')
+    candidates['rank'] = range(1, len(candidates) + 1)
+    return candidates
+
+def select_candidates(candidates, min_core_users, max_candidates): 
+    """
+    Returns the titles of the candidate articles (see prescore_candidates) that are 
+    scraped, at most max_candidates of them (the best ranked ones; None: no maximum). 
+    The articles that fewer than min_core_users of the community have among their top 
+    edits are deferred rather than left out: a_lower_bound is only a lower bound on a 
+    (a user may have edited the article without having it among the top edits), so it 
+    cannot show that an article does not reach the minimum. 
+
+    Returns: 
+        selected - the titles of the articles that are scraped first (in order of rank)
+        deferred - the titles of the articles that are scraped after those (in order of rank)
+    """
+    if max_candidates != None: 
+        candidates = candidates.head(max_candidates)
+    first = candidates.a_lower_bound >= min_core_users
+    return list(candidates.title[first]), list(candidates.title[~first])
+
+def get_number_users(argv=sys.argv[1:]):
     """
     Outputs the total number of registered English Wikipedia users. 
-    The data is obtained from the url https://en.wikipedia.org/wiki/Special:Statistics.
+    The data is obtained from the statistics of the MediaWiki API (meta=siteinfo).
     
     Usage:
-        wikistats [-h] [-V] 
+        wikistats [-m metrics] [-p report [--profile-detail]] [-h] [-V] 
 
     Options: 
+        -m, --metrics metrics       Request metrics are written to the given file, as JSON when it ends with .json, otherwise in the Prometheus text format
+        -p, --profile report        The time spent per stage (fetch, decode, walk, write, statistics) is written to the given file
+        --profile-detail            The profile report contains a cProfile and the peak memory per stage as well (requires --profile)
         -h, --help      This help text
         -V, --version   Version information
     """
+    arguments = docopt.docopt(get_number_users.__doc__, argv, version=__version__)
+
+    setup_profiler(arguments)
+
     n_registered_users = get_number_registered_users()
     print('Total number of registered English Wikipedia users: %d'%n_registered_users)
 
+    dump_metrics(arguments)
+    write_profile(arguments)
+
 def scrape(argv=sys.argv[1:]): 
     """
     Returns a list of articles that characterize the users that contributed 
     to the given list of articles the most.  
 
+    The status of every article and user is kept in the crawl state 
+    (intermediate-results/<base>_state.sqlite); when the crawl is interrupted, 
+    running the same command again continues where it stopped. 
+
+    Before the other articles are scraped for the contingency tables, they are 
+    ranked by the number of users of the community that have them among their top 
+    edits (a lower bound on a; see intermediate-results/<base>_candidates.csv). The 
+    best ranked articles are scraped first; articles beyond --max-candidates are not 
+    scraped at all. The articles below --min-core-users are deferred: they are scraped 
+    once the results of the others have been written (a is at least the lower bound, 
+    so the bound cannot show that an article stays below the minimum). The 2x2 tables of the articles are 
+    collected in intermediate-results/<base>_tables.csv; once they are all in, they 
+    are tested at once with Fisher's exact test (<base>_final.csv). 
+
+    Finally, the empirical Bayes estimates of the probability that a contributor of 
+    an article belongs to the community, with their 95% HPD credible intervals and 
+    ranks, are written to <base>_articles.csv (see ebayes.py). 
+
     Usage: 
-        wikiscrape [-a attempts] [-h] [-v] [-V] <article-file>
+        wikiscrape [-a attempts] [-c concurrency] [-r rate] [-z compression] [--min-core-users n] [--max-candidates n] [--cache-dir dir] [--cache-only] [-m metrics] [-p report [--profile-detail]] [-h] [-v] [-V] <article-file>
 
     where 
         <article-file> is a file with on every line the title 
             of a Wikipedia article
 
     Options: 
+        --cache-dir dir             Responses are cached in the given directory and reused on later runs (Default: no cache)
+        --cache-only                Only use the cached responses, nothing is downloaded (requires --cache-dir)
         -a, --attempts attempts     Number of attempts to scrape the sites. In case of 'no', unlimited. (Default: 5)
+        -c, --concurrency concurrency   Number of pages scraped at the same time (Default: 1)
+        -m, --metrics metrics       Request metrics are written to the given file, as JSON when it ends with .json, otherwise in the Prometheus text format
+        -p, --profile report        The time spent per stage (fetch, decode, walk, write, statistics) is written to the given file
+        --profile-detail            The profile report contains a cProfile and the peak memory per stage as well (requires --profile)
+        -r, --rate rate             Maximum number of requests per second per host (Default: 10 for the MediaWiki API, 2 for XTools)
+        -z, --compress compression  The intermediate files and the result are compressed: gzip or zstd (Default: no compression)
+        --min-core-users n          The articles that fewer than n users of the community have among their top edits are tested after the others (Default: 1)
+        --max-candidates n          Only the n articles that most users of the community have among their top edits are tested (Default: all)
         -h, --help      This help text
         -v, --verbose   Verbose
         -V, --version   Version information
     """
     arguments = docopt.docopt(scrape.__doc__, argv, version=__version__)
 
+    setup_profiler(arguments)
+    concurrency = setup_client(arguments)
+    compression = get_compression(arguments['--compress'])
+
     # get the original list of articles
     original_list_of_articles = read_list_from_file(arguments['<article-file>'])
 
@@ -79,79 +388,128 @@ def scrape(argv=sys.argv[1:]):
 
     # get all the file names with the intermediate results: 
     original_articles_filename   = arguments['<article-file>']
-    original_community_filename  = "intermediate-results/%s_orig_community.csv"%base_name
-    other_articles_filename      = "intermediate-results/%s_other_articles.csv"%base_name
+    original_community_filename  = get_stage_filename("intermediate-results/%s_orig_community.csv"%base_name, compression)
+    other_articles_filename      = get_stage_filename("intermediate-results/%s_other_articles.csv"%base_name, compression)
+    candidates_filename          = get_stage_filename("intermediate-results/%s_candidates.csv"%base_name, compression)
     other_articles_list_filename = "intermediate-results/%s_list_unqiue_other_articles.csv"%base_name
     all_users_filename           = "intermediate-results/%s_all_users.csv"%base_name 
 
+    # the status of every article/user in every stage is kept, so that an interrupted 
+    # crawl continues where it stopped 
+    state = CrawlState("intermediate-results/%s_state.sqlite"%base_name)
+
     # get a list of the users that contributed to the original list of articles
-    if not os.path.isfile(original_community_filename): 
+    pending = resume_stage(state, 'orig_community', original_list_of_articles, original_community_filename, 'name')
+    if len(pending) > 0: 
 
         # scrape the orginal list of articles
-        scrape_list_articles_for_users(
-                    original_list_of_articles,
-                    output=open(original_community_filename, 'w'),
-                    max_attempts=get_max_attempts( arguments['--attempts'] ),
-                    header=True,
-                    top=100000,
-                    no_bots=True,
-                    no_unregistered=True,
-                    verbose=True
-                )
+        with profile_output(open_stage_output(original_community_filename, "name\tuser\tn_edits\tn_minor_edits\tfirst_edit\tlast_edit\tadded_bytes")) as output: 
+            failed = scrape_list_articles_for_users(
+                        pending,
+                        output=output,
+                        max_attempts=get_max_attempts( arguments['--attempts'] ),
+                        header=False,
+                        top=100000,
+                        no_bots=True,
+                        no_unregistered=True,
+                        verbose=True,
+                        concurrency=concurrency,
+                        on_success=mark_done(state, 'orig_community', output)
+                    )
+        state.mark_failed('orig_community', failed)
 
     # get the unique lists of users
-    df = pd.read_table(original_community_filename, sep='\t')
+    df = read_stage_output(original_community_filename, dtype={'user': str})
     list_of_original_users = df.user.unique()
 
     # print(list_of_original_users)
 
     # get a list of the other articles these users contributed to
-    if not os.path.isfile(other_articles_filename): 
+    pending = resume_stage(state, 'other_articles', list_of_original_users, other_articles_filename, 'user')
+    if len(pending) > 0: 
 
-        scrape_list_users_for_articles(
-                list(list_of_original_users),
-                output=open(other_articles_filename, 'w'),
-                max_attempts=get_max_attempts( arguments['--attempts'] ),
-                header=True,
-                verbose=True
-        )
+        with profile_output(open_stage_output(other_articles_filename, "user\ttitle\tn_edits")) as output: 
+            failed = scrape_list_users_for_articles(
+                    pending,
+                    output=output,
+                    max_attempts=get_max_attempts( arguments['--attempts'] ),
+                    header=False,
+                    verbose=True,
+                    concurrency=concurrency,
+                    on_success=mark_done(state, 'other_articles', output)
+            )
+        state.mark_failed('other_articles', failed)
 
-    # get the unique lists of all articles 
-    df = pd.read_table(other_articles_filename, sep='\t')
-    list_of_other_articles = list(df.title.unique())
+    # the usernames of the community are interned once for all the articles
+    community = CommunityIndex(list_of_original_users)
 
-    # get the difference
-    list_of_other_articles = list(set(list_of_other_articles) - set(original_list_of_articles))
+    # rank the other articles (not in the original list) by the number of users of the 
+    # community that have them among their top edits
+    df = read_stage_output(other_articles_filename, dtype={'user': str, 'title': str})
+    candidates = prescore_candidates(df, community, exclude=original_list_of_articles)
+    with open_output(candidates_filename) as outputfile: 
+        candidates.to_csv(outputfile, sep='\t', index=False)
 
-    # print(list_of_other_articles)
-    # print(len(list_of_other_articles))
+    min_core_users = 1 if arguments['--min-core-users'] == None else int(arguments['--min-core-users'])
+    max_candidates = None if arguments['--max-candidates'] == None else int(arguments['--max-candidates'])
+    selected, deferred = select_candidates(candidates, min_core_users, max_candidates)
+    print('%d of %d candidate articles are tested (%d of them after the others)'%(len(selected) + len(deferred), len(candidates), len(deferred)), file=sys.stderr)
 
     # TODO change
     total_size_community = get_number_registered_users()
 
-    outputfilename = '%s_final.csv'%base_name
-
-    # reduce the list by articles that were already crawled
-    if os.path.isfile(outputfilename): 
-        df = pd.read_table(outputfilename, sep='\t')
-        list_of_crawled_articles = list(df.title.unique())
-        list_of_other_articles = list(set(list_of_other_articles) - set(list_of_crawled_articles))
+    tables_filename   = get_stage_filename("intermediate-results/%s_tables.csv"%base_name, compression)
+    outputfilename    = get_stage_filename('%s_final.csv'%base_name, compression)
+    articles_filename = get_stage_filename('%s_articles.csv'%base_name, compression)
 
-    output = open('%s_final.csv'%base_name, 'w')
+    # reduce the lists by articles that were already crawled; the best ranked are scraped first 
+    # (articles of an earlier run with other thresholds are left out as well)
+    take_over_tables(tables_filename, outputfilename)
+    pending = set(resume_stage(state, 'final', selected + deferred, tables_filename, 'title'))
 
-    print("title\ta\tb\tc\td\todds_ratio\tp_value")
-
-    with open(outputfilename, 'a') as output: 
-        print("title\ta\tb\tc\td\todds_ratio\tp_value", file=output)
-
-    for article_title in list_of_other_articles: 
-        table, flag = obtain_2x2_contigency_table(article_title, list_of_original_users, total_size_community, top=10000)
+    def scrape_table(article_title, file): 
+        table, flag = obtain_2x2_contigency_table(article_title, community, total_size_community, top=10000)
         if flag == SCRAPING_FAILED: 
+            return SCRAPING_FAILED
+        write_table(article_title, table, file)
+        return SCRAPING_SUCCESSFULL
+
+    # the deferred articles are scraped once the results of the others have been written 
+    # (the results are always written after the last pass, even when nothing was pending) 
+    for last, list_of_other_articles in ((False, selected), (True, deferred)): 
+        list_of_other_articles = [article_title for article_title in list_of_other_articles if article_title in pending]
+        if len(list_of_other_articles) == 0 and not last: 
             continue
-        odds_ratio, p_value = stats.fisher_exact(table, alternative='greater')
-        print("%s\t%d\t%d\t%d\t%d\t%f\t%f"%(article_title, table[0][0], table[1][0], table[0][1], table[1][1], odds_ratio, p_value))
-        with open(outputfilename, 'a') as output: 
-            print("%s\t%d\t%d\t%d\t%d\t%f\t%f"%(article_title, table[0][0], table[1][0], table[0][1], table[1][1], odds_ratio, p_value), file=output)
+
+        with profile_output(open_stage_output(tables_filename, "title\ta\tb\tc\td")) as output: 
+            # the articles are scraped concurrently (see engine.crawl); the table of every article 
+            # is written and marked as done as soon as it is scraped, so that an interrupted crawl 
+            # does not scrape it again 
+            failed = crawl(
+                        list_of_other_articles, 
+                        scrape_table, 
+                        output, 
+                        concurrency=concurrency, 
+                        max_attempts=get_max_attempts( arguments['--attempts'] ), 
+                        on_success=mark_done(state, 'final', output), 
+                        stage='final'
+                    )
+        state.mark_failed('final', failed)
+
+        # Fisher's exact test of all the tables at once 
+        df = write_fisher_exact(tables_filename, outputfilename)
+
+        # the empirical Bayes estimates, credible intervals and ranks of all the tested articles 
+        if (df.a + df.c > 0).any(): 
+            with profile_stage(STATISTICS): 
+                articles = estimate_tables(df)
+            with open_output(articles_filename) as outputfile: 
+                articles.to_csv(outputfile, sep='\t', index=False)
+
+    state.close()
+
+    dump_metrics(arguments)
+    write_profile(arguments)
 
     # article_title = "Googol"
     # print(article_title)
@@ -165,7 +523,7 @@ def scrape_article(argv=sys.argv[1:]):
     Gets of users that edited a list of given articles the most. 
 
     Usage:
-        wikiscrape_article [--no-bots] [--no-unregistered] [-a attempts] [-o output] [-t top] [-h] [-v] [-V] <articles>
+        wikiscrape_article [--no-bots] [--no-unregistered] [-a attempts] [-c concurrency] [-o output] [-f format] [-r rate] [-t top] [--cache-dir dir] [--cache-only] [-m metrics] [-p report [--profile-detail]] [-h] [-v] [-V] <articles>
 
     where 
         <articles> is either 1) a file with all the article titles (every row is 
@@ -181,8 +539,16 @@ def scrape_article(argv=sys.argv[1:]):
     Options: 
         --no-bots                   Bots are ignored 
         --no-unregistered           Unregistered users (with just an IP address) are ignored
+        --cache-dir dir             Responses are cached in the given directory and reused on later runs (Default: no cache)
+        --cache-only                Only use the cached responses, nothing is downloaded (requires --cache-dir)
         -a, --attempts attempts     Number of attempts to scrape the sites. In case of 'no', unlimited. (Default: 5)
-        -o, --output output         Output is stored in given file (Default: standard out)
+        -c, --concurrency concurrency   Number of pages scraped at the same time (Default: 1)
+        -m, --metrics metrics       Request metrics are written to the given file, as JSON when it ends with .json, otherwise in the Prometheus text format
+        -p, --profile report        The time spent per stage (fetch, decode, walk, write, statistics) is written to the given file
+        --profile-detail            The profile report contains a cProfile and the peak memory per stage as well (requires --profile)
+        -o, --output output         Output is stored in given file, compressed when it ends with .gz or .zst (Default: standard out)
+        -f, --format format         Format of the output: tsv or parquet (requires --output) (Default: tsv)
+        -r, --rate rate             Maximum number of requests per second per host (Default: 10 for the MediaWiki API, 2 for XTools)
         -t, --top top               Top number of users (by number of edits) scraped (Default: 10000)
         -h, --help                  This help text
         -v, --verbose               Verbose
@@ -191,6 +557,8 @@ def scrape_article(argv=sys.argv[1:]):
         # process the arguments
     arguments = docopt.docopt(scrape_article.__doc__, argv, version=__version__)
 
+    setup_profiler(arguments)
+
     # get a list of all articles that need to be scraped 
     if os.path.isfile(arguments['<articles>']): # in case a file is passed as first argument
         list_of_articles = read_list_from_file(arguments['<articles>'])
@@ -199,24 +567,31 @@ def scrape_article(argv=sys.argv[1:]):
   
     top = 10000 if arguments['--top'] == None else int(arguments['--top'])
 
+    output = get_output(arguments, ARTICLE_EDITOR_COLUMNS)
+
     scrape_list_articles_for_users(
                 list_of_articles,
-                output=get_outputfile(arguments['--output']),
+                output=output,
                 max_attempts=get_max_attempts( arguments['--attempts'] ),
                 header=True,
                 top=top,
                 no_bots=arguments['--no-bots'],
                 no_unregistered=arguments['--no-unregistered'],
-                verbose=arguments['--verbose']
+                verbose=arguments['--verbose'],
+                concurrency=setup_client(arguments)
             )
 
+    close_output(output)
+    dump_metrics(arguments)
+    write_profile(arguments)
+
 def scrape_user(argv=sys.argv[1:]):
     """
     Gets a list of articles that were edited the most for every user in the 
     given list. 
 
     Usage:
-        wikiscrape_user [-a attempts] [-o output] [-h] [-v] [-V] <users>
+        wikiscrape_user [-a attempts] [-c concurrency] [-o output] [-f format] [-r rate] [--cache-dir dir] [--cache-only] [-m metrics] [-p report [--profile-detail]] [-h] [-v] [-V] <users>
 
     where 
         <users> is either 1) a file with all the usernames (every row is 
@@ -229,8 +604,16 @@ def scrape_user(argv=sys.argv[1:]):
             wikiscrape_user "Sizeofint" 
 
     Options: 
+        --cache-dir dir             Responses are cached in the given directory and reused on later runs (Default: no cache)
+        --cache-only                Only use the cached responses, nothing is downloaded (requires --cache-dir)
         -a, --attempts attempts     Number of attempts to scrape the sites. In case of 'no', unlimited. (Default: 5)
-        -o, --output output         Output is stored in given file (Default: standard out)
+        -c, --concurrency concurrency   Number of pages scraped at the same time (Default: 1)
+        -m, --metrics metrics       Request metrics are written to the given file, as JSON when it ends with .json, otherwise in the Prometheus text format
+        -p, --profile report        The time spent per stage (fetch, decode, walk, write, statistics) is written to the given file
+        --profile-detail            The profile report contains a cProfile and the peak memory per stage as well (requires --profile)
+        -o, --output output         Output is stored in given file, compressed when it ends with .gz or .zst (Default: standard out)
+        -f, --format format         Format of the output: tsv or parquet (requires --output) (Default: tsv)
+        -r, --rate rate             Maximum number of requests per second per host (Default: 10 for the MediaWiki API, 2 for XTools)
         -h, --help                  This help text
         -v, --verbose               Verbose
         -V, --version               Version information
@@ -238,16 +621,25 @@ def scrape_user(argv=sys.argv[1:]):
     # process the arguments
     arguments = docopt.docopt(scrape_user.__doc__, argv, version=__version__)
 
+    setup_profiler(arguments)
+
     # get a list of all users that need to be scraped 
     if os.path.isfile(arguments['<users>']): # in case a file is passed as first argument
         list_of_users = read_list_from_file(arguments['<users>'])
     else: # just one user given
         list_of_users = [arguments['<users>']]
       
+    output = get_output(arguments, USER_TOP_EDIT_COLUMNS)
+
     scrape_list_users_for_articles(
                 list_of_users,
-                output=get_outputfile(arguments['--output']),
+                output=output,
                 max_attempts=get_max_attempts( arguments['--attempts'] ),
                 header=True,
-                verbose=arguments['--verbose']
+                verbose=arguments['--verbose'],
+                concurrency=setup_client(arguments)
         )
+
+    close_output(output)
+    dump_metrics(arguments)
+    write_profile(arguments)
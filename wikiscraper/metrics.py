@@ -0,0 +1,214 @@
+import json
+import bisect
+import threading
+
+"""
+	Request-level metrics: counters and latency histograms, kept in a
+	registry that can be dumped as JSON or in the Prometheus text format.
+	All the scrape functions record into the default registry (REGISTRY).
+"""
+
+# default buckets (in seconds) for the latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10., 30., 60., 120.)
+
+# reasons why scraping a page failed (next to the reasons of a FetchError)
+MISSING_MARKER  = 'missing_marker'  # the start of the table (e.g., 'Added (Bytes)') was not found
+TRUNCATED_TABLE = 'truncated_table' # the page ended in the middle of the table
+PARSE_ERROR     = 'parse_error'     # the response could not be parsed
+
+class Counter:
+	"""
+	A counter with labels.
+	"""
+	def __init__(self, name, documentation, labelnames=()):
+		self.name          = name
+		self.documentation = documentation
+		self.labelnames    = tuple(labelnames)
+		self.values        = {}
+		self.lock          = threading.Lock()
+
+	def inc(self, amount=1, **labels):
+		key = tuple(str(labels.get(label, '')) for label in self.labelnames)
+		with self.lock:
+			self.values[key] = self.values.get(key, 0) + amount
+
+	def get(self, **labels):
+		key = tuple(str(labels.get(label, '')) for label in self.labelnames)
+		with self.lock:
+			return self.values.get(key, 0)
+
+	def samples(self):
+		with self.lock:
+			return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in sorted(self.values.items())]
+
+	def to_dict(self):
+		with self.lock:
+			return [{'labels': dict(zip(self.labelnames, key)), 'value': value} for key, value in sorted(self.values.items())]
+
+class Histogram:
+	"""
+	A histogram with labels and fixed buckets (upper bounds).
+	"""
+	def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+		self.name          = name
+		self.documentation = documentation
+		self.labelnames    = tuple(labelnames)
+		self.buckets       = tuple(sorted(buckets))
+		self.values        = {} # labels -> [bucket counts, sum, count]
+		self.lock          = threading.Lock()
+
+	def observe(self, value, **labels):
+		key = tuple(str(labels.get(label, '')) for label in self.labelnames)
+		with self.lock:
+			if key not in self.values:
+				self.values[key] = [[0] * len(self.buckets), 0., 0]
+			counts, _, _ = entry = self.values[key]
+			index = bisect.bisect_left(self.buckets, value)
+			if index < len(counts):
+				counts[index] += 1
+			entry[1] += value
+			entry[2] += 1
+
+	def samples(self):
+		samples = []
+		with self.lock:
+			for key, (counts, total, count) in sorted(self.values.items()):
+				labels     = dict(zip(self.labelnames, key))
+				cumulative = 0
+				for bound, n in zip(self.buckets, counts):
+					cumulative += n
+					samples.append((self.name + '_bucket', dict(labels, le=repr(float(bound))), cumulative))
+				samples.append((self.name + '_bucket', dict(labels, le='+Inf'), count))
+				samples.append((self.name + '_sum', labels, total))
+				samples.append((self.name + '_count', labels, count))
+		return samples
+
+	def to_dict(self):
+		with self.lock:
+			return [{'labels': dict(zip(self.labelnames, key)),
+					 'buckets': dict(zip([repr(float(bound)) for bound in self.buckets], counts)),
+					 'sum': total,
+					 'count': count} for key, (counts, total, count) in sorted(self.values.items())]
+
+class Registry:
+	"""
+	A collection of counters and histograms.
+	"""
+	def __init__(self):
+		self.metrics = {}
+		self.lock    = threading.Lock()
+
+	def register(self, metric):
+		with self.lock:
+			if metric.name in self.metrics:
+				return self.metrics[metric.name]
+			self.metrics[metric.name] = metric
+			return metric
+
+	def counter(self, name, documentation, labelnames=()):
+		return self.register(Counter(name, documentation, labelnames))
+
+	def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+		return self.register(Histogram(name, documentation, labelnames, buckets))
+
+	def to_json(self):
+		"""
+		Returns all metrics as a JSON string.
+		"""
+		with self.lock:
+			metrics = sorted(self.metrics.items())
+		return json.dumps(dict((name, metric.to_dict()) for name, metric in metrics), indent=2)
+
+	def to_prometheus(self):
+		"""
+		Returns all metrics in the Prometheus text exposition format.
+		"""
+		with self.lock:
+			metrics = sorted(self.metrics.items())
+		lines = []
+		for name, metric in metrics:
+			lines.append('# HELP %s %s'%(name, metric.documentation))
+			lines.append('# TYPE %s %s'%(name, 'counter' if isinstance(metric, Counter) else 'histogram'))
+			for sample_name, labels, value in metric.samples():
+				if labels:
+					label_text = ','.join('%s="%s"'%(label, escape_label(value_)) for label, value_ in sorted(labels.items()))
+					lines.append('%s{%s} %s'%(sample_name, label_text, format_value(value)))
+				else:
+					lines.append('%s %s'%(sample_name, format_value(value)))
+		return '\n'.join(lines) + '\n'
+
+	def dump(self, filename):
+		"""
+		Writes all metrics to the file; as JSON when the filename ends with '.json',
+		otherwise in the Prometheus text format.
+		"""
+		with open(filename, 'w') as outputfile:
+			if filename.endswith('.json'):
+				outputfile.write(self.to_json())
+			else:
+				outputfile.write(self.to_prometheus())
+
+def escape_label(value):
+	return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_value(value):
+	if isinstance(value, float):
+		return repr(value)
+	return str(value)
+
+def get_status_class(status):
+	"""
+	Returns the class of an HTTP status code, e.g., '2xx'.
+	"""
+	return '%dxx'%(status // 100)
+
+# the default registry and the metrics recorded by the package
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter('wikiscraper_requests_total',
+	'Number of HTTP requests per host and status class (or error reason).', ('host', 'status'))
+RESPONSE_BYTES = REGISTRY.counter('wikiscraper_response_bytes_total',
+	'Number of bytes received per host.', ('host',))
+REQUEST_LATENCY = REGISTRY.histogram('wikiscraper_request_duration_seconds',
+	'Latency of the HTTP requests per host.', ('host',))
+CACHE_HITS = REGISTRY.counter('wikiscraper_cache_hits_total',
+	'Number of pages served from the on-disk cache per host.', ('host',))
+PARSE_TIME = REGISTRY.histogram('wikiscraper_parse_duration_seconds',
+	'Time spent parsing a page per stage.', ('stage',))
+ROWS = REGISTRY.counter('wikiscraper_rows_total',
+	'Number of rows emitted per stage.', ('stage',))
+FAILURES = REGISTRY.counter('wikiscraper_failures_total',
+	'Number of pages that could not be scraped per stage and reason.', ('stage', 'reason'))
+RETRIES = REGISTRY.counter('wikiscraper_retries_total',
+	'Number of retries per stage and reason of the failure.', ('stage', 'reason'))
+GIVEN_UP = REGISTRY.counter('wikiscraper_given_up_total',
+	'Number of items that ran out of attempts per stage.', ('stage',))
+
+_last_failure = threading.local()
+
+def record_failure(stage, reason, retry_after=None):
+	"""
+	Records that scraping a page failed; the reason (and the number of seconds the
+	server asked to wait, if any) is remembered (per thread), so that the crawler
+	can label and schedule the retry with it (see last_failure).
+	"""
+	FAILURES.inc(stage=stage, reason=reason)
+	_last_failure.reason      = reason
+	_last_failure.retry_after = retry_after
+
+def last_failure():
+	"""
+	Returns the reason and the Retry-After (None when not given) of the last failure
+	recorded in this thread and forgets them.
+	"""
+	reason      = getattr(_last_failure, 'reason', None)
+	retry_after = getattr(_last_failure, 'retry_after', None)
+	_last_failure.reason      = None
+	_last_failure.retry_after = None
+	return (reason if reason is not None else 'unknown'), retry_after
+
+def last_failure_reason():
+	"""
+	Returns the reason of the last failure recorded in this thread and forgets it.
+	"""
+	return last_failure()[0]
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+try: # optional, only needed to export the network (see get_graph)
+	import networkx as nx
+except ImportError:
+	nx = None
+
+"""
+	Co-contribution networks of the articles: two articles are connected when
+	users contributed to both of them, the weight of the edge is the number of
+	those users. The contributions (user, title) are turned into a sparse
+	user x article incidence matrix B; the weights of all the edges at once are
+	the off-diagonal elements of the sparse product B^T B, on which the
+	thresholds are applied before the network is exported to networkx.
+"""
+
+def check_networkx():
+	if nx is None:
+		raise ImportError("Exporting the network requires networkx (pip install networkx)")
+
+def get_incidence_matrix(users, titles, articles=None):
+	"""
+	Returns the sparse user x article incidence matrix of the contributions: element
+	(i, j) is 1 when user i contributed to article j (a user that contributed more
+	than once to an article, counts once).
+
+	Args:
+		users    - array with the user of every contribution
+		titles   - array with the title of the article of every contribution
+		articles - the articles (columns) of the matrix; contributions to other articles
+		           are left out (Default: all the articles in titles)
+
+	Returns:
+		matrix   - the incidence matrix (scipy.sparse CSC, int32)
+		articles - array with the article of every column
+	"""
+	user_ids, _ = pd.factorize(np.asarray(users, dtype=object))
+	if articles is None:
+		article_ids, articles = pd.factorize(np.asarray(titles, dtype=object))
+	else:
+		articles    = pd.Index(articles, dtype=object).unique()
+		article_ids = articles.get_indexer(np.asarray(titles, dtype=object))
+	keep = (user_ids >= 0) & (article_ids >= 0) # no missing users/titles, only the given articles
+	user_ids, article_ids = user_ids[keep], article_ids[keep]
+
+	n_users = int(user_ids.max()) + 1 if len(user_ids) > 0 else 0
+	matrix  = sparse.coo_matrix((np.ones(len(user_ids), dtype=np.int32), (user_ids, article_ids)), shape=(n_users, len(articles))).tocsc()
+	matrix.data[:] = 1 # duplicates were summed
+	return matrix, np.asarray(articles, dtype=object)
+
+def get_weights(matrix, min_weight=0):
+	"""
+	Returns the weights of the edges between the articles (the columns of the
+	incidence matrix): the number of users that contributed to both articles. Only
+	the edges with at least min_weight users (and at least one) are kept.
+
+	Returns:
+		sparse upper triangular matrix (scipy.sparse COO) with the weight of the edge
+		between the articles i < j at (i, j)
+	"""
+	weights = sparse.triu(matrix.T.tocsr().dot(matrix), k=1, format='coo')
+	keep    = weights.data >= max(min_weight, 1)
+	return sparse.coo_matrix((weights.data[keep], (weights.row[keep], weights.col[keep])), shape=weights.shape)
+
+def build_network(users, titles, articles=None, min_weight=0, min_users=0):
+	"""
+	Builds the co-contribution network of the articles.
+
+	Example:
+
+		df = pd.read_table('top_edits.csv', sep='\\t')
+		articles, weights = build_network(df.user, df.title, min_weight=3)
+		G = get_graph(articles, weights)
+
+	Args:
+		users      - array with the user of every contribution
+		titles     - array with the title of the article of every contribution
+		articles   - the articles that are nodes of the network (Default: all the articles in titles)
+		min_weight - minimal weight of the edges (Default: no minimum)
+		min_users  - minimal number of users that contributed to an article for it to be a node (Default: no minimum)
+
+	Returns:
+		articles - array with the articles (the nodes)
+		weights  - the weights of the edges between the articles (see get_weights)
+	"""
+	matrix, articles = get_incidence_matrix(users, titles, articles=articles)
+	if min_users > 0:
+		n_users  = np.diff(matrix.indptr) # number of users per article (column)
+		matrix   = matrix[:, n_users >= min_users]
+		articles = articles[n_users >= min_users]
+	return articles, get_weights(matrix, min_weight=min_weight)
+
+def to_native(value):
+	"""
+	Returns the NumPy scalar as a Python scalar (networkx writes only those to GEXF).
+	"""
+	return value.item() if isinstance(value, np.generic) else value
+
+def get_graph(articles, weights, attributes=None):
+	"""
+	Returns the network as a networkx graph: the articles are the nodes (also the ones
+	without edges), the edges have the attribute weight.
+
+	Args:
+		articles   - array with the articles (see build_network)
+		weights    - the weights of the edges (see build_network)
+		attributes - data frame indexed by title; its columns are added to the nodes
+		             as attributes (Default: none)
+	"""
+	check_networkx()
+	G = nx.Graph()
+	if attributes is None:
+		G.add_nodes_from(articles)
+	else:
+		attributes = attributes.reindex(articles)
+		G.add_nodes_from((article, {column: to_native(value) for column, value in row.items()})
+							for article, row in zip(articles, attributes.to_dict('records')))
+	G.add_weighted_edges_from(zip(articles[weights.row], articles[weights.col], weights.data.tolist()))
+	return G
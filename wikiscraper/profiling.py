@@ -0,0 +1,256 @@
+import io
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+
+"""
+	Built-in profiling of the scrape pipeline. The code is divided into
+	stages (fetch, decode, walk, write, statistics); when profiling is
+	enabled, the wall-clock time spent in every stage is recorded and,
+	optionally, a cProfile and the peak memory (tracemalloc) per stage.
+	Time spent in a nested stage is not counted for the enclosing one.
+	When profiling is disabled, entering a stage costs next to nothing.
+"""
+
+FETCH      = 'fetch'      # downloading the page
+DECODE     = 'decode'     # BeautifulSoup decoding/parsing of the page
+WALK       = 'walk'       # walking through the lines/rows of the page
+WRITE      = 'write'      # writing the output
+STATISTICS = 'statistics' # statistical tests
+
+# the peak of tracemalloc can only be reset as of Python 3.9; before that, the memory
+# at the end of a stage is recorded instead (a lower bound on its peak)
+RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+def get_peak_memory():
+	"""
+	Returns the peak of the traced memory since the last reset_peak_memory (or, before
+	Python 3.9, the traced memory now).
+	"""
+	current, peak = tracemalloc.get_traced_memory()
+	return peak if RESET_PEAK else current
+
+def reset_peak_memory():
+	if RESET_PEAK:
+		tracemalloc.reset_peak()
+
+class NullStage:
+	"""
+	The stage that is used when profiling is disabled.
+	"""
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+NULL_STAGE = NullStage()
+
+class Frame:
+	"""
+	A stage that is currently running in some thread.
+	"""
+	def __init__(self, name):
+		self.name          = name
+		self.start         = time.perf_counter()
+		self.child_time    = 0.
+		self.start_memory  = 0
+		self.peak_memory   = 0
+
+class Stage:
+	"""
+	Context manager that records the time spent in a stage.
+	"""
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name     = name
+
+	def __enter__(self):
+		self.profiler.enter(self.name)
+		return self
+
+	def __exit__(self, *exc_info):
+		self.profiler.exit()
+		return False
+
+class Profiler:
+	"""
+	Records the time (and optionally a cProfile and peak memory) per stage.
+	Thread-safe; cProfile is only collected in the main thread.
+	"""
+	def __init__(self):
+		self.enabled  = False
+		self.detailed = False
+		self.lock     = threading.Lock()
+		self.local    = threading.local()
+		self.reset()
+
+	def reset(self):
+		"""
+		Forgets everything that was recorded.
+		"""
+		with self.lock:
+			self.wall_time   = {} # stage -> seconds (exclusive)
+			self.calls       = {} # stage -> number of times the stage was entered
+			self.peak_memory = {} # stage -> bytes
+			self.profiles    = {} # stage -> cProfile.Profile
+			self.started     = time.perf_counter()
+
+	def enable(self, detailed=False):
+		"""
+		Enables profiling; when detailed is True, a cProfile and the peak memory
+		are recorded per stage as well.
+		"""
+		self.reset()
+		self.enabled  = True
+		self.detailed = detailed
+		if detailed and not tracemalloc.is_tracing():
+			tracemalloc.start()
+
+	def disable(self):
+		"""
+		Disables profiling (what was recorded is kept).
+		"""
+		self.enabled = False
+		if self.detailed and tracemalloc.is_tracing():
+			tracemalloc.stop()
+
+	def stage(self, name):
+		"""
+		Returns a context manager for the stage with the given name.
+		"""
+		if not self.enabled:
+			return NULL_STAGE
+		return Stage(self, name)
+
+	def stack(self):
+		if not hasattr(self.local, 'stack'):
+			self.local.stack = []
+		return self.local.stack
+
+	def use_cprofile(self):
+		return self.detailed and threading.current_thread() is threading.main_thread()
+
+	def enter(self, name):
+		stack  = self.stack()
+		parent = stack[-1] if stack else None
+		frame  = Frame(name)
+
+		if self.use_cprofile():
+			if parent is not None:
+				self.profile(parent.name).disable()
+			self.profile(name).enable()
+
+		if self.detailed and tracemalloc.is_tracing():
+			current, peak = tracemalloc.get_traced_memory()[0], get_peak_memory()
+			if parent is not None:
+				parent.peak_memory = max(parent.peak_memory, peak)
+			reset_peak_memory()
+			frame.start_memory = frame.peak_memory = current
+
+		frame.start = time.perf_counter()
+		stack.append(frame)
+
+	def exit(self):
+		stack   = self.stack()
+		frame   = stack.pop()
+		elapsed = time.perf_counter() - frame.start
+		parent  = stack[-1] if stack else None
+
+		if self.use_cprofile():
+			self.profile(frame.name).disable()
+			if parent is not None:
+				self.profile(parent.name).enable()
+
+		if self.detailed and tracemalloc.is_tracing():
+			frame.peak_memory = max(frame.peak_memory, get_peak_memory())
+			if parent is not None:
+				parent.peak_memory = max(parent.peak_memory, frame.peak_memory)
+
+		with self.lock:
+			self.wall_time[frame.name] = self.wall_time.get(frame.name, 0.) + elapsed - frame.child_time
+			self.calls[frame.name]     = self.calls.get(frame.name, 0) + 1
+			if self.detailed:
+				self.peak_memory[frame.name] = max(self.peak_memory.get(frame.name, 0), frame.peak_memory - frame.start_memory)
+
+		if parent is not None:
+			parent.child_time += elapsed
+
+	def profile(self, name):
+		with self.lock:
+			if name not in self.profiles:
+				self.profiles[name] = cProfile.Profile()
+			return self.profiles[name]
+
+	def report(self, n_functions=25):
+		"""
+		Returns the report as a string: the time per stage and, when detailed, the
+		peak memory per stage and the functions that took most time per stage.
+		"""
+		with self.lock:
+			total = time.perf_counter() - self.started
+			lines = ['%-12s %10s %12s %8s %14s'%('stage', 'calls', 'wall (s)', 'share', 'peak mem (MB)')]
+			for name, wall_time in sorted(self.wall_time.items(), key=lambda item: -item[1]):
+				peak = '%.1f'%(self.peak_memory[name] / 1024.**2) if name in self.peak_memory else '-'
+				lines.append('%-12s %10d %12.3f %7.1f%% %14s'%(name, self.calls[name], wall_time, 100. * wall_time / total if total else 0., peak))
+			lines.append('%-12s %10s %12.3f'%('total', '', total))
+			if self.peak_memory and not RESET_PEAK:
+				lines.append('(peak mem: the memory at the end of the stage, Python 3.9 or later records the peak)')
+			profiles = sorted(self.profiles.items())
+
+		for name, profile in profiles:
+			stream = io.StringIO()
+			try:
+				pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(n_functions)
+			except TypeError: # nothing was recorded
+				continue
+			lines.append('\n\ncProfile for stage %s\n%s'%(name, '=' * (19 + len(name))))
+			lines.append(stream.getvalue())
+
+		return '\n'.join(lines) + '\n'
+
+	def write_report(self, filename):
+		"""
+		Writes the report to the given file.
+		"""
+		with open(filename, 'w') as outputfile:
+			outputfile.write(self.report())
+
+class ProfiledFile:
+	"""
+	Wraps a file object so that the time spent writing to it is recorded as the
+	write stage.
+	"""
+	def __init__(self, file, profiler):
+		self.file     = file
+		self.profiler = profiler
+
+	def write(self, data):
+		with self.profiler.stage(WRITE):
+			return self.file.write(data)
+
+	def flush(self):
+		with self.profiler.stage(WRITE):
+			return self.file.flush()
+
+	def __getattr__(self, name):
+		return getattr(self.file, name)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.file.close()
+		return False
+
+# the profiler used by the package (disabled by default)
+PROFILER = Profiler()
+
+def profile_stage(name):
+	"""
+	Returns a context manager that records the time spent in the stage with the
+	given name in the package's profiler.
+	"""
+	return PROFILER.stage(name)
@@ -0,0 +1,148 @@
+import time
+import asyncio
+import threading
+from urllib.parse import urlsplit
+
+"""
+	Token-bucket rate limiting, with a separate bucket for every host
+	(the MediaWiki API and XTools have very different budgets). The
+	limiter can be used from threads (acquire) as well as from asyncio
+	code (acquire_async).
+"""
+
+MEDIAWIKI_HOST = 'en.wikipedia.org'
+XTOOLS_HOST    = 'tools.wmflabs.org'
+
+# default budgets per host: (requests per second, burst)
+DEFAULT_BUDGETS = {
+	MEDIAWIKI_HOST: (10., 20),
+	XTOOLS_HOST:    (2., 4),
+}
+
+class TokenBucket:
+	"""
+	A token bucket that is refilled with <rate> tokens per second and holds at
+	most <burst> tokens. Every request takes one token; when the bucket is empty
+	the caller waits until the next token is available. Thread-safe.
+
+	Args:
+		rate  - number of requests per second (None or 0 means unlimited)
+		burst - maximum number of requests that can be done in a row without
+		        waiting (Default: 1)
+	"""
+	def __init__(self, rate, burst=1):
+		self.rate   = rate
+		self.burst  = max(1, burst)
+		self.tokens = float(self.burst)
+		self.last   = time.monotonic()
+		self.lock   = threading.Lock()
+
+		self.paused_until = 0. # no requests before this time (see pause)
+
+	def reserve(self, tokens=1):
+		"""
+		Takes the tokens from the bucket and returns the number of seconds the
+		caller has to wait before it may make the request.
+		"""
+		with self.lock:
+			now   = time.monotonic()
+			pause = max(0., self.paused_until - now)
+			if not self.rate:
+				return pause
+			self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+			self.last   = now
+			self.tokens -= tokens # may become negative; the debt is paid by waiting
+			if self.tokens >= 0:
+				return pause
+			return max(pause, -self.tokens / self.rate)
+
+	def pause(self, seconds):
+		"""
+		Empties the bucket so that no request is made during the given number of
+		seconds (e.g., when the server asked us to back off).
+		"""
+		with self.lock:
+			self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+	def acquire(self, tokens=1):
+		"""
+		Blocks until a request may be made.
+		"""
+		wait = self.reserve(tokens)
+		if wait > 0:
+			time.sleep(wait)
+
+	async def acquire_async(self, tokens=1):
+		"""
+		Waits (without blocking the event loop) until a request may be made.
+		"""
+		wait = self.reserve(tokens)
+		if wait > 0:
+			await asyncio.sleep(wait)
+
+def get_throttle(rate=None, burst=1, sleep=None):
+	"""
+	Returns the token bucket that throttles the requests of a scraper script
+	(see the options --rate, --burst and --sleep of the scripts in bin/).
+
+	Args:
+		rate  - maximum number of requests per second (Default: None)
+		burst - number of requests that can be made in a row before the rate
+		        applies (Default: 1)
+		sleep - minimal time in seconds between two requests; superseded by
+		        rate (Default: None)
+
+	Returns:
+		a TokenBucket (unlimited when neither rate nor sleep is given)
+	"""
+	if rate is not None:
+		return TokenBucket(rate, burst=burst)
+	if sleep is not None: # at most one page every <sleep> seconds
+		return TokenBucket(1. / sleep, burst=1)
+	return TokenBucket(None) # no limit
+
+class RateLimiter:
+	"""
+	Keeps a token bucket for every host.
+
+	Args:
+		budgets - dictionary mapping a host to a tuple (requests per second, burst)
+		          (Default: DEFAULT_BUDGETS)
+		default - (requests per second, burst) for all other hosts (Default: unlimited)
+	"""
+	def __init__(self, budgets=None, default=(None, 1)):
+		self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+		self.default = default
+		self.buckets = {}
+		self.lock    = threading.Lock()
+
+	def bucket(self, url):
+		"""
+		Returns the token bucket for the host of the given url.
+		"""
+		host = urlsplit(url).hostname or url
+		with self.lock:
+			if host not in self.buckets:
+				rate, burst = self.budgets.get(host, self.default)
+				self.buckets[host] = TokenBucket(rate, burst=burst)
+			return self.buckets[host]
+
+	def set_budget(self, host, rate, burst=1):
+		"""
+		Sets the number of requests per second and the burst for the given host.
+		"""
+		with self.lock:
+			self.budgets[host] = (rate, burst)
+			self.buckets.pop(host, None)
+
+	def acquire(self, url):
+		"""
+		Blocks until a request to the given url may be made.
+		"""
+		self.bucket(url).acquire()
+
+	async def acquire_async(self, url):
+		"""
+		Waits until a request to the given url may be made.
+		"""
+		await self.bucket(url).acquire_async()
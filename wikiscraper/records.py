@@ -0,0 +1,56 @@
+from collections import namedtuple
+from datetime import datetime
+
+"""
+	The records that are produced by the scrape functions (see the iter_*
+	functions in scrape.py). The counts are integers; the dates are kept as
+	they appear on the XTools pages (they are checked, see check_timestamp).
+"""
+
+# a user that edited an article (a row of the top editors on an articleinfo page)
+ArticleEditor = namedtuple('ArticleEditor', ['title', 'user', 'n_edits', 'n_minor_edits', 'first_edit', 'last_edit', 'added_bytes'])
+
+# an article that a user edited (a row of the top edits on a topedits page)
+UserTopEdit = namedtuple('UserTopEdit', ['user', 'title', 'n_edits'])
+
+# columns (and headers) of the tab-delimited output
+ARTICLE_EDITOR_COLUMNS = ('name', 'user', 'n_edits', 'n_minor_edits', 'first_edit', 'last_edit', 'added_bytes')
+USER_TOP_EDIT_COLUMNS  = ('user', 'title', 'n_edits')
+ARTICLE_EDITOR_HEADER  = '\t'.join(ARTICLE_EDITOR_COLUMNS)
+USER_TOP_EDIT_HEADER   = '\t'.join(USER_TOP_EDIT_COLUMNS)
+
+# formats of the dates on the XTools pages (the first one is the one of the articleinfo pages)
+TIMESTAMP_FORMATS = ('%Y-%m-%d, %H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M, %d %B %Y')
+
+def parse_count(text):
+	"""
+	Converts a count as it appears on the XTools pages (e.g., '1,234') to an integer.
+	"""
+	return int(text.replace(',', '').strip())
+
+def parse_timestamp(text):
+	"""
+	Converts a date as it appears on the XTools pages (e.g., '2016-07-18, 13:37')
+	to a datetime; None or an empty date gives None. Raises a ValueError when the
+	date is not in one of the TIMESTAMP_FORMATS.
+	"""
+	if isinstance(text, datetime) or text is None:
+		return text
+	text = text.strip()
+	if text == '':
+		return None
+	for timestamp_format in TIMESTAMP_FORMATS:
+		try:
+			return datetime.strptime(text, timestamp_format)
+		except ValueError:
+			pass
+	raise ValueError("Unknown date format: '%s'"%text)
+
+def check_timestamp(text):
+	"""
+	Returns the date as it is, after checking that it can be read (see
+	parse_timestamp), so that a page with dates in an unknown format fails when
+	it is scraped rather than ending up as missing values in the output.
+	"""
+	parse_timestamp(text)
+	return text
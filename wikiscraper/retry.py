@@ -0,0 +1,146 @@
+import time
+import heapq
+import random
+
+"""
+	Retry scheduling for the crawlers. Items that failed are put back on a
+	priority queue keyed by the time they may be tried again (exponential
+	backoff with jitter), so that a transient failure never triggers a new
+	pass over the whole list and successfully scraped items are never
+	visited again.
+"""
+
+DEFAULT_BASE_DELAY = 2.   # seconds before the first retry
+DEFAULT_MAX_DELAY  = 300. # maximum number of seconds between two attempts
+DEFAULT_JITTER     = 0.5  # fraction of the delay that is randomized
+
+def get_backoff(n_attempt, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, jitter=DEFAULT_JITTER):
+	"""
+	Returns the number of seconds to wait after the given number of failed attempts:
+	base_delay * 2^(n_attempt - 1), capped at max_delay, of which a random fraction
+	(at most jitter) is taken off so that retries of many items are spread out.
+	"""
+	delay = min(max_delay, base_delay * 2 ** min(n_attempt - 1, 64))
+	return delay * (1. - jitter * random.random())
+
+class RetryScheduler:
+	"""
+	Hands out the items of a list one at a time; failed items come back after a
+	backoff until their attempts are used up.
+
+	Args:
+		items        - list of items (article titles or usernames)
+		max_attempts - maximum number of attempts per item (may be float('inf')) (Default: 5)
+		base_delay   - seconds before the first retry (Default: 2)
+		max_delay    - maximum number of seconds between two attempts (Default: 300)
+		jitter       - fraction of the delay that is randomized (Default: 0.5)
+
+	Example:
+
+		scheduler = RetryScheduler(list_of_articles)
+		for index, title in scheduler:
+			if scrape(title) == SCRAPING_SUCCESSFULL:
+				scheduler.success(index)
+			else:
+				scheduler.failure(index)
+	"""
+	def __init__(self, items, max_attempts=5, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, jitter=DEFAULT_JITTER):
+		self.items        = list(items)
+		self.max_attempts = max_attempts
+		self.base_delay   = base_delay
+		self.max_delay    = max_delay
+		self.jitter       = jitter
+
+		self.attempts  = [0] * len(self.items)
+		self.succeeded = set()
+		self.failed    = set() # items whose attempts are used up
+		self.active    = set() # items that were handed out and not reported yet
+
+		# the first attempt of every item is immediately eligible (in the order of the list)
+		self.queue = [(0., index) for index in range(len(self.items))]
+
+	def __len__(self):
+		"""
+		Number of items that are not finished yet.
+		"""
+		return len(self.queue) + len(self.active)
+
+	def __iter__(self):
+		while True:
+			entry = self.next()
+			if entry is None:
+				return
+			yield entry
+
+	def backoff(self, index):
+		"""
+		Returns the number of seconds before the item may be tried again.
+		"""
+		return get_backoff(self.attempts[index], base_delay=self.base_delay, max_delay=self.max_delay, jitter=self.jitter)
+
+	def wait_time(self, now=None):
+		"""
+		Returns the number of seconds until the next item becomes eligible (0 when
+		one is eligible already, None when the queue is empty).
+		"""
+		if not self.queue:
+			return None
+		now = time.monotonic() if now is None else now
+		return max(0., self.queue[0][0] - now)
+
+	def pop(self, now=None):
+		"""
+		Returns the next eligible item as a tuple (index, item) without waiting, or
+		None when no item is eligible at the moment.
+		"""
+		if self.wait_time(now) != 0.:
+			return None
+		_, index = heapq.heappop(self.queue)
+		self.active.add(index)
+		return index, self.items[index]
+
+	def next(self):
+		"""
+		Returns the next item as a tuple (index, item), sleeping until it is eligible.
+		Returns None when all items are finished (or handed out).
+		"""
+		wait = self.wait_time()
+		if wait is None:
+			return None
+		if wait > 0:
+			time.sleep(wait)
+		return self.pop()
+
+	def success(self, index):
+		"""
+		Reports that the item was scraped successfully; it is never handed out again.
+		"""
+		self.active.discard(index)
+		self.attempts[index] += 1
+		self.succeeded.add(index)
+
+	def failure(self, index, delay=None, retryable=True):
+		"""
+		Reports that the attempt failed. When the item has attempts left, it is put
+		back on the queue after a backoff (or the given delay, e.g., a Retry-After).
+		When the failure is not retryable (e.g., the page does not exist), the item
+		is given up at once.
+
+		Returns:
+			True when the item will be retried, otherwise False
+		"""
+		self.active.discard(index)
+		self.attempts[index] += 1
+		if not retryable or self.attempts[index] >= self.max_attempts:
+			self.failed.add(index)
+			return False
+		if delay is None:
+			delay = self.backoff(index)
+		heapq.heappush(self.queue, (time.monotonic() + delay, index))
+		return True
+
+	def failed_items(self):
+		"""
+		Returns the items whose attempts were used up (in the order of the list).
+		"""
+		return [self.items[index] for index in sorted(self.failed)]
@@ -2,15 +2,30 @@ from __future__ import print_function
 import sys
 import os
 import math
+import time
 import pandas as pd 
 from pandas import DataFrame
 from pandas import Series
+from urllib.parse import quote, urlencode
 
 from .helper import * 
+from .engine import crawl, map_in_order, DEFAULT_CONCURRENCY
+from .retry import RetryScheduler, get_backoff
+from .client import get_failure_reason, is_retryable
+from .records import ArticleEditor, UserTopEdit, ARTICLE_EDITOR_COLUMNS, USER_TOP_EDIT_COLUMNS, parse_count, check_timestamp
+from .writer import TSVWriter, get_writer
+from .community import CommunityIndex
+from .xtools import stream_article_editors, stream_user_top_edits, TableNotFound, TruncatedTable
+from .metrics import record_failure, last_failure, PARSE_TIME, ROWS, RETRIES, GIVEN_UP, MISSING_MARKER, TRUNCATED_TABLE, PARSE_ERROR
 
 SCRAPING_SUCCESSFULL = 1 # flag for when scraping was successful 
 SCRAPING_FAILED      = 0 # flag for when scraping failed 
 
+MAX_TITLES_PER_QUERY = 50 # maximum number of titles in a single MediaWiki API query
+MAX_API_ATTEMPTS     = 5  # maximum number of attempts per response of a (continued) MediaWiki API query
+
+BROKEN_PAGE_REASONS = (MISSING_MARKER, TRUNCATED_TABLE, PARSE_ERROR) # the page itself is broken (rather than the download)
+
 def skip(list, current_index, increase_index):
 	"""
 	Increases the current index with a specific number of steps
@@ -24,118 +39,555 @@ def skip(list, current_index, increase_index):
 
 
 
-def get_number_registered_users(): 
+def get_number_registered_users(client=None): 
 	"""
-	Gets the total number of registered users (no bots and no IP addresses) for 
-	the English Wikipedia from the url https://en.wikipedia.org/wiki/Special:Statistics
+	Gets the total number of registered users for the English Wikipedia from the 
+	statistics of the MediaWiki API (meta=siteinfo, siprop=statistics); the same 
+	number as on https://en.wikipedia.org/wiki/Special:Statistics
+
+	Args:
+		client - the HTTPClient used for scraping (Default: the client owned by the package)
 
 	Returns:
 		# of registered English wikipedia users
 	"""
-	# the url to be scraped
-	url = "https://en.wikipedia.org/wiki/Special:Statistics"
+	# the url of the query
+	url = "https://en.wikipedia.org/w/api.php?action=query&meta=siteinfo&siprop=statistics&format=json"
 
-	# scrape the url
+	# query the statistics
 	try: 
-		raw_data = read_in_data_from_url(url, headers=False, json=False)
-	except: 
+		raw_data = read_in_json_from_url(url, headers=False, client=client)
+		n_registered_users = int(raw_data['query']['statistics']['users'])
+	except Exception as error: 
+		record_failure('statistics', get_failure_reason(error))
 		return SCRAPING_FAILED
 
-	n_registered_users = find_between(raw_data, "Registered users", "Active registered users")
-	n_registered_users = int( n_registered_users.strip().replace(',', '') )
-
 	return n_registered_users
 
+def iter_api_query(url, client=None, max_attempts=MAX_API_ATTEMPTS): 
+	"""
+	Yields the responses of a MediaWiki API query one at a time. As long as the 
+	response contains a 'continue' block, the query is repeated with the 
+	continuation parameters, so that nothing is lost when the result does not fit 
+	in a single response. Only one response is kept in memory at a time. A request 
+	that fails is retried (after a backoff, or the Retry-After of the response) with 
+	the same continuation parameters, so that the responses before it are never 
+	requested again; the error of the last attempt is raised. 
+
+	Args: 
+		url          - the url of the query (format=json)
+		client       - the HTTPClient used for scraping (Default: the client owned by the package)
+		max_attempts - maximum number of attempts per response (Default: 5)
+	"""
+	continue_params = {'continue': ''}
+	while True: 
+		n_attempt = 0
+		while True: 
+			n_attempt += 1
+			try: 
+				raw_data = read_in_json_from_url('%s&%s'%(url, urlencode(continue_params, quote_via=quote)), headers=False, client=client)
+				break
+			except Exception as error: 
+				if n_attempt >= max_attempts or not is_retryable(get_failure_reason(error)): 
+					raise
+				retry_after = getattr(error, 'retry_after', None)
+				time.sleep(get_backoff(n_attempt) if retry_after is None else retry_after)
+		yield raw_data
+		if 'continue' not in raw_data: 
+			break
+		continue_params = raw_data['continue']
+
+def iter_api_pages(list_of_titles, url, field, format_value, client=None): 
+	"""
+	Yields, for every response of the (continued) MediaWiki API query, the list of 
+	tuples (page_id, title, value) for every value of the given field (e.g., 
+	'categories') of every page in the response. The title is the title as it 
+	appears in list_of_titles. 
+
+	Args: 
+		list_of_titles - the titles that are queried
+		url            - the url of the query
+		field          - the property of the pages that is reported
+		format_value   - function that turns a single value into a string
+		client         - the HTTPClient used for scraping (Default: the client owned by the package)
+	"""
+	resolved = {}
+	for raw_data in iter_api_query(url, client=client): 
+		resolved.update(map_pages_to_titles(raw_data, list_of_titles))
+
+		rows = []
+		for page_id, page in raw_data['query']['pages'].items(): 
+			if field not in page: 
+				continue
+			for original_title in resolved.get(page['title'], [page['title']]): 
+				rows.extend([(page_id, original_title, format_value(value)) for value in page[field]])
+		yield rows
+
+def iter_api_rows(list_of_titles, url, field, format_value, client=None): 
+	"""
+	Yields a tuple (page_id, title, value) for every value of the given field of 
+	every page in the (continued) MediaWiki API query (see iter_api_pages). 
+	"""
+	for rows in iter_api_pages(list_of_titles, url, field, format_value, client=client): 
+		for row in rows: 
+			yield row
+
+def get_external_links_url(list_of_titles, limit='max', redirects=False): 
+	"""
+	Returns the url of the MediaWiki API query for the external links of the given 
+	titles; limit is the number of links per response. 
+	"""
+	url = "https://en.wikipedia.org/w/api.php?action=query&prop=extlinks&format=json&ellimit=%s&titles=%s"%(limit, get_titles_query(list_of_titles))
+	if redirects: 
+		url += '&redirects'
+	return url
+
+def get_categories_url(list_of_titles, limit='max', redirects=False): 
+	"""
+	Returns the url of the MediaWiki API query for the (non hidden) categories of the 
+	given titles; limit is the number of categories per response. 
+	"""
+	url = "https://en.wikipedia.org/w/api.php?action=query&prop=categories&format=json&clshow=!hidden&cllimit=%s&titles=%s"%(limit, get_titles_query(list_of_titles))
+	if redirects: 
+		url += '&redirects'
+	return url
+
+def format_external_link(extlink): 
+	return extlink['*']
 
-def scrape_article_for_external_links(article_title, file=sys.stdout, header=False): 
+def format_category(category): 
+	return category['title'][9:] # remove 'Category:'
+
+def write_api_rows(pages, file=sys.stdout, stage='api'): 
+	"""
+	Outputs the rows of iter_api_pages (tab-delimited), committed per response, so 
+	that only the rows of one response are kept in memory (besides the block of the 
+	writer), however many responses a title (or batch) needs. A failed request is 
+	retried from its continuation (see iter_api_query); when it keeps failing, the 
+	rows of the earlier responses are in the output already, and the title (or 
+	batch) is incomplete: scraping it again outputs those rows a second time. 
+
+	Args:
+		pages - the rows (page_id, title, value) per response of iter_api_pages
+		file  - the output is outputed there (Default: standard out)
+		stage - the stage for which the rows and failures are counted (Default: 'api')
+
+	Returns:
+		flag - is SCRAPING_SUCCESSFULL when successfull, otherwise SCRAPING_FAILED.
+	"""
+	writer = get_writer(file)
+	try: 
+		for rows in pages: 
+			writer.write_rows(rows)
+			ROWS.inc(len(rows), stage=stage)
+			writer.commit()
+	except Exception as error: 
+		writer.rollback()
+		record_failure(stage, get_failure_reason(error))
+		flag = SCRAPING_FAILED
+	else: 
+		flag = SCRAPING_SUCCESSFULL
+
+	if writer is not file: 
+		writer.flush()
+	return flag
+
+def scrape_article_for_external_links(article_title, file=sys.stdout, header=False, client=None, limit='max'): 
 	"""	
-	Gets the external links for a given article. The output is only
-	outputed (either to file or standard out, see option 'file') when the scraping 
-	was successfull. 
+	Gets the external links for a given article. The links are outputed (either to 
+	file or standard out, see option 'file') per response; when the article has 
+	more links than fit in one response, the query is continued (see write_api_rows). 
 
 	Args: 
 		article_title - title of the article
 		file          - the output is outputed there (Default: standard out)
 		header        - when True, the header is outputted as well (default: False)
+		client        - the HTTPClient used for scraping (Default: the client owned by the package)
+		limit         - number of links per response (Default: 'max')
 
 	Returns: 
 		flag - is SCRAPING_SUCCESSFULL when successfull, otherwise SCRAPING_FAILED.
-    """    
-	# the url to be scraped
-	url = "https://en.wikipedia.org/w/api.php?action=query&prop=extlinks&format=json&ellimit=5000&titles=%s"%(article_title.replace(' ', '%20'))
-
-    # scrape the url
-	try: 
-		raw_data = read_in_data_from_url(url, headers=False, json=True)
-	except: 
-		return SCRAPING_FAILED
-
+	"""
 	if header: 
 		print("page_id\tname\texternal_link", file=file)
 
-	# walk through all the external links
-	for page_id, page in raw_data['query']['pages'].items(): 
-		if 'extlinks' in page: # check whether there are external links
-			for extlink in page['extlinks']: 
-				# print to the output file
-				print('%s\t%s\t%s'%(page_id, article_title, extlink['*']), file=file)
-
-	return SCRAPING_SUCCESSFULL
+	url = get_external_links_url([article_title], limit=limit)
+	return write_api_rows(iter_api_pages([article_title], url, 'extlinks', format_external_link, client=client), file=file, stage='external_links')
 
-def scrape_article_for_categories(article_title, file=sys.stdout, header=False): 
+def scrape_article_for_categories(article_title, file=sys.stdout, header=False, client=None, limit='max'): 
 	"""	
-	Gets the Wikipedia categories for a given article. The output is only
-	outputed (either to file or standard out, see option 'file') when the scraping 
-	was successfull. Note: only returns the non hidden categories (hidden Wikipedia
+	Gets the Wikipedia categories for a given article. The categories are outputed 
+	(either to file or standard out, see option 'file') per response; when the 
+	article has more categories than fit in one response, the query is continued 
+	(see write_api_rows). Note: only returns the non hidden categories (hidden Wikipedia
 	related categories are ignored).
 
 	Args: 
 		article_title - title of the article
 		file          - the output is outputed there (Default: standard out)
 		header        - when True, the header is outputted as well (default: False)
+		client        - the HTTPClient used for scraping (Default: the client owned by the package)
+		limit         - number of categories per response (Default: 'max')
 
 	Returns: 
 		flag - is SCRAPING_SUCCESSFULL when successfull, otherwise SCRAPING_FAILED.
-    """
-	# the url to be scraped
-	url = "https://en.wikipedia.org/w/api.php?action=query&titles=%s&prop=categories&format=json&clshow=!hidden"%(article_title.replace(' ', '%20'))
+	"""
+	if header: 
+		print("page_id\tname\tcategory", file=file)
 
-	# scrape the url
-	try: 
-		raw_data = read_in_data_from_url(url, headers=False, json=True)
-	except:
-		return SCRAPING_FAILED
+	url = get_categories_url([article_title], limit=limit)
+	return write_api_rows(iter_api_pages([article_title], url, 'categories', format_category, client=client), file=file, stage='categories')
+
+def get_batches(list_of_titles, batch_size=MAX_TITLES_PER_QUERY): 
+	"""
+	Splits the list of titles into consecutive batches of at most batch_size titles. 
+	"""
+	for start in range(0, len(list_of_titles), batch_size): 
+		yield list_of_titles[start:start + batch_size]
+
+def get_titles_query(list_of_titles): 
+	"""
+	Returns the titles parameter for a MediaWiki API query for several titles at once. 
+	"""
+	return '|'.join(quote(title, safe='') for title in list_of_titles)
+
+def map_pages_to_titles(raw_data, list_of_titles): 
+	"""
+	Maps the titles of the pages in the response of a MediaWiki API query back to 
+	the titles as they were passed to the query. The API normalizes the titles (e.g., 
+	'mdma' becomes 'MDMA') and, when asked to, resolves redirects; both steps are 
+	reported in the response and followed here. 
+
+	Args: 
+		raw_data       - the response of the API (JSON)
+		list_of_titles - the titles that were queried
+
+	Returns: 
+		dictionary that maps the title of every page to a list of the queried titles
+	"""
+	resolved = {}
+	for title in list_of_titles: 
+		resolved.setdefault(title, []).append(title)
+
+	for step in ('normalized', 'redirects'): 
+		for entry in raw_data['query'].get(step, []): 
+			original_titles = resolved.pop(entry['from'], [entry['from']])
+			resolved.setdefault(entry['to'], []).extend(original_titles)
+
+	return resolved
 
+def scrape_articles_for_external_links(list_of_titles, file=sys.stdout, header=False, redirects=False, client=None, limit='max'): 
+	"""
+	Gets the external links for a list of articles. In contrast to calling 
+	scrape_article_for_external_links for every article, the articles are queried 
+	in batches of MAX_TITLES_PER_QUERY titles (one query per batch, continued when 
+	needed). The output is the same; the name is the title as it appears in the 
+	given list. 
+
+	Args: 
+		list_of_titles - list of article titles
+		file           - the output is outputed there (Default: standard out)
+		header         - when True, the header is outputted as well (default: False)
+		redirects      - when True, redirects are resolved (default: False)
+		client         - the HTTPClient used for scraping (Default: the client owned by the package)
+		limit          - number of links per response (Default: 'max')
+
+	Returns: 
+		list of titles that could not be (completely) scraped
+	"""
+	if header: 
+		print("page_id\tname\texternal_link", file=file)
+
+	failed = []
+	with TSVWriter(file) as writer: # the rows of all batches are written in large blocks
+		for batch in get_batches(list_of_titles): 
+			url  = get_external_links_url(batch, limit=limit, redirects=redirects)
+			flag = write_api_rows(iter_api_pages(batch, url, 'extlinks', format_external_link, client=client), file=writer, stage='external_links')
+			if flag == SCRAPING_FAILED: 
+				failed.extend(batch)
+
+	return failed
+
+def scrape_articles_for_categories(list_of_titles, file=sys.stdout, header=False, redirects=False, client=None, limit='max'): 
+	"""
+	Gets the Wikipedia categories for a list of articles. In contrast to calling 
+	scrape_article_for_categories for every article, the articles are queried 
+	in batches of MAX_TITLES_PER_QUERY titles (one query per batch, continued when 
+	needed). The output is the same; the name is the title as it appears in the 
+	given list. Note: only returns the non hidden categories. 
+
+	Args: 
+		list_of_titles - list of article titles
+		file           - the output is outputed there (Default: standard out)
+		header         - when True, the header is outputted as well (default: False)
+		redirects      - when True, redirects are resolved (default: False)
+		client         - the HTTPClient used for scraping (Default: the client owned by the package)
+		limit          - number of categories per response (Default: 'max')
+
+	Returns: 
+		list of titles that could not be (completely) scraped
+	"""
 	if header: 
 		print("page_id\tname\tcategory", file=file)
 
-	# walk through all the external links
-	for page_id, page in raw_data['query']['pages'].items(): 
-		if 'categories' in page: # check whether there are categories
-			for category in page['categories']: 
-				# print to the output file
-				print('%s\t%s\t%s'%(page_id, article_title, category['title'][9:]), file=file)
+	failed = []
+	with TSVWriter(file) as writer: # the rows of all batches are written in large blocks
+		for batch in get_batches(list_of_titles): 
+			url  = get_categories_url(batch, limit=limit, redirects=redirects)
+			flag = write_api_rows(iter_api_pages(batch, url, 'categories', format_category, client=client), file=writer, stage='categories')
+			if flag == SCRAPING_FAILED: 
+				failed.extend(batch)
+
+	return failed
+
+class ScrapeError(Exception): 
+	"""
+	Raised by the iter_* functions when a page could not be scraped. 
+
+	Attributes: 
+		key    - the article title or username
+		reason - why scraping failed (as in the metrics, e.g., 'missing_marker')
+	"""
+	def __init__(self, key, reason): 
+		Exception.__init__(self, '%s could not be scraped (%s)'%(key, reason))
+		self.key    = key
+		self.reason = reason
+
+def get_article_editors_url(article_title, top=10000): 
+	"""
+	Returns the url of the XTools page with the top editors of the given article. 
+	"""
+	return "https://tools.wmflabs.org/xtools-articleinfo/?article=%s&project=en.wikipedia.org&editorlimit=%s#topeditors"%(
+				str(article_title).replace(' ', '%20'), str(top))
+
+def get_user_top_edits_url(username): 
+	"""
+	Returns the url of the XTools page with the top edits of the given user. 
+	"""
+	return "https://tools.wmflabs.org/xtools/topedits/?user=%s&project=en.wikipedia.org&namespace=0&article="%(username.replace(' ', '%20'))
+
+def iter_editors_of_article(article_title, top=10000, no_bots=False, no_unregistered=False, client=None, stream=True): 
+	"""
+	Yields an ArticleEditor for every top editor of the given article. Raises a 
+	ScrapeError when the page could not be scraped (the failure is recorded in 
+	the metrics). 
+
+	Args: 
+		article_title   - title of the article
+		top             - top number of users scraped (Default: 10000)
+		no_bots 	    - bot users are ignored
+		no_unregistered - unregistered users are ignored
+		client          - the HTTPClient used for scraping (Default: the client owned by the package)
+		stream          - when True, the editors are yielded while the page is being downloaded, 
+		                  so part of them may have been yielded when the download fails halfway; 
+		                  the raw page is never kept as a whole (unless the client caches it), but 
+		                  the download is never shared with other threads. Otherwise, the page is 
+		                  read as a whole first and is shared with other threads that read the 
+		                  same page at the same time (Default: True)
+	"""
+	url         = get_article_editors_url(article_title, top=top)
+	stage       = 'article_users'
+	retry_after = None
+
+	try: 
+		if stream: 
+			chunks = stream_html_from_url(url, headers=True, client=client)
+		else: 
+			chunks = [read_in_html_from_url(url, headers=True, client=client)]
+
+		# the table with the top editors (the one with the column 'Added (Bytes)')
+		rows   = stream_article_editors(chunks)
+		n_rows = 0
+
+		for username, n_edits, n_minor_edits, first_edit, last_edit, added_bytes in rows: 
+			if no_bots and is_bot(username): 
+				continue
+			if no_unregistered and is_anonymized(username): 
+				continue
+			yield ArticleEditor(article_title, username, parse_count(n_edits), parse_count(n_minor_edits), check_timestamp(first_edit), check_timestamp(last_edit), parse_count(added_bytes))
+			n_rows += 1
+	except TableNotFound: 
+		reason = MISSING_MARKER
+	except TruncatedTable: # the page ended in the middle of the table
+		reason = TRUNCATED_TABLE
+	except Exception as error: # the download failed or a count could not be read
+		reason      = get_failure_reason(error)
+		retry_after = getattr(error, 'retry_after', None) # e.g., of a 429 response
+	else: 
+		PARSE_TIME.observe(rows.parse_time, stage=stage)
+		ROWS.inc(n_rows, stage=stage)
+		return
+
+	if reason in BROKEN_PAGE_REASONS: # the page was cached before it was parsed
+		discard_cached_page(url, client=client)
+	record_failure(stage, reason, retry_after=retry_after)
+	raise ScrapeError(article_title, reason)
+
+def iter_top_edits_of_user(username, client=None, stream=True): 
+	"""
+	Yields a UserTopEdit for every top edit (in the main namespace) of the given 
+	user. Raises a ScrapeError when the page could not be scraped (the failure is 
+	recorded in the metrics). 
+
+	Args: 
+		username - the username of the user
+		client   - the HTTPClient used for scraping (Default: the client owned by the package)
+		stream   - when True, the edits are yielded while the page is being downloaded 
+		           (see iter_editors_of_article) (Default: True)
+	"""
+	url         = get_user_top_edits_url(username)
+	stage       = 'user_articles'
+	retry_after = None
+
+	try: 
+		if stream: 
+			chunks = stream_html_from_url(url, headers=True, client=client)
+		else: 
+			chunks = [read_in_html_from_url(url, headers=True, client=client)]
+
+		# the table with the top edits (just after the heading 'TOP edits per namespace')
+		rows   = stream_user_top_edits(chunks)
+		n_rows = 0
+
+		for n_edits, title in rows: 
+			yield UserTopEdit(username, title, parse_count(n_edits))
+			n_rows += 1
+	except TableNotFound: 
+		reason = MISSING_MARKER
+	except TruncatedTable: # the page ended in the middle of the table
+		reason = TRUNCATED_TABLE
+	except Exception as error: # the download failed or a count could not be read
+		reason      = get_failure_reason(error)
+		retry_after = getattr(error, 'retry_after', None) # e.g., of a 429 response
+	else: 
+		PARSE_TIME.observe(rows.parse_time, stage=stage)
+		ROWS.inc(n_rows, stage=stage)
+		return
+
+	if reason in BROKEN_PAGE_REASONS: # the page was cached before it was parsed
+		discard_cached_page(url, client=client)
+	record_failure(stage, reason, retry_after=retry_after)
+	raise ScrapeError(username, reason)
+
+def iter_records(list_of_keys, iter_page, failed=None): 
+	"""
+	Yields the records of iter_page(key) for every key in the list. The records of 
+	a page are only yielded once the whole page was scraped, so a page that fails 
+	yields nothing; its key is appended to failed (when given). 
+	"""
+	if isinstance(list_of_keys, str): # a single title/username
+		list_of_keys = [list_of_keys]
+	for key in list_of_keys: 
+		try: 
+			records = list(iter_page(key))
+		except ScrapeError: 
+			if failed is not None: 
+				failed.append(key)
+			continue
+		for record in records: 
+			yield record
+
+async def aiter_records(list_of_keys, iter_page, concurrency=DEFAULT_CONCURRENCY, failed=None): 
+	"""
+	Asynchronous version of iter_records: the pages are scraped on worker threads, 
+	concurrency at a time, and the records are yielded in the order of the keys. 
+	"""
+	if isinstance(list_of_keys, str): # a single title/username
+		list_of_keys = [list_of_keys]
+	async for key, records in map_in_order(list_of_keys, lambda key: list(iter_page(key)), concurrency=concurrency): 
+		if isinstance(records, Exception): 
+			if failed is not None: 
+				failed.append(key)
+			continue
+		for record in records: 
+			yield record
+
+def iter_article_editors(list_of_titles, top=10000, no_bots=False, no_unregistered=False, client=None, failed=None): 
+	"""
+	Yields an ArticleEditor for every top editor of every article in the list. 
+	Articles that could not be scraped are skipped. 
+
+	Example: 
+
+		for editor in iter_article_editors(['MDMA', 'Caffeine'], no_bots=True): 
+			print(editor.title, editor.user, editor.n_edits)
+
+	Args: 
+		list_of_titles  - a list of titles of Wikipedia articles (or a single title)
+		top             - top number of users scraped per article (Default: 10000)
+		no_bots 	    - bot users are ignored
+		no_unregistered - unregistered users are ignored
+		client          - the HTTPClient used for scraping (Default: the client owned by the package)
+		failed          - list to which the titles that could not be scraped are appended (Default: None)
+	"""
+	def iter_page(title): 
+		return iter_editors_of_article(title, top=top, no_bots=no_bots, no_unregistered=no_unregistered, client=client)
+	return iter_records(list_of_titles, iter_page, failed=failed)
+
+def aiter_article_editors(list_of_titles, top=10000, no_bots=False, no_unregistered=False, client=None, failed=None, concurrency=DEFAULT_CONCURRENCY): 
+	"""
+	Asynchronous version of iter_article_editors; concurrency articles are scraped 
+	at the same time (Default: 8). 
+
+	Example: 
+
+		async for editor in aiter_article_editors(['MDMA', 'Caffeine']): 
+			...
+	"""
+	def iter_page(title): 
+		return iter_editors_of_article(title, top=top, no_bots=no_bots, no_unregistered=no_unregistered, client=client)
+	return aiter_records(list_of_titles, iter_page, concurrency=concurrency, failed=failed)
 
-def scrape_list_articles_for_users(list_of_articles, output=sys.stdout, max_attempts=5, header=True, top=10000, no_bots=False, no_unregistered=False, verbose=False): 
+def iter_user_top_edits(list_of_users, client=None, failed=None): 
+	"""
+	Yields a UserTopEdit for every top edit of every user in the list. Users that 
+	could not be scraped are skipped. 
+
+	Args: 
+		list_of_users - a list of usernames (or a single username)
+		client        - the HTTPClient used for scraping (Default: the client owned by the package)
+		failed        - list to which the users that could not be scraped are appended (Default: None)
+	"""
+	def iter_page(username): 
+		return iter_top_edits_of_user(username, client=client)
+	return iter_records(list_of_users, iter_page, failed=failed)
+
+def aiter_user_top_edits(list_of_users, client=None, failed=None, concurrency=DEFAULT_CONCURRENCY): 
+	"""
+	Asynchronous version of iter_user_top_edits; concurrency users are scraped at 
+	the same time (Default: 8). 
+	"""
+	def iter_page(username): 
+		return iter_top_edits_of_user(username, client=client)
+	return aiter_records(list_of_users, iter_page, concurrency=concurrency, failed=failed)
+
+def scrape_list_articles_for_users(list_of_articles, output=sys.stdout, max_attempts=5, header=True, top=10000, no_bots=False, no_unregistered=False, verbose=False, client=None, concurrency=1, on_success=None): 
 	"""
 	Scrapes a list of articles for the users that contributed most to each of the articles 
 	separately. 
 
 	Args:
 		list_of_articles - a list of titles of Wikipedia articles
-		output           - either outputfile or standard out
+		output           - either outputfile, standard out or a writer (e.g., a ParquetRowWriter)
 		max_attempts     - Number of attempts to scrape the sites.
 		header           - when True, the header is outputted as well (Default: True)
 		top              - top number of users (by number of edits) scraped (Default: 10000)
 		no_bots 	     - bot users are ignored
 		no_unregistered  - unregistered users are ignored
 		verbose          - when true, output is more verbose
+		client           - the HTTPClient used for scraping (Default: the client owned by the package)
+		concurrency      - number of pages scraped at the same time (Default: 1)
+		on_success       - function called with every article once its rows are written (Default: None)
+
+	Returns: 
+		list of articles that could not be scraped
 	"""
 	if verbose: 
 		print('\nwikiscrape')
 		print('----------\n')
 		print("Preparing to scrape the top edited articles.\n")
 		print("# articles\t\t: %d"%len(list_of_articles))
+		print("concurrency\t\t: %d"%concurrency)
 		if max_attempts == math.inf: 
 		    print("# scrape attempts\t: unlimited")
 		else: 
@@ -147,32 +599,55 @@ def scrape_list_articles_for_users(list_of_articles, output=sys.stdout, max_atte
 		    print('output\t\t\t: standard out')
 		print('\n')
 
+	# the rows of a page are only written when the whole page was scraped
+	writer = get_writer(output)
+
 	# print the header
 	if header: 
-		print("name\tuser\tn_edits\tn_minor_edits\tfirst_edit\tlast_edit\tadded_bytes", file=output)
+		writer.write_header(ARTICLE_EDITOR_COLUMNS)
 
-	n_attempt              = 0 # number of attempts
 	initial_n_articles     = len(list_of_articles)
 	n_successfully_scraped = 0
 
-	# scrape until 1) the number of attempts did not exceed its maximum, or 2) all pages have been scraped
-	while n_attempt < max_attempts and len(list_of_articles) > 0: 
-		# go over all users that still need to be crawled
-		for i, title in enumerate(list_of_articles): 
-			flag = scrape_article_for_users(title, file=output, top=top, header=False, no_bots=no_bots, no_unregistered=no_unregistered)
-			if flag == SCRAPING_SUCCESSFULL: 
-				del list_of_articles[i] # remove the user from the list of users that still need to be scraped
-				n_successfully_scraped += 1
-				if verbose and output != sys.stdout: 
-					print('Scraped %d of %d articles\t(%.2f %%)'%(
-							n_successfully_scraped, 
-							initial_n_articles, 
-							float(n_successfully_scraped) / float(initial_n_articles) * 100))
-		n_attempt += 1
-
+	def scrape_item(title, file): 
+		return scrape_article_for_users(title, file=file, top=top, header=False, no_bots=no_bots, no_unregistered=no_unregistered, client=client)
+
+	def report(title): 
+		nonlocal n_successfully_scraped
+		n_successfully_scraped += 1
+		if verbose and output != sys.stdout: 
+			print('Scraped %d of %d articles\t(%.2f %%)'%(
+					n_successfully_scraped, 
+					initial_n_articles, 
+					float(n_successfully_scraped) / float(initial_n_articles) * 100))
+		if on_success is not None: 
+			on_success(title)
+
+	if concurrency > 1: # scrape several pages at the same time
+		writer.flush()
+		return crawl(list_of_articles, scrape_item, output, concurrency=concurrency, max_attempts=max_attempts, on_success=report, stage='article_users')
+
+	# scrape until all pages have been scraped or ran out of attempts. A page that failed 
+	# is retried after a backoff, while the other pages are scraped in the meantime
+	scheduler = RetryScheduler(list_of_articles, max_attempts=max_attempts)
+	for index, title in scheduler: 
+		if scrape_item(title, writer) == SCRAPING_SUCCESSFULL: 
+			scheduler.success(index)
+			if on_success is not None: # the rows should be in the output before it is marked as done (on_success flushes it)
+				writer.write_block()
+			report(title)
+		else: 
+			# a page that does not exist is given up at once; a Retry-After is honored
+			reason, retry_after = last_failure()
+			if scheduler.failure(index, delay=retry_after, retryable=is_retryable(reason)): 
+				RETRIES.inc(stage='article_users', reason=reason)
+			else: 
+				GIVEN_UP.inc(stage='article_users')
+	writer.flush()
 
+	return scheduler.failed_items()
 
-def obtain_2x2_contigency_table(article_title, users_of_interest, total_size_community, top=10000):
+def obtain_2x2_contigency_table(article_title, users_of_interest, total_size_community, top=10000, client=None):
 	"""
 	Obtains the relevant data to preform a hypothesis test of association between 
 	contributing to the article with the title <article_title> and the community of 
@@ -189,18 +664,22 @@ def obtain_2x2_contigency_table(article_title, users_of_interest, total_size_com
 
 	Args:
 		article_title        - the title of the article
-		users_of_interest    - list with user names in the community of interest
+		users_of_interest    - the community of interest: a CommunityIndex (see community.py), 
+		                       or a list with user names (the index is then built for this call only)
 		total_size_community - number of registered users in Wikipedia (see get_number_registered_users)
 		top                  - top number of users (by number of edits) scraped (Default: 10000)
 		verbose              - when true, output is more verbose
+		client               - the HTTPClient used for scraping (Default: the client owned by the package)
 
 	Returns: 
 		the 2x2 table: [[a, c], [c, d]] 
 		flag - whether scraping was successfull or not
 	""" 
+	if not isinstance(users_of_interest, CommunityIndex): 
+		users_of_interest = CommunityIndex(users_of_interest)
 	n_users_of_interest = len(users_of_interest)
 	# get a list of all the user names that edited the page
-	list_users_that_contributed = scrape_article_for_users(article_title, file=sys.stdout, header=False, top=top, no_bots=True, no_unregistered=True, only_usernames=True)
+	list_users_that_contributed = scrape_article_for_users(article_title, file=sys.stdout, header=False, top=top, no_bots=True, no_unregistered=True, only_usernames=True, client=client)
 
 	if list_users_that_contributed == 0: 
 		return [[None, None], [None, None]], SCRAPING_FAILED
@@ -208,107 +687,85 @@ def obtain_2x2_contigency_table(article_title, users_of_interest, total_size_com
 	# number of users that contributed
 	n_contributed = len(list_users_that_contributed)
 
-	a = len(set(users_of_interest) & set(list_users_that_contributed))
+	a = users_of_interest.count(list_users_that_contributed)
 	b = n_users_of_interest - a
 	c = len(list_users_that_contributed) - a
 	d = total_size_community - a - b - c
 
 	return [[a, c], [b, d]], SCRAPING_SUCCESSFULL
 
-def scrape_article_for_users(article_title, file=sys.stdout, header=False, top=10000, no_bots=False, no_unregistered=False, only_usernames=False): 
+def scrape_article_for_users(article_title, file=sys.stdout, header=False, top=10000, no_bots=False, no_unregistered=False, only_usernames=False, client=None): 
 	"""	
 	Gets the top users that contributed to the given article. The output is only
 	outputed (either to file or standard out, see option 'file') when the scraping 
-	was successfull. 
+	was successfull; the rows are parsed while the page is being downloaded and 
+	kept (in the page of the writer) until the whole page was scraped. Only the 
+	usernames are needed for the contingency tables (only_usernames); the page 
+	is then read as a whole, so that it is shared with the other threads that 
+	read it at the same time. 
 
 	Args: 
 		article_title   - title of the article
-		file            - the output is outputed there (Default: standard out)
+		file            - the output is outputed there, either a file or a writer (e.g., TSVWriter) (Default: standard out)
 		header          - when True, the header is outputted as well (default: False)
 		top             - top number of users scraped (Default: 10000)
 		no_bots 	    - bot users are ignored
 		no_unregistered - unregistered users are ignored
 		only_usernames  - if True, the function returns only a list of usernames that edited the page
+		client          - the HTTPClient used for scraping (Default: the client owned by the package)
 
 	Returns: 
 		flag - is SCRAPING_SUCCESSFULL when successfull, otherwise SCRAPING_FAILED.
     """
-	# the url to be scraped
-	url = "https://tools.wmflabs.org/xtools-articleinfo/?article=%s&project=en.wikipedia.org&editorlimit=%s#topeditors"%(
-				str(article_title).replace(' ', '%20'), str(top))
-
-	# scrape the url
-	try: 
-		raw_data = read_in_data_from_url(url, headers=True, json=False)
-	except:
-		return SCRAPING_FAILED
-
-	# split into lines
-	raw_data = raw_data.splitlines() 
-
-	# go to the relevant table (just after the line with 'Added (Bytes)')
-	i, line = 0, raw_data[0]
-	while not 'Added (Bytes)' in line: 
-		try: 
-			i, line = skip(raw_data, i, 1)
-		except: 
-			return SCRAPING_FAILED
-
-	if header: # prints the header	
-		print("name\tuser\tn_edits\tn_minor_edits\tfirst_edit\tlast_edit\tadded_bytes", file=file)
-
-	i, line = skip(raw_data, i, 3) # get to the starting point of the list
-
+	# the rows are only written when the whole page was scraped. Only the usernames are needed 
+	# for the contingency tables, so then the page may be shared by several threads
+	writer         = get_writer(file)
 	list_usernames = []
 
-	while len(line) != 0: # not the end of the table
-		# get the user name 
-		username = line.strip() 
+	if header: # prints the header	
+		writer.write_row(ARTICLE_EDITOR_COLUMNS)
 
-		if no_bots and is_bot(username): 
-			i, line = skip(raw_data, i, 14)
-			continue
-		if no_unregistered and is_anonymized(username): 
-			i, line = skip(raw_data, i, 14)
-			continue
+	try: 
+		for editor in iter_editors_of_article(article_title, top=top, no_bots=no_bots, no_unregistered=no_unregistered, client=client, stream=not only_usernames): 
+			if only_usernames: # only interested in the usernames
+				list_usernames.append(editor.user) 
+			else: 
+				writer.write_row(editor)
+	except ScrapeError: 
+		writer.rollback()
+		return SCRAPING_FAILED
 
-		if only_usernames: # only interested in the usernames
-			list_usernames.append(username) 
-			i, line = skip(raw_data, i, 14)
-		else: 	
-			print("%s\t%s"%(article_title, username), end='\t', file=file) # article title and username
-			i, line = skip(raw_data, i, 5)
-			print(line.strip(), end='\t', file=file) # number of edits
-			i, line = skip(raw_data, i, 1)
-			print(line.strip(), end='\t', file=file) # number of minor edits
-			i, line = skip(raw_data, i, 2)
-			print(line.strip(), end='\t', file=file) # first edit
-			i, line = skip(raw_data, i, 1)
-			print(line.strip(), end='\t', file=file) # last edit
-			i, line = skip(raw_data, i, 2)
-			print(line.strip().replace(',', ''), file=file) # added_bytes
-			i, line = skip(raw_data, i, 3)
+	writer.commit()
+	if writer is not file: 
+		writer.flush()
 
 	if only_usernames: 
 		return list_usernames
 	return SCRAPING_SUCCESSFULL
 
-def scrape_list_users_for_articles(list_of_users, output=sys.stdout, max_attempts=5, header=True, verbose=False): 
+def scrape_list_users_for_articles(list_of_users, output=sys.stdout, max_attempts=5, header=True, verbose=False, client=None, concurrency=1, on_success=None): 
 	"""
 	Scrapes a list of users for the articles that they edited the most.  
 
 	Args:
 		list_of_users    - a list of usernames
-		output           - either outputfile or standard out
+		output           - either outputfile, standard out or a writer (e.g., a ParquetRowWriter)
 		max_attempts     - Number of attempts to scrape the sites.
 		header           - when True, the header is outputted as well (Default: True)
 		verbose          - when true, output is more verbose
+		client           - the HTTPClient used for scraping (Default: the client owned by the package)
+		concurrency      - number of pages scraped at the same time (Default: 1)
+		on_success       - function called with every user once its rows are written (Default: None)
+
+	Returns: 
+		list of users that could not be scraped
 	"""
 	if verbose: 
 		print('\nwikiscrape')
 		print('----------\n')
 		print("Preparing to scrape the top edited articles.\n")
 		print("# users\t\t\t: %d"%len(list_of_users))
+		print("concurrency\t\t: %d"%concurrency)
 		if max_attempts == math.inf: 
 		    print("# scrape attempts\t: unlimited")
 		else: 
@@ -319,78 +776,92 @@ def scrape_list_users_for_articles(list_of_users, output=sys.stdout, max_attempt
 		    print('output\t\t\t: standard out')
 		print('\n')
 
+	# the rows of a page are only written when the whole page was scraped
+	writer = get_writer(output)
+
 	# print the header
 	if header: 
-		print("user\ttitle\tn_edits", file=output)
+		writer.write_header(USER_TOP_EDIT_COLUMNS)
 
-	n_attempt              = 0 # number of attempts
 	initial_n_users        = len(list_of_users)
 	n_successfully_scraped = 0
 
-	# scrape until 1) the number of attempts did not exceed its maximum, or 2) all pages have been scraped
-	while n_attempt < max_attempts and len(list_of_users) > 0: 
-		# go over all users that still need to be crawled
-		for i, username in enumerate(list_of_users): 
-			flag = scrape_user_for_articles(username, file=output, header=False, verbose=False)
-			if flag == SCRAPING_SUCCESSFULL: 
-				del list_of_users[i] # remove the user from the list of users that still need to be scraped
-				n_successfully_scraped += 1
-				if verbose and output != sys.stdout: 
-					print('Scraped %d of %d users\t(%.2f %%)'%(
-							n_successfully_scraped, 
-							initial_n_users, 
-  							float(n_successfully_scraped) / float(initial_n_users) * 100))
-		n_attempt += 1
-
-def scrape_user_for_articles(username, file=sys.stdout, header=False, verbose=False): 
+	def scrape_item(username, file): 
+		return scrape_user_for_articles(username, file=file, header=False, verbose=False, client=client)
+
+	def report(username): 
+		nonlocal n_successfully_scraped
+		n_successfully_scraped += 1
+		if verbose and output != sys.stdout: 
+			print('Scraped %d of %d users\t(%.2f %%)'%(
+					n_successfully_scraped, 
+					initial_n_users, 
+					float(n_successfully_scraped) / float(initial_n_users) * 100))
+		if on_success is not None: 
+			on_success(username)
+
+	if concurrency > 1: # scrape several pages at the same time
+		writer.flush()
+		return crawl(list_of_users, scrape_item, output, concurrency=concurrency, max_attempts=max_attempts, on_success=report, stage='user_articles')
+
+	# scrape until all pages have been scraped or ran out of attempts. A page that failed 
+	# is retried after a backoff, while the other pages are scraped in the meantime
+	scheduler = RetryScheduler(list_of_users, max_attempts=max_attempts)
+	for index, username in scheduler: 
+		if scrape_item(username, writer) == SCRAPING_SUCCESSFULL: 
+			scheduler.success(index)
+			if on_success is not None: # the rows should be in the output before it is marked as done (on_success flushes it)
+				writer.write_block()
+			report(username)
+		else: 
+			# a page that does not exist is given up at once; a Retry-After is honored
+			reason, retry_after = last_failure()
+			if scheduler.failure(index, delay=retry_after, retryable=is_retryable(reason)): 
+				RETRIES.inc(stage='user_articles', reason=reason)
+			else: 
+				GIVEN_UP.inc(stage='user_articles')
+	writer.flush()
+
+	return scheduler.failed_items()
+
+def scrape_user_for_articles(username, file=sys.stdout, header=False, verbose=False, client=None): 
 	"""	
 	Gets the top edits for the Wikipedian with the given username. The output is only
 	outputed (either to file or standard out, see option 'file') when the scraping 
-	was successfull. 
+	was successfull; the rows are parsed while the page is being downloaded and 
+	kept (in the page of the writer) until the whole page was scraped. 
 
 	Args: 
 		username      - the username of the user
-		file          - the output is outputed there (Default: standard out)
+		file          - the output is outputed there, either a file or a writer (e.g., TSVWriter) (Default: standard out)
 		header        - when True, the header is outputted as well (default: False)
+		client        - the HTTPClient used for scraping (Default: the client owned by the package)
 
 	Returns: 
 		flag - is SCRAPING_SUCCESSFULL when successfull, otherwise SCRAPING_FAILED.
     """
     # the url to be scraped
-	url = "https://tools.wmflabs.org/xtools/topedits/?user=%s&project=en.wikipedia.org&namespace=0&article="%(username.replace(' ', '%20'))
+	url = get_user_top_edits_url(username)
 
 	if verbose: 
 		print("Start scraping user %s\t(link: %s)"%(username, url))
 
-    # scrape the url
-	try: 
-		raw_data = read_in_data_from_url(url, headers=True, json=False)
-	except:
-		return SCRAPING_FAILED
-
-	# split into lines
-	raw_data = raw_data.splitlines() 
-
-	# go to the relevant table (just after the line with 'TOP edits per namespace [hide]')
-	i, line = 0, raw_data[0]
-	while not 'TOP edits per namespace [hide]' in line: 
-		try: 
-			i, line = skip(raw_data, i, 1)
-		except: 
-			return SCRAPING_FAILED
+	# the rows are only written when the whole page was scraped
+	writer = get_writer(file)
 
 	if header: # prints the header	
-		print("user\ttitle\tn_edits", file=file)
+		writer.write_row(USER_TOP_EDIT_COLUMNS)
 
-	i, line = skip(raw_data, i, 5) # get to the starting point of the list
+	try: 
+		for edit in iter_top_edits_of_user(username, client=client): 
+			writer.write_row(edit)
+	except ScrapeError: 
+		writer.rollback()
+		return SCRAPING_FAILED
 
-	while len(line) != 0: # not the end of the table
-		print(username, end='\t', file=file) # the username
-		n_edits = line.strip()
-		i, line = skip(raw_data, i, 1)
-		print(line.strip(), end='\t', file=file) # article title
-		print(n_edits, file=file) # number of edits
-		i, line = skip(raw_data, i, 6)
+	writer.commit()
+	if writer is not file: 
+		writer.flush()
 
 	return SCRAPING_SUCCESSFULL
 
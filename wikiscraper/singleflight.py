@@ -0,0 +1,66 @@
+import threading
+
+"""
+	Single-flight de-duplication: when several threads ask for the same
+	page at the same time, only the first one fetches (and parses) it; the
+	others wait for it and get the same result.
+"""
+
+class Call:
+	"""
+	A call that is in flight.
+	"""
+	def __init__(self):
+		self.event  = threading.Event()
+		self.result = None
+		self.error  = None
+
+class SingleFlight:
+	"""
+	Collapses identical concurrent calls into one. Thread-safe.
+
+	Example:
+
+		single_flight = SingleFlight()
+		raw_data = single_flight.do(url, lambda: download_and_parse(url))
+	"""
+	def __init__(self):
+		self.lock     = threading.Lock()
+		self.calls    = {}
+		self.n_shared = 0 # number of calls that were answered by another call
+
+	def do(self, key, function):
+		"""
+		Calls function() and returns its result, unless a call with the same key
+		is in flight already; in that case, waits for that call and returns its
+		result (or raises its exception).
+
+		Args:
+			key      - identifies the call (e.g., the url)
+			function - function without arguments that does the actual work
+		"""
+		with self.lock:
+			call = self.calls.get(key)
+			if call is not None: # someone else is fetching it already
+				self.n_shared += 1
+				leader = False
+			else:
+				call = self.calls[key] = Call()
+				leader = True
+
+		if not leader:
+			call.event.wait()
+			if call.error is not None:
+				raise call.error
+			return call.result
+
+		try:
+			call.result = function()
+		except BaseException as error:
+			call.error = error
+			raise
+		finally:
+			with self.lock:
+				del self.calls[key]
+			call.event.set()
+		return call.result
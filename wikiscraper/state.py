@@ -0,0 +1,123 @@
+import os
+import time
+import sqlite3
+import threading
+
+"""
+	Durable crawl state for the wikiscrape pipeline. For every stage of the
+	pipeline, the status of every item (article title or username) is kept
+	in an SQLite database, so that a crawl that was killed halfway can be
+	resumed with exactly the items that were not done yet.
+"""
+
+PENDING = 'pending' # not scraped yet
+DONE    = 'done'    # scraped and written to the output
+FAILED  = 'failed'  # ran out of attempts (retried when the crawl is resumed)
+
+class CrawlState:
+	"""
+	The status of all items of all stages, stored in the SQLite database at the
+	given location. Thread-safe.
+
+	Args:
+		filename - location of the database (created when it does not exist)
+	"""
+	def __init__(self, filename):
+		directory = os.path.dirname(filename)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+
+		self.lock = threading.Lock()
+		self.db   = sqlite3.connect(filename, check_same_thread=False)
+		self.db.execute("PRAGMA journal_mode=WAL")
+		self.db.execute("PRAGMA synchronous=NORMAL")
+		self.db.execute("""CREATE TABLE IF NOT EXISTS items (
+							stage    TEXT,
+							key      TEXT,
+							status   TEXT,
+							attempts INTEGER,
+							updated  REAL,
+							PRIMARY KEY (stage, key))""")
+		self.db.execute("CREATE INDEX IF NOT EXISTS items_status ON items (stage, status)")
+		self.db.commit()
+
+	def add(self, stage, keys):
+		"""
+		Adds the items to the stage as pending; items that are already known
+		keep their status.
+		"""
+		now = time.time()
+		with self.lock:
+			self.db.executemany("INSERT OR IGNORE INTO items VALUES (?, ?, ?, 0, ?)",
+								((stage, key, PENDING, now) for key in keys))
+			self.db.commit()
+
+	def import_done(self, stage, keys):
+		"""
+		Marks the items as done, e.g., when they were found in the output of a
+		crawl that ran before the crawl state was kept.
+		"""
+		now = time.time()
+		with self.lock:
+			self.db.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, 0, ?)",
+								((stage, key, DONE, now) for key in keys))
+			self.db.commit()
+
+	def is_known(self, stage):
+		"""
+		Returns True when items were added to the stage before.
+		"""
+		with self.lock:
+			return self.db.execute("SELECT 1 FROM items WHERE stage = ? LIMIT 1", (stage,)).fetchone() is not None
+
+	def pending(self, stage):
+		"""
+		Returns the items of the stage that are not done yet (pending or failed).
+		"""
+		with self.lock:
+			rows = self.db.execute("SELECT key FROM items WHERE stage = ? AND status != ? ORDER BY rowid",
+									(stage, DONE)).fetchall()
+		return [key for (key,) in rows]
+
+	def done(self, stage):
+		"""
+		Returns the items of the stage that are done.
+		"""
+		with self.lock:
+			rows = self.db.execute("SELECT key FROM items WHERE stage = ? AND status = ? ORDER BY rowid",
+									(stage, DONE)).fetchall()
+		return [key for (key,) in rows]
+
+	def mark_done(self, stage, key):
+		"""
+		Marks the item as done.
+		"""
+		with self.lock:
+			self.db.execute("UPDATE items SET status = ?, attempts = attempts + 1, updated = ? WHERE stage = ? AND key = ?",
+							(DONE, time.time(), stage, key))
+			self.db.commit()
+
+	def mark_failed(self, stage, keys):
+		"""
+		Marks the items as failed.
+		"""
+		now = time.time()
+		with self.lock:
+			self.db.executemany("UPDATE items SET status = ?, attempts = attempts + 1, updated = ? WHERE stage = ? AND key = ?",
+								((FAILED, now, stage, key) for key in keys))
+			self.db.commit()
+
+	def counts(self, stage):
+		"""
+		Returns a dictionary with the number of items per status for the stage.
+		"""
+		with self.lock:
+			rows = self.db.execute("SELECT status, COUNT(*) FROM items WHERE stage = ? GROUP BY status", (stage,)).fetchall()
+		return dict(rows)
+
+	def close(self):
+		"""
+		Closes the database.
+		"""
+		with self.lock:
+			self.db.close()
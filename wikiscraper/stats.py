@@ -1,5 +1,233 @@
-import scipy as sp 
+import numpy as np
+from scipy import special
+from scipy.stats import norm
 
 """
 Computes some statistics on 2x2 contingency tables
-"""	
+
+The tables are represented as in obtain_2x2_contigency_table (see scrape.py):
+
+                        |   community of interest   |   rest wikipedia  |   total
+    ------------------------------------------------------------------------------------
+    contributed to article  |       a                   |       c           |   q = a + c
+    not contributed         |       b                   |       d           |   r = b + d
+    ------------------------------------------------------------------------------------
+    total                   | s = a + b                 |   t = c + d       |   n = a + b + c + d
+
+Fisher's exact test of many tables at once: the tables are given as arrays of
+a, b, c and d. Given the margins, a follows a hypergeometric distribution; the
+tails of the distribution are computed in log space, starting at the observed
+a and summing the terms (that decrease away from the mode) with the ratio of
+consecutive probabilities, for all tables at once. When the distribution is
+very wide (huge counts), a normal approximation is used instead.
+"""
+
+TABLE_SIZE   = 1 << 20 # log-factorials of numbers below this are looked up in a table, larger ones are computed
+MAX_SD       = 1000.   # tables for which the standard deviation of a is larger are approximated (normal distribution)
+MAX_TERMS    = 20000   # maximum number of terms summed per table; when not converged, the table is approximated
+TOLERANCE    = 1e-17   # summing stops when the next term is relatively smaller than this
+ALTERNATIVES = ('greater', 'less')
+
+LOG_FACTORIAL_TABLE = [np.zeros(1)] # cache: log(k!) for k = 0, 1, ..., grows when needed (up to TABLE_SIZE)
+
+def get_log_factorial_table(size):
+	"""
+	Returns the cached table with log(k!) for at least k = 0, ..., size - 1 (size
+	at most TABLE_SIZE).
+	"""
+	table = LOG_FACTORIAL_TABLE[0]
+	if len(table) < size:
+		size  = min(TABLE_SIZE, max(size, 2 * len(table)))
+		table = special.gammaln(np.arange(size) + 1.)
+		LOG_FACTORIAL_TABLE[0] = table
+	return table
+
+def log_factorial(k):
+	"""
+	Returns log(k!) for every element of the (integer) array k.
+	"""
+	k      = np.asarray(k, dtype=np.int64)
+	result = np.empty(k.shape)
+	small  = k < TABLE_SIZE
+	if small.any():
+		table = get_log_factorial_table(int(k[small].max()) + 1)
+		result[small] = table[k[small]]
+	result[~small] = special.gammaln(k[~small] + 1.)
+	return result
+
+def stirling_error(n):
+	"""
+	Returns log(n!) - log(sqrt(2 pi n) (n/e)^n) for large n (at least TABLE_SIZE / 2).
+	"""
+	n = np.asarray(n, dtype=np.float64)
+	return 1. / (12. * n) - 1. / (360. * n ** 3)
+
+def log_binomial(n, k):
+	"""
+	Returns log(n choose k) for the (integer) arrays n and k (0 <= k <= n). The
+	log-factorials are looked up when n is small. For large n, log(n!) - log((n-k)!)
+	is computed with Stirling's formula in a form that does not lose precision
+	(the log-factorials themselves are too large to be subtracted).
+	"""
+	n, k   = np.broadcast_arrays(np.asarray(n, dtype=np.int64), np.asarray(k, dtype=np.int64))
+	result = np.empty(n.shape)
+	small  = n < TABLE_SIZE
+	result[small] = log_factorial(n[small]) - log_factorial(k[small]) - log_factorial(n[small] - k[small])
+
+	large = ~small
+	if large.any():
+		n_large = n[large].astype(np.float64)
+		k_large = np.minimum(k[large], n[large] - k[large]) # n choose k = n choose n-k; n - k is large
+		m_large = n_large - k_large
+		result[large] = (stirling_error(n_large) - stirling_error(m_large) + (m_large + 0.5) * np.log1p(k_large / m_large)
+		                    + k_large * np.log(n_large) - k_large - log_factorial(k_large))
+	return result
+
+def log_hypergeometric_pmf(x, total, successes, draws):
+	"""
+	Returns the log probability that x of the draws (without replacement) are
+	successes, for all (array) arguments.
+	"""
+	return log_binomial(successes, x) + log_binomial(total - successes, draws - x) - log_binomial(total, draws)
+
+def sum_terms(log_first, x, total, successes, draws, step, max_terms=MAX_TERMS):
+	"""
+	Sums the hypergeometric probabilities of x, x + step, x + 2*step, ... (step is
+	1 or -1) until the end of the support, for all tables at once. The terms should
+	be decreasing, i.e., the sum should start beyond the mode.
+
+	Returns:
+		the log of the sums
+		converged - False for the tables for which max_terms were not enough
+	"""
+	x          = x.astype(np.float64)
+	failures   = (total - successes).astype(np.float64)
+	successes  = successes.astype(np.float64)
+	draws      = draws.astype(np.float64)
+	first      = np.maximum(0., draws - failures) # support: first <= x <= last
+	last       = np.minimum(successes, draws)
+	sums       = np.ones(len(x)) # sum of the terms relative to the first term
+	term       = np.ones(len(x))
+	converged  = np.zeros(len(x), dtype=bool)
+	active     = np.arange(len(x))
+
+	for _ in range(max_terms):
+		xa = x[active]
+		if step > 0: # ratio of the probabilities of x + 1 and x
+			ratio = (successes[active] - xa) * (draws[active] - xa) / ((xa + 1.) * (failures[active] - draws[active] + xa + 1.))
+			end   = xa >= last[active]
+		else: # ratio of the probabilities of x - 1 and x
+			ratio = xa * (failures[active] - draws[active] + xa) / ((successes[active] - xa + 1.) * (draws[active] - xa + 1.))
+			end   = xa <= first[active]
+		ratio[end]      = 0.
+		term[active]   *= ratio
+		sums[active]   += term[active]
+		x[active]       = xa + step
+
+		done = end | (term[active] < TOLERANCE * sums[active])
+		converged[active[done]] = True
+		active = active[~done]
+		if len(active) == 0:
+			break
+
+	return log_first + np.log(sums), converged
+
+def normal_log_sf(x, total, successes, draws):
+	"""
+	Approximates log P(X >= x) of the hypergeometric distribution with a normal
+	distribution (with continuity correction).
+	"""
+	total, successes, draws = total.astype(np.float64), successes.astype(np.float64), draws.astype(np.float64)
+	mean     = draws * successes / total
+	variance = draws * successes * (total - successes) * (total - draws) / (total ** 2 * np.maximum(total - 1., 1.))
+	z        = (x - 0.5 - mean) / np.sqrt(variance)
+	return norm.logsf(z)
+
+def hypergeometric_log_sf(x, total, successes, draws, max_sd=MAX_SD):
+	"""
+	Returns log P(X >= x) for X hypergeometric (total, successes, draws), for all
+	(array) arguments.
+
+	Returns:
+		log P(X >= x)
+		approximated - True for the tables for which the normal approximation was used
+	"""
+	x, total, successes, draws = [np.asarray(array, dtype=np.int64) for array in np.broadcast_arrays(x, total, successes, draws)]
+	x, total, successes, draws = x.ravel(), total.ravel(), successes.ravel(), draws.ravel()
+
+	log_sf       = np.zeros(len(x)) # P(X >= x) = 1 for x at or below the support
+	approximated = np.zeros(len(x), dtype=bool)
+
+	first = np.maximum(0, draws - (total - successes))
+	last  = np.minimum(successes, draws)
+	log_sf[x > last] = -np.inf
+
+	inside   = (x > first) & (x <= last)
+	mode     = np.floor((draws + 1.) * (successes + 1.) / (total + 2.))
+	with np.errstate(divide='ignore', invalid='ignore'): # empty tables are not inside
+		variance = draws * (successes / total) * ((total - successes) / total) * ((total - draws) / np.maximum(total - 1., 1.))
+	wide     = inside & (np.sqrt(variance) > max_sd)
+
+	# upper tail: x is beyond the mode, the terms x, x + 1, ... decrease
+	upper = np.flatnonzero(inside & ~wide & (x > mode))
+	if len(upper) > 0:
+		log_first = log_hypergeometric_pmf(x[upper], total[upper], successes[upper], draws[upper])
+		log_sf[upper], converged = sum_terms(log_first, x[upper], total[upper], successes[upper], draws[upper], 1)
+		approximated[upper[~converged]] = True
+
+	# lower tail: x - 1 is at or before the mode, the terms x - 1, x - 2, ... decrease; P(X >= x) = 1 - P(X <= x - 1)
+	lower = np.flatnonzero(inside & ~wide & (x <= mode))
+	if len(lower) > 0:
+		log_first = log_hypergeometric_pmf(x[lower] - 1, total[lower], successes[lower], draws[lower])
+		log_cdf, converged = sum_terms(log_first, x[lower] - 1, total[lower], successes[lower], draws[lower], -1)
+		log_sf[lower] = np.log(-np.expm1(np.minimum(log_cdf, 0.)))
+		approximated[lower[~converged]] = True
+
+	approximated |= wide
+	if approximated.any():
+		log_sf[approximated] = normal_log_sf(x[approximated], total[approximated], successes[approximated], draws[approximated])
+
+	return log_sf, approximated
+
+def odds_ratio(a, b, c, d):
+	"""
+	Returns the (sample) odds ratios a*d / (b*c) of the tables; inf when b*c = 0
+	and nan when a row or column of the table is empty (as scipy.stats.fisher_exact).
+	"""
+	a, b, c, d = [np.asarray(array, dtype=np.float64) for array in (a, b, c, d)]
+	with np.errstate(divide='ignore', invalid='ignore'):
+		ratio = (a * d) / (b * c)
+	ratio[(a + c == 0) | (b + d == 0) | (a + b == 0) | (c + d == 0)] = np.nan
+	return ratio
+
+def fisher_exact(a, b, c, d, alternative='greater', max_sd=MAX_SD):
+	"""
+	One-sided Fisher's exact test of many 2x2 tables at once (see the table at the
+	top of this file). Gives the same results as scipy.stats.fisher_exact([[a, c], [b, d]])
+	for every table, but takes seconds for hundreds of thousands of tables.
+
+	Args:
+		a, b, c, d  - arrays (or lists) with the counts of the tables
+		alternative - 'greater': more of the community contributed than expected;
+		              'less': fewer (Default: 'greater')
+		max_sd      - tables for which the standard deviation of a (given the margins)
+		              is larger, are approximated with the normal distribution (Default: 1000)
+
+	Returns:
+		odds_ratios - array with the odds ratio of every table
+		p_values    - array with the p-value of every table
+	"""
+	if alternative not in ALTERNATIVES:
+		raise ValueError("alternative should be one of: %s"%', '.join(ALTERNATIVES))
+	a, b, c, d = [np.atleast_1d(np.asarray(array, dtype=np.int64)) for array in (a, b, c, d)]
+
+	total = a + b + c + d
+	if alternative == 'greater': # P(X >= a), X the number of the community that contributed
+		log_p_values, _ = hypergeometric_log_sf(a, total, a + c, a + b, max_sd=max_sd)
+	else: # P(X <= a) = P(Y >= b), Y the number of the community that did not contribute
+		log_p_values, _ = hypergeometric_log_sf(b, total, b + d, a + b, max_sd=max_sd)
+
+	p_values = np.minimum(np.exp(log_p_values), 1.)
+	p_values[(a + c == 0) | (b + d == 0) | (a + b == 0) | (c + d == 0)] = 1.
+
+	return odds_ratio(a, b, c, d), p_values
@@ -0,0 +1,164 @@
+"""
+	Buffered writer for the tab-delimited output. The rows of a page are
+	collected in memory and only committed once the page was scraped
+	completely; a page that fails is rolled back, so that it never leaves
+	partial rows in the output (which a retry would then duplicate). The
+	committed rows are written to the file in large blocks.
+"""
+
+DEFAULT_BUFFER_SIZE = 1 << 20 # number of characters that are collected before they are written
+
+# tabs and newlines in a field would break the columns/rows of the output
+ESCAPES = str.maketrans({'\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def escape_field(value):
+	"""
+	Returns the value as a string in which tabs and newlines are escaped (as \\t,
+	\\n and \\r).
+	"""
+	if isinstance(value, str):
+		return value.translate(ESCAPES)
+	return str(value)
+
+def format_row(row):
+	"""
+	Returns the row (a sequence of fields) as a tab-delimited line (with newline).
+	"""
+	line = '\t'.join(map(str, row))
+	# escaping every field is slow; it is only needed when a field has a tab or newline
+	if line.count('\t') != len(row) - 1 or '\n' in line or '\r' in line:
+		line = '\t'.join([escape_field(value) for value in row])
+	return line + '\n'
+
+class TSVWriter:
+	"""
+	Writes rows (tab-delimited) to a file. The rows of the current page are kept
+	until commit() (or discarded by rollback()); committed rows are written to
+	the file in blocks of about buffer_size characters, and by flush().
+
+	Example:
+
+		writer = TSVWriter(outputfile)
+		for title in titles:
+			try:
+				for row in scrape(title):
+					writer.write_row(row)
+			except ScrapeError:
+				writer.rollback()
+			else:
+				writer.commit()
+		writer.flush()
+
+	Args:
+		file        - the file (or any object with write and flush) the rows are written to
+		buffer_size - number of characters collected before they are written (Default: 1 MiB)
+	"""
+	def __init__(self, file, buffer_size=DEFAULT_BUFFER_SIZE):
+		self.file        = file
+		self.buffer_size = buffer_size
+		self.page        = [] # lines of the current page
+		self.block       = [] # committed lines that are not written yet
+		self.block_size  = 0
+		self.n_rows      = 0  # number of rows committed
+
+	def write_header(self, columns):
+		"""
+		Writes the names of the columns as the first line.
+		"""
+		self.write_row(columns)
+		self.commit()
+
+	def write_row(self, row):
+		"""
+		Adds the row (a sequence of fields) to the current page.
+		"""
+		self.page.append(format_row(row))
+
+	def write_rows(self, rows):
+		"""
+		Adds the rows to the current page.
+		"""
+		self.page.extend([format_row(row) for row in rows])
+
+	def commit(self):
+		"""
+		Commits the rows of the current page; they are written with the next block.
+		"""
+		page, self.page = self.page, []
+		self.block.extend(page)
+		self.block_size += sum([len(line) for line in page])
+		self.n_rows     += len(page)
+		if self.block_size >= self.buffer_size:
+			self.write_block()
+
+	def rollback(self):
+		"""
+		Discards the rows of the current page.
+		"""
+		self.page = []
+
+	def write_block(self):
+		if self.block:
+			self.file.write(''.join(self.block))
+		self.block      = []
+		self.block_size = 0
+
+	def flush(self):
+		"""
+		Writes all committed rows to the file and flushes the file; the rows of the
+		current page (if any) are not written.
+		"""
+		self.write_block()
+		self.file.flush()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.flush()
+		return False
+
+class RowBuffer:
+	"""
+	Collects the rows of a single page as they are (not formatted), e.g., for the
+	crawl engine when the output is not a text file (see columnar.py). Has the
+	same methods as TSVWriter.
+	"""
+	def __init__(self):
+		self.rows = []
+		self.page = []
+
+	def write_header(self, columns):
+		pass
+
+	def write_row(self, row):
+		self.page.append(row)
+
+	def write_rows(self, rows):
+		self.page.extend(rows)
+
+	def commit(self):
+		self.rows.extend(self.page)
+		self.page = []
+
+	def rollback(self):
+		self.page = []
+
+	def flush(self):
+		pass
+
+def is_writer(file):
+	"""
+	Returns True when the file is a writer of rows (e.g., a TSVWriter) rather than
+	a plain file.
+	"""
+	return hasattr(file, 'write_row')
+
+def get_writer(file):
+	"""
+	Returns the file when it is a writer of rows already, otherwise a new TSVWriter
+	that writes to the file.
+	"""
+	if is_writer(file):
+		return file
+	return TSVWriter(file)
@@ -0,0 +1,305 @@
+import re
+import time
+import codecs
+from html.parser import HTMLParser
+
+from .profiling import profile_stage, FETCH, WALK
+
+"""
+	Streaming parser for the tables on the XTools pages. Instead of building
+	a DOM of the whole page (BeautifulSoup), flattening it to text and walking
+	through the lines with fixed offsets, the tables are extracted directly
+	from the stream of HTML tokens. The columns are found by the names in the
+	header of the table, so the parser does not depend on the exact layout of
+	the rows. The rows are emitted as soon as they are complete; the page can
+	be fed in chunks while it is being downloaded (see TableStream).
+"""
+
+# columns of the table with the top editors on the articleinfo pages;
+# field -> names of the header cell (lowercase, in order of preference)
+ARTICLE_EDITORS_COLUMNS = (
+	('username',      ('username', 'user')),
+	('n_edits',       ('edits',)),
+	('n_minor_edits', ('minor edits', 'minor')),
+	('first_edit',    ('first edit',)),
+	('last_edit',     ('latest edit', 'last edit')),
+	('added_bytes',   ('added (bytes)',)),
+)
+ARTICLE_EDITORS_REQUIRED = 'added (bytes)' # the header cell that identifies the table
+
+# columns of the table with the top edits on the topedits pages
+USER_TOP_EDITS_COLUMNS = (
+	('n_edits', ('edits',)),
+	('title',   ('page title', 'page', 'title', 'article')),
+)
+USER_TOP_EDITS_MARKER = 'top edits per namespace' # the table follows the heading with this text
+
+WHITESPACE = re.compile(r'\s+')
+
+def normalize_text(text):
+	"""
+	Collapses the white space in the text, strips it and converts it to lowercase.
+	"""
+	return WHITESPACE.sub(' ', text).strip().lower()
+
+class TableNotFound(Exception):
+	"""
+	Raised when the page does not contain the table.
+	"""
+	pass
+
+class TruncatedTable(Exception):
+	"""
+	Raised when the page ended in the middle of the table.
+	"""
+	pass
+
+class XToolsTableParser(HTMLParser):
+	"""
+	Extracts the rows of a single table from an XTools page. The table is the
+	first table whose header contains the required cell, after the text marker
+	(when given). Every row is a tuple with the (stripped) text of the cells in
+	the order of the columns; only the first line of text in a cell is used
+	(text in different elements counts as different lines), so links next to
+	a username (e.g., 'contribs') are ignored.
+
+	Example:
+
+		parser = XToolsTableParser(ARTICLE_EDITORS_COLUMNS, required=ARTICLE_EDITORS_REQUIRED)
+		for chunk in chunks:
+			parser.feed(chunk)
+			for row in parser.pop_rows():
+				...
+		parser.close() # raises TableNotFound or TruncatedTable
+
+	Args:
+		columns  - tuple of (field, names of the header cell) pairs
+		required - name of a header cell the table should have (Default: None)
+		marker   - text that precedes the table (Default: None)
+	"""
+	def __init__(self, columns, required=None, marker=None):
+		HTMLParser.__init__(self, convert_charrefs=True)
+		self.columns      = columns
+		self.required     = required
+		self.marker       = marker
+		self.seen_marker  = marker is None
+		self.marker_text  = ''    # the last piece of text, searched for the marker
+		self.rows         = []
+		self.found        = False # the table was found
+		self.finished     = False # the end of the table was reached
+		self.depth        = 0     # depth of nested tables
+		self.table_depth  = None  # depth of the table that is being parsed
+		self.header       = None  # header cell texts of the current candidate table
+		self.indices      = None  # index of the cell for every column
+		self.max_index    = None
+		self.cells        = None  # cells of the current row; every cell is a list of texts
+		self.in_cell      = False
+		self.header_cells = None  # True when the current row consists of th cells only
+
+	def pop_rows(self):
+		"""
+		Returns the rows that were parsed since the last call and forgets them.
+		"""
+		rows, self.rows = self.rows, []
+		return rows
+
+	def close(self):
+		"""
+		Parses the remaining data; raises TableNotFound when the table was not
+		found and TruncatedTable when the page ended in the middle of the table.
+		"""
+		HTMLParser.close(self)
+		if not self.found:
+			raise TableNotFound()
+		if not self.finished:
+			raise TruncatedTable()
+
+	def handle_starttag(self, tag, attrs):
+		if not self.seen_marker:
+			self.marker_text += ' '
+			return
+		if self.finished:
+			return
+		if tag == 'table':
+			self.depth += 1
+			if self.table_depth is None:
+				self.table_depth = self.depth
+				self.header      = None
+				self.indices     = None
+		elif self.depth != self.table_depth:
+			return
+		elif tag == 'tr':
+			self.cells        = []
+			self.header_cells = True
+			self.in_cell      = False
+		elif tag in ('td', 'th') and self.cells is not None:
+			self.cells.append([])
+			self.in_cell = True
+			if tag == 'td':
+				self.header_cells = False
+		elif self.in_cell and self.cells: # text in different elements is on different lines
+			self.cells[-1].append('\n')
+
+	def handle_endtag(self, tag):
+		if not self.seen_marker:
+			self.marker_text += ' '
+			return
+		if self.finished:
+			return
+		if tag == 'table':
+			if self.depth == self.table_depth:
+				self.end_row()
+				if self.found:
+					self.finished = True
+				self.table_depth = None
+			self.depth = max(0, self.depth - 1)
+		elif self.depth != self.table_depth:
+			return
+		elif tag in ('td', 'th'):
+			self.in_cell = False
+		elif tag == 'tr':
+			self.end_row()
+		elif self.in_cell and self.cells:
+			self.cells[-1].append('\n')
+
+	def handle_data(self, data):
+		if not self.seen_marker: # the data may be split over several calls
+			self.marker_text = WHITESPACE.sub(' ', self.marker_text[-len(self.marker):] + data).lower()
+			if self.marker in self.marker_text:
+				self.seen_marker = True
+			return
+		if self.in_cell and self.cells and self.depth == self.table_depth:
+			self.cells[-1].append(data)
+
+	def end_row(self):
+		cells, self.cells = self.cells, None
+		self.in_cell = False
+		if not cells:
+			return
+		if self.indices is None:
+			if self.header_cells:
+				self.set_header([normalize_text(''.join(cell)) for cell in cells])
+			return
+		if len(cells) <= self.max_index: # e.g., a row with totals
+			return
+		self.rows.append(tuple(self.get_value(cells[index]) for index in self.indices))
+
+	def set_header(self, header):
+		if self.required is not None and self.required not in header:
+			return
+		indices = []
+		for field, names in self.columns:
+			for name in names:
+				if name in header:
+					indices.append(header.index(name))
+					break
+			else: # the table does not have this column
+				return
+		self.found     = True
+		self.indices   = indices
+		self.max_index = max(indices)
+
+	def get_value(self, cell):
+		for line in ''.join(cell).splitlines():
+			line = line.strip()
+			if line:
+				return line
+		return ''
+
+class TableStream:
+	"""
+	Iterates over the rows of a table while the page is coming in: every chunk
+	(bytes or str) is decoded and fed to the parser, and the rows are yielded as
+	soon as they are complete. The time spent in parsing is kept in parse_time.
+	Iterating raises TableNotFound or TruncatedTable when the table is missing or
+	incomplete, and passes on the exceptions raised while reading the chunks.
+
+	Example:
+
+		rows = TableStream(client.stream(url), ARTICLE_EDITORS_COLUMNS, required=ARTICLE_EDITORS_REQUIRED)
+		for username, n_edits, n_minor_edits, first_edit, last_edit, added_bytes in rows:
+			...
+
+	Args:
+		chunks   - iterable with the pieces of the page (bytes or str)
+		columns  - tuple of (field, names of the header cell) pairs
+		required - name of a header cell the table should have (Default: None)
+		marker   - text that precedes the table (Default: None)
+		encoding - encoding of the chunks that are bytes (Default: 'utf-8')
+	"""
+	def __init__(self, chunks, columns, required=None, marker=None, encoding='utf-8'):
+		self.chunks     = chunks
+		self.parser     = XToolsTableParser(columns, required=required, marker=marker)
+		self.decoder    = codecs.getincrementaldecoder(encoding)(errors='replace')
+		self.parse_time = 0.
+
+	def feed(self, chunk, final=False):
+		start = time.time()
+		with profile_stage(WALK):
+			if isinstance(chunk, bytes):
+				chunk = self.decoder.decode(chunk, final=final)
+			self.parser.feed(chunk)
+			if final:
+				self.parser.close()
+			rows = self.parser.pop_rows()
+		self.parse_time += time.time() - start
+		return rows
+
+	def __iter__(self):
+		chunks = iter(self.chunks)
+		while True:
+			with profile_stage(FETCH):
+				chunk = next(chunks, None)
+			if chunk is None:
+				break
+			for row in self.feed(chunk):
+				yield row
+		for row in self.feed(b'', final=True):
+			yield row
+
+def parse_table(html, columns, required=None, marker=None):
+	"""
+	Returns the rows of the table in the HTML page.
+
+	Args:
+		html     - the page (str)
+		columns  - tuple of (field, names of the header cell) pairs
+		required - name of a header cell the table should have (Default: None)
+		marker   - text that precedes the table (Default: None)
+
+	Returns:
+		list of rows (tuples in the order of the columns); raises TableNotFound
+		or TruncatedTable when the table is missing or incomplete
+	"""
+	parser = XToolsTableParser(columns, required=required, marker=marker)
+	parser.feed(html)
+	parser.close()
+	return parser.pop_rows()
+
+def parse_article_editors(html):
+	"""
+	Returns the rows (username, n_edits, n_minor_edits, first_edit, last_edit,
+	added_bytes) of the table with the top editors on an articleinfo page.
+	"""
+	return parse_table(html, ARTICLE_EDITORS_COLUMNS, required=ARTICLE_EDITORS_REQUIRED)
+
+def parse_user_top_edits(html):
+	"""
+	Returns the rows (n_edits, title) of the table with the top edits on a
+	topedits page.
+	"""
+	return parse_table(html, USER_TOP_EDITS_COLUMNS, marker=USER_TOP_EDITS_MARKER)
+
+def stream_article_editors(chunks):
+	"""
+	Returns a TableStream over the rows (username, n_edits, n_minor_edits, first_edit,
+	last_edit, added_bytes) of the table with the top editors on an articleinfo page.
+	"""
+	return TableStream(chunks, ARTICLE_EDITORS_COLUMNS, required=ARTICLE_EDITORS_REQUIRED)
+
+def stream_user_top_edits(chunks):
+	"""
+	Returns a TableStream over the rows (n_edits, title) of the table with the top
+	edits on a topedits page.
+	"""
+	return TableStream(chunks, USER_TOP_EDITS_COLUMNS, marker=USER_TOP_EDITS_MARKER)